@@ -0,0 +1,103 @@
+"""
+Bootstrapping a node from a chain export: add_blocks versus bulk import.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_bootstrap [--blocks 2000] [--tx-per-block 20] [--workers 1] [--data-dir]
+
+Builds a chain once (difficulty 1, not timed), exports it, then rebuilds it
+in a fresh chain three ways: decoding every record and calling add_blocks
+in batches, a fully verified import_chain and an import trusting the final
+hash. Reports blocks/s and MB/s of export file consumed. --data-dir imports
+into a temporary persistent store instead of memory.
+"""
+import argparse
+import io
+import tempfile
+import time
+from decimal import Decimal
+
+from src.block import Block
+from src.blockchain import Blockchain
+from src.bootstrap import export_chain, import_chain, read_export
+from src.config import IMPORT_BATCH_SIZE, MINING_REWARD
+from src.storage import decode_record
+from src.transaction import Transaction
+
+
+def build_chain(blocks: int, tx_per_block: int) -> Blockchain:
+    # Unsigned transfers: signing would dominate building large chains
+    blockchain = Blockchain(data_dir=None, require_signatures=False)
+    blockchain.difficulty = 1
+    for height in range(1, blocks + 1):
+        timestamp = 1700000000.0 + height
+        # Spend earlier rewards; the block's own reward comes last
+        transactions = [Transaction("miner", f"address{(height * tx_per_block + i) % 997}", Decimal("0.01"),
+                                    timestamp + i / 1000) for i in range(tx_per_block - 1 if height > 1 else 0)]
+        transactions.append(Transaction("System", "miner", Decimal(MINING_REWARD), timestamp))
+        block = Block(transactions, blockchain.get_latest_block().hash, timestamp)
+        block.mine(blockchain.difficulty, 1, blockchain.next_target())
+        blockchain.add_blocks([block])
+    return blockchain
+
+
+def fresh_chain(data_dir) -> Blockchain:
+    blockchain = Blockchain(data_dir, require_signatures=False)
+    blockchain.difficulty = 1
+    return blockchain
+
+
+def time_add_blocks(export: bytes, data_dir) -> float:
+    blockchain = fresh_chain(data_dir)
+    start = time.perf_counter()
+    _, _, records = read_export(io.BytesIO(export))
+    blocks = [decode_record(record) for record in records][1:]
+    for offset in range(0, len(blocks), IMPORT_BATCH_SIZE):
+        blockchain.add_blocks(blocks[offset:offset + IMPORT_BATCH_SIZE])
+    elapsed = time.perf_counter() - start
+    blockchain.close()
+    return elapsed
+
+
+def time_import(export: bytes, data_dir, workers: int, trusted_hash=None) -> float:
+    blockchain = fresh_chain(data_dir)
+    start = time.perf_counter()
+    import_chain(blockchain, io.BytesIO(export), trusted_hash, workers=workers)
+    elapsed = time.perf_counter() - start
+    blockchain.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=2000)
+    parser.add_argument("--tx-per-block", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="hash verification processes for the verified import")
+    parser.add_argument("--data-dir", action="store_true", help="import into a persistent store")
+    args = parser.parse_args()
+
+    source = build_chain(args.blocks, args.tx_per_block)
+    stream = io.BytesIO()
+    export_chain(source, stream)
+    export = stream.getvalue()
+    tip = source.get_latest_block().hash
+    source.close()
+    print(f"{args.blocks} blocks x {args.tx_per_block} transactions, export {len(export) / 1e6:.1f} MB")
+
+    runs = (
+        ("add_blocks", lambda data_dir: time_add_blocks(export, data_dir)),
+        ("import (verified)", lambda data_dir: time_import(export, data_dir, args.workers)),
+        ("import (trusted)", lambda data_dir: time_import(export, data_dir, args.workers, tip)),
+    )
+    print(f"{'method':<20} {'seconds':>9} {'blocks/s':>10} {'MB/s':>7}")
+    for name, run in runs:
+        if args.data_dir:
+            with tempfile.TemporaryDirectory() as data_dir:
+                elapsed = run(data_dir)
+        else:
+            elapsed = run(None)
+        print(f"{name:<20} {elapsed:>9.3f} {args.blocks / elapsed:>10,.0f} {len(export) / elapsed / 1e6:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Binary codec versus the JSON encodings: throughput and size.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_codec [--blocks 200] [--transactions 100]
+
+For blocks of --transactions transfers, compares:
+
+* json (hash form): json.dumps of the blocks' hashed dicts (float amounts);
+  produced for every v1 block hash and lossy for Decimal amounts,
+* json (record): the decimal-string JSON records BlockStore wrote before,
+* binary: src.codec, decoding with transaction-id verification (as storage
+  and peers do) and trusted (ids taken as stored).
+"""
+import argparse
+import io
+import json
+import time
+from decimal import Decimal
+
+from src.block import Block
+from src.codec import encode_block, decode_block, iter_blocks, write_blocks
+from src.storage import _decode_json_block, _encode_json_block
+from src.transaction import Transaction
+
+
+def build_blocks(count: int, tx_count: int):
+    blocks = []
+    previous_hash = "0"
+    for height in range(count):
+        transactions = [Transaction(f"address{i % 97}", f"address{(i * 7) % 101}", Decimal(f"{i % 500 + 1}.25"),
+                                    fee=Decimal("0.10") if i % 3 else Decimal(0))
+                        for i in range(height * tx_count, (height + 1) * tx_count)]
+        block = Block(transactions, previous_hash)
+        blocks.append(block)
+        previous_hash = block.hash
+    return blocks
+
+
+def hash_form(block: Block) -> bytes:
+    content = {"nonce": block.nonce, "previous_hash": block.previous_hash, "timestamp": block.timestamp,
+               "transactions": [t.to_dict(copy=False) for t in block.transactions]}
+    return json.dumps(content, separators=(', ', ': ')).encode()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=200)
+    parser.add_argument("--transactions", type=int, default=100)
+    args = parser.parse_args()
+
+    blocks = build_blocks(args.blocks, args.transactions)
+    total_tx = args.blocks * args.transactions
+
+    hashed, hash_encode = timed(lambda: [hash_form(b) for b in blocks])
+    records, record_encode = timed(lambda: [_encode_json_block(b) for b in blocks])
+    binary, binary_encode = timed(lambda: [encode_block(b) for b in blocks])
+    _, hash_decode = timed(lambda: [json.loads(r) for r in hashed])
+    _, record_decode = timed(lambda: [_decode_json_block(r) for r in records])
+    _, verified_decode = timed(lambda: [decode_block(r) for r in binary])
+    _, trusted_decode = timed(lambda: [decode_block(r, 0, False) for r in binary])
+
+    stream = io.BytesIO()
+    _, stream_encode = timed(write_blocks, stream, blocks)
+    view = memoryview(stream.getvalue())
+    _, stream_decode = timed(lambda: sum(1 for _ in iter_blocks(view, verify=False)))
+
+    print(f"{args.blocks:,} blocks x {args.transactions} transactions ({total_tx:,} transactions)")
+    print(f"{'format':<22} {'bytes/tx':>9} {'encode tx/s':>13} {'decode tx/s':>13}")
+    rows = [
+        ("json (hash form)", hashed, hash_encode, hash_decode, " (dicts only)"),
+        ("json (record)", records, record_encode, record_decode, ""),
+        ("binary (verify ids)", binary, binary_encode, verified_decode, ""),
+        ("binary (trusted)", binary, binary_encode, trusted_decode, ""),
+    ]
+    for label, payloads, encode_time, decode_time, note in rows:
+        size = sum(len(p) for p in payloads) / total_tx
+        print(f"{label:<22} {size:>9.1f} {total_tx / encode_time:>13,.0f} {total_tx / decode_time:>13,.0f}{note}")
+    print(f"{'binary stream':<22} {len(view) / total_tx:>9.1f} {total_tx / stream_encode:>13,.0f}"
+          f" {total_tx / stream_decode:>13,.0f} (memoryview, trusted)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Per-hash mining cost versus block size for each block format.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_header [--nonces 200000]
+
+Version 1 blocks re-hash the whole JSON document on every attempt, so their
+rate falls as blocks grow. Version 2 blocks hash a copy of a precomputed
+header midstate plus 8 nonce bytes, so their rate should stay flat.
+"""
+import argparse
+
+from benchmarks.bench_mining import measure
+from src.block import JSON_BLOCK_VERSION, HEADER_BLOCK_VERSION
+
+BLOCK_SIZES = (1, 10, 100, 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nonces", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'transactions':>12}  {'v1 hashes/sec':>14}  {'v2 hashes/sec':>14}")
+    for tx_count in BLOCK_SIZES:
+        v1 = measure(1, args.nonces, tx_count, JSON_BLOCK_VERSION)
+        v2 = measure(1, args.nonces, tx_count, HEADER_BLOCK_VERSION)
+        print(f"{tx_count:>12}  {v1:>14,.0f}  {v2:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
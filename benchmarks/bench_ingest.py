@@ -0,0 +1,60 @@
+"""
+Transaction ingestion: add_transaction loop versus add_transactions batch.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ingest [--sizes 10000 100000] [--senders 1000]
+
+Senders are funded directly in the balance cache so no mining is needed.
+Transaction construction is excluded from the timings.
+"""
+import argparse
+import time
+from decimal import Decimal
+
+from src.blockchain import Blockchain
+from src.transaction import Transaction
+
+
+def funded_chain(senders: int) -> Blockchain:
+    blockchain = Blockchain(data_dir=None, require_signatures=False)
+    for i in range(senders):
+        blockchain.balances[f"sender{i}"] = Decimal(1_000_000)
+    return blockchain
+
+
+def make_transactions(count: int, senders: int):
+    return [Transaction(f"sender{i % senders}", f"recipient{i}", Decimal("1.50")) for i in range(count)]
+
+
+def time_loop(transactions, senders: int) -> float:
+    blockchain = funded_chain(senders)
+    start = time.perf_counter()
+    for tx in transactions:
+        blockchain.add_transaction(tx)
+    return time.perf_counter() - start
+
+
+def time_batch(transactions, senders: int) -> float:
+    blockchain = funded_chain(senders)
+    start = time.perf_counter()
+    blockchain.add_transactions(transactions)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--senders", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'transactions':>12}  {'loop (s)':>9}  {'batch (s)':>9}  {'speedup':>7}")
+    for size in args.sizes:
+        transactions = make_transactions(size, args.senders)
+        loop = time_loop(transactions, args.senders)
+        batch = time_batch(transactions, args.senders)
+        print(f"{size:>12,}  {loop:>9.4f}  {batch:>9.4f}  {loop / batch:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
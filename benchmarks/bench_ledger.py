@@ -0,0 +1,78 @@
+"""
+Balance-update throughput of the Decimal and integer-cents ledgers.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ledger [--transactions 1000000] [--addresses 10000] [--block-size 1000]
+
+Replays --transactions transfers (in blocks of --block-size, between
+--addresses accounts, all with fees) into an empty balance table the way a
+node does on start-up, once in Decimal ZAR and once in integer cents, and
+checks both end with the same balances. Also times add_transactions on a
+funded chain of each kind. Building the transactions is not timed.
+"""
+import argparse
+import time
+from decimal import Decimal
+
+from src.block import Block
+from src.blockchain import Blockchain
+from src.transaction import Transaction, from_cents
+
+
+def make_blocks(transactions: int, addresses: int, block_size: int):
+    blocks = []
+    for start in range(0, transactions, block_size):
+        txs = [Transaction(f"address{i % addresses}", f"address{(i * 7 + 1) % addresses}",
+                           Decimal(f"{i % 900 + 1}.25"), 1700000000.0 + i, Decimal("0.10"))
+               for i in range(start, min(start + block_size, transactions))]
+        blocks.append(Block(txs, "0" * 64, 1700000000.0))
+    return blocks
+
+
+def time_replay(blocks, cents: bool):
+    balances = {}
+    start = time.perf_counter()
+    for block in blocks:
+        Blockchain._apply_block(balances, block, cents)
+    return time.perf_counter() - start, balances
+
+
+def time_admission(transactions, senders: int, cents: bool) -> float:
+    blockchain = Blockchain(data_dir=None, ledger_cents=cents, require_signatures=False)
+    for i in range(senders):
+        blockchain.balances[f"sender{i}"] = 100_000_000 if cents else Decimal(1_000_000)
+    start = time.perf_counter()
+    blockchain.add_transactions(transactions)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--addresses", type=int, default=10_000)
+    parser.add_argument("--block-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"Building {args.transactions:,} transactions...", flush=True)
+    blocks = make_blocks(args.transactions, args.addresses, args.block_size)
+
+    print(f"{'replay':<10} {'seconds':>9} {'tx/s':>12}")
+    results = {}
+    for name, cents in (("decimal", False), ("cents", True)):
+        elapsed, balances = time_replay(blocks, cents)
+        results[name] = balances
+        print(f"{name:<10} {elapsed:>9.3f} {args.transactions / elapsed:>12,.0f}")
+    if {a: from_cents(v) for a, v in results["cents"].items()} != results["decimal"]:
+        raise SystemExit("The ledgers disagree.")
+
+    count = min(args.transactions, 100_000)
+    transactions = [Transaction(f"sender{i % 100}", f"recipient{i}", Decimal("1.50")) for i in range(count)]
+    print(f"\n{'admission':<10} {'seconds':>9} {'tx/s':>12}")
+    for name, cents in (("decimal", False), ("cents", True)):
+        elapsed = time_admission(transactions, 100, cents)
+        print(f"{name:<10} {elapsed:>9.3f} {count / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Memory per Transaction.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_memory [--count 1000000]
+
+Reports traced bytes per transaction for:
+
+* compact  - transactions as held in a mempool or binary-header block
+* with dict - after to_dict() has been materialised, as JSON (v1) block
+  hashing does; this matches the pre-__slots__ layout, which always
+  carried the cached dict
+"""
+import argparse
+import gc
+import tracemalloc
+from decimal import Decimal
+
+from src.transaction import Transaction
+
+
+def build(count: int):
+    amount = Decimal("12.50")
+    return [Transaction(f"sender{i % 1000}", f"recipient{i}", amount, 1700000000.0 + i) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    transactions = build(args.count)
+    compact, _ = tracemalloc.get_traced_memory()
+    for tx in transactions:
+        tx.to_dict(copy=False)
+    with_dict, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"transactions:            {args.count:,}")
+    print(f"compact (bytes/tx):      {(compact - base) / args.count:,.0f}")
+    print(f"with dict (bytes/tx):    {(with_dict - base) / args.count:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
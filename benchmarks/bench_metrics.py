@@ -0,0 +1,62 @@
+"""
+Cost of the metrics instrumentation on the hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_metrics [--transactions 20000] [--blocks 20] [--difficulty 3]
+
+Times Blockchain.add_transaction and Block.mine with metrics disabled (the
+default) and enabled, and prints the enabled run's Prometheus dump. The
+disabled run should match the uninstrumented code to within noise.
+"""
+import argparse
+import time
+from decimal import Decimal
+
+from src.block import Block
+from src.blockchain import Blockchain
+from src.metrics import METRICS
+from src.transaction import Transaction
+
+
+def run(transactions: int, blocks: int, difficulty: int):
+    blockchain = Blockchain(require_signatures=False)
+    for i in range(100):
+        blockchain.balances[f"sender{i}"] = Decimal(10 ** 9)
+    txs = [Transaction(f"sender{i % 100}", f"address{i % 100}", Decimal(i + 1)) for i in range(transactions)]
+    start = time.perf_counter()
+    for tx in txs:
+        blockchain.add_transaction(tx)
+    add_time = time.perf_counter() - start
+
+    previous_hash = blockchain.get_latest_block().hash
+    start = time.perf_counter()
+    for i in range(blocks):
+        block = Block([Transaction("System", "Miner", Decimal(10), float(i))], previous_hash, float(i))
+        block.mine(difficulty, 1)
+        previous_hash = block.hash
+    mine_time = time.perf_counter() - start
+    blockchain.close()
+    return add_time, mine_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--blocks", type=int, default=20)
+    parser.add_argument("--difficulty", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'metrics':<10} {'add_transaction/s':>18} {'mine s/block':>13}")
+    for enabled in (False, True):
+        METRICS.reset()
+        METRICS.enabled = enabled
+        add_time, mine_time = run(args.transactions, args.blocks, args.difficulty)
+        print(f"{'on' if enabled else 'off':<10} {args.transactions / add_time:>18,.0f}"
+              f" {mine_time / args.blocks:>13.4f}")
+    print()
+    print(METRICS.render(), end="")
+
+
+if __name__ == "__main__":
+    main()
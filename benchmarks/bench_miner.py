@@ -0,0 +1,81 @@
+"""
+Mining throughput of the Miner backends against Block.mine.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_miner [--blocks 20] [--difficulty 4] [--workers 0] [--unit-size 100000]
+
+Mines --blocks blocks on a fresh in-memory chain with each method: the
+existing Block.mine (a new process pool per block when --workers is not 1),
+a Miner with an in-process backend, one with a persistent process pool, and
+one sending work units to a socket worker on localhost. Reports blocks/s,
+and the hash rate from the nonces tried.
+"""
+import argparse
+import time
+
+from src.blockchain import Blockchain
+from src.miner import InProcessBackend, Miner, ProcessPoolBackend, SocketBackend, serve_worker
+from src.mining import resolve_workers
+
+
+def new_chain(difficulty: int) -> Blockchain:
+    blockchain = Blockchain(data_dir=None)
+    blockchain.difficulty = difficulty
+    return blockchain
+
+
+def time_block_mine(blocks: int, difficulty: int, workers: int):
+    blockchain = new_chain(difficulty)
+    blockchain.mining_workers = workers
+    start = time.perf_counter()
+    for _ in range(blocks):
+        blockchain.mine_pending_transactions("Miner")
+    return time.perf_counter() - start, blockchain
+
+
+def time_miner(blocks: int, difficulty: int, backend, unit_size: int):
+    blockchain = new_chain(difficulty)
+    miner = Miner(blockchain, [backend], unit_size=unit_size)
+    start = time.perf_counter()
+    for _ in range(blocks):
+        miner.mine("Miner")
+    elapsed = time.perf_counter() - start
+    miner.close()
+    return elapsed, blockchain
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=20)
+    parser.add_argument("--difficulty", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=0, help="processes for the pooled methods (0 = all cores)")
+    parser.add_argument("--unit-size", type=int, default=100_000)
+    args = parser.parse_args()
+    workers = resolve_workers(args.workers)
+
+    server = serve_worker("127.0.0.1", 0)
+    runs = (
+        ("Block.mine (1 process)", lambda: time_block_mine(args.blocks, args.difficulty, 1)),
+        (f"Block.mine ({workers} processes)", lambda: time_block_mine(args.blocks, args.difficulty, workers)),
+        ("Miner in-process", lambda: time_miner(args.blocks, args.difficulty, InProcessBackend(), args.unit_size)),
+        (f"Miner pool ({workers} processes)",
+         lambda: time_miner(args.blocks, args.difficulty, ProcessPoolBackend(workers), args.unit_size)),
+        ("Miner socket worker", lambda: time_miner(args.blocks, args.difficulty,
+                                                   SocketBackend(*server.server_address[:2]), args.unit_size)),
+    )
+    print(f"{args.blocks} blocks at difficulty {args.difficulty}")
+    print(f"{'method':<28} {'seconds':>9} {'blocks/s':>9} {'hashes/s':>12}")
+    try:
+        for name, run in runs:
+            elapsed, blockchain = run()
+            # Nonces up to each winner; Miner backends start every template at 0
+            hashes = sum(block.nonce + 1 for block in blockchain.chain[1:])
+            print(f"{name:<28} {elapsed:>9.3f} {args.blocks / elapsed:>9.2f} {hashes / elapsed:>12,.0f}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
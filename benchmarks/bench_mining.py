@@ -0,0 +1,76 @@
+"""
+Proof-of-Work throughput: hashes/sec for 1..N mining processes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_mining [--max-workers N] [--nonces 2000000]
+
+Each run sweeps a fixed nonce range at an unreachable target, so every
+worker count does exactly the same amount of hashing and the numbers are
+directly comparable.
+"""
+import argparse
+import json
+import os
+import time
+from decimal import Decimal
+
+from src.block import Block, HEADER_BLOCK_VERSION
+from src.config import BLOCK_VERSION
+from src.mining import parallel_search, _search_range, _search_header_range
+from src.transaction import Transaction
+
+UNREACHABLE_TARGET = 0
+
+
+def build_block(tx_count: int, version: int = BLOCK_VERSION) -> Block:
+    transactions = [Transaction(f"sender{i}", f"recipient{i}", Decimal("1.25")) for i in range(tx_count)]
+    return Block(transactions, "0" * 64, version=version)
+
+
+def mining_affixes(block: Block):
+    """
+    :return: (prefix, suffix, search function) for the block's layout.
+    """
+    if block.version == HEADER_BLOCK_VERSION:
+        return block.header_prefix(), b"", _search_header_range
+    static_content = {
+        "previous_hash": block.previous_hash,
+        "timestamp": block.timestamp,
+        "transactions": [t.to_dict(copy=False) for t in block.transactions]
+    }
+    suffix = ", " + json.dumps(static_content, separators=(', ', ': '))[1:]
+    return b'{"nonce": ', suffix.encode(), _search_range
+
+
+def measure(workers: int, nonces: int, tx_count: int, version: int = BLOCK_VERSION) -> float:
+    """
+    :return: Hashes per second for `workers` processes over `nonces` attempts.
+    """
+    prefix, suffix, search = mining_affixes(build_block(tx_count, version))
+    start = time.perf_counter()
+    if workers == 1:
+        search(prefix, suffix, 0, nonces, UNREACHABLE_TARGET)
+    else:
+        parallel_search(prefix, suffix, UNREACHABLE_TARGET, stop=nonces, workers=workers, search=search)
+    return nonces / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--nonces", type=int, default=2_000_000)
+    parser.add_argument("--transactions", type=int, default=10)
+    parser.add_argument("--block-version", type=int, default=BLOCK_VERSION)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'workers':>7}  {'hashes/sec':>12}  {'speedup':>7}")
+    for workers in range(1, args.max_workers + 1):
+        rate = measure(workers, args.nonces, args.transactions, args.block_version)
+        baseline = baseline or rate
+        print(f"{workers:>7}  {rate:>12,.0f}  {rate / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+JSON-RPC node load generator: requests/sec and p50/p99 latency.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_node [--clients 32] [--requests 20000] [--write-ratio 0.5]
+    python -m benchmarks.bench_node --connect 127.0.0.1:8545
+
+By default a fresh in-memory node is started in a subprocess on a free
+localhost port; --connect targets an already running node instead.
+Writes are signed add_transaction calls spending 0.01 from a wallet per
+client, funded beforehand by mining to it; reads are get_balance calls.
+Funding and signing are not timed.
+"""
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+from src.config import MINING_REWARD
+from src.node import NodeClient
+from src.wallet import Wallet
+
+# Amount of each write; small so one mining reward funds many
+WRITE_AMOUNT = Decimal("0.01")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def prepare_requests(client: NodeClient, client_id: int, count: int,
+                           write_ratio: float) -> List[Tuple[str, Tuple[Any, ...]]]:
+    """
+    A client's request sequence, with its writes signed by a wallet that is
+    funded (by mining to it) to cover them.
+    """
+    rng = random.Random(client_id)
+    wallet = Wallet()
+    requests = []
+    for i in range(count):
+        if rng.random() < write_ratio:
+            tx = wallet.create_transaction(f"load{client_id}-{i}", WRITE_AMOUNT)
+            requests.append(("add_transaction", (tx.sender, tx.recipient, str(tx.amount), "0", tx.timestamp,
+                                                 tx.public_key.hex(), tx.signature.hex())))
+        else:
+            requests.append(("get_balance", (f"load{client_id}-{rng.randrange(max(1, i))}",)))
+    writes = sum(method == "add_transaction" for method, _ in requests)
+    for _ in range(int(writes * WRITE_AMOUNT // MINING_REWARD) + 1):
+        await client.call("mine", wallet.address)
+    return requests
+
+
+async def client_loop(client: NodeClient, requests: List[Tuple[str, Tuple[Any, ...]]],
+                      latencies: Dict[str, List[float]]):
+    for method, args in requests:
+        start = time.perf_counter()
+        await client.call(method, *args)
+        latencies[method].append(time.perf_counter() - start)
+
+
+async def run(host: str, port: int, clients: int, requests: int, write_ratio: float):
+    connections = [await NodeClient.connect(host, port) for _ in range(clients)]
+    latencies: Dict[str, List[float]] = {"add_transaction": [], "get_balance": []}
+    per_client = requests // clients
+    prepared = [await prepare_requests(client, i, per_client, write_ratio) for i, client in enumerate(connections)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop(client, client_requests, latencies)
+                           for client, client_requests in zip(connections, prepared)))
+    elapsed = time.perf_counter() - start
+    for client in connections:
+        await client.close()
+
+    total = per_client * clients
+    print(f"{clients} clients, {total:,} requests in {elapsed:.2f}s: {total / elapsed:,.0f} req/s")
+    print(f"{'method':>16}  {'count':>7}  {'p50 (ms)':>9}  {'p99 (ms)':>9}")
+    everything = sorted(v for values in latencies.values() for v in values)
+    for method, values in list(latencies.items()) + [("all", everything)]:
+        if not values:
+            continue
+        values = sorted(values)
+        print(f"{method:>16}  {len(values):>7,}  {percentile(values, 0.50) * 1000:>9.3f}"
+              f"  {percentile(values, 0.99) * 1000:>9.3f}")
+
+
+def start_node() -> Tuple[subprocess.Popen, str, int]:
+    process = subprocess.Popen([sys.executable, "-m", "src.node", "--port", "0"],
+                               stdout=subprocess.PIPE, text=True)
+    # "RandCoin node listening on HOST:PORT"
+    address = process.stdout.readline().strip().rsplit(" ", 1)[-1]
+    host, port = address.rsplit(":", 1)
+    return process, host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connect", metavar="HOST:PORT", help="use a running node instead of starting one")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--write-ratio", type=float, default=0.5, help="fraction of add_transaction calls")
+    args = parser.parse_args()
+
+    process = None
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+        port = int(port)
+    else:
+        process, host, port = start_node()
+    try:
+        asyncio.run(run(host, port, args.clients, args.requests, args.write_ratio))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
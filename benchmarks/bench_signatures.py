@@ -0,0 +1,64 @@
+"""
+Signature throughput: signing, verification, parallel batches and the cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_signatures [--transactions 400] [--wallets 50] [--workers 1 2 4]
+
+Signs --transactions transfers from --wallets wallets, then reports:
+
+* sign/s and single-signature verify/s (pure-Python secp256k1),
+* SignatureVerifier.verify_many over the whole batch for each --workers
+  count (1 = in-process; more spreads chunks over a process pool, started
+  before timing),
+* re-verifying the batch once it is cached, as happens when a block
+  arrives with transactions already admitted to the mempool.
+"""
+import argparse
+import time
+from decimal import Decimal
+
+from src import secp256k1
+from src.signatures import SignatureVerifier, check_signature
+from src.wallet import Wallet
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=400)
+    parser.add_argument("--wallets", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    _, table_time = timed(secp256k1.public_key, 1)
+    wallets = [Wallet() for _ in range(args.wallets)]
+    txs, sign_time = timed(lambda: [wallets[i % len(wallets)].create_transaction("Bob", Decimal(i + 1))
+                                    for i in range(args.transactions)])
+    print(f"{args.transactions:,} transactions from {len(wallets)} wallets"
+          f" (generator table built in {table_time * 1000:.0f} ms)")
+    print(f"{'sign':<28} {args.transactions / sign_time:>10,.0f} /s")
+
+    _, verify_time = timed(lambda: [check_signature(tx.sender, tx.id, tx.public_key, tx.signature) for tx in txs])
+    print(f"{'verify (one at a time)':<28} {args.transactions / verify_time:>10,.0f} /s")
+
+    for workers in args.workers:
+        verifier = SignatureVerifier(workers=workers)
+        # A node starts its pool once; warm it up on other transactions so it isn't timed
+        warm_up = [wallets[0].create_transaction("Carol", Decimal(i + 1)) for i in range(2 * verifier.chunk_size)]
+        verifier.verify_many(warm_up)
+        results, batch_time = timed(verifier.verify_many, txs)
+        assert all(results)
+        _, cached_time = timed(verifier.verify_many, txs)
+        verifier.close()
+        print(f"{f'verify_many, {workers} worker(s)':<28} {args.transactions / batch_time:>10,.0f} /s"
+              f"   cached: {args.transactions / cached_time:>12,.0f} /s")
+
+
+if __name__ == "__main__":
+    main()
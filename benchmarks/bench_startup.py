@@ -0,0 +1,118 @@
+"""
+CLI cold start on persistent chains of growing length.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup [--blocks 1000 10000 50000] [--tx-per-block 10] [--repeat 3]
+
+Builds a persistent chain of each length (difficulty 1, not timed) and runs
+`main.py` in a fresh process for each case, reporting wall time and peak
+RSS (best of --repeat):
+
+    balance           `balance ADDRESS` opening from the latest snapshot
+    balance (replay)  the same with no snapshot, replaying every block
+    verify --from     `verify --from HEIGHT` over the last 100 blocks
+
+With a snapshot, start-up time and memory should stay flat as the chain grows.
+Peak RSS is the child's VmHWM, so this needs Linux.
+"""
+import argparse
+import io
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_bootstrap import build_chain
+from src.blockchain import Blockchain
+from src.bootstrap import export_chain, import_chain
+from src.snapshot import list_snapshots, snapshot_path
+
+
+def build_store(data_dir: str, blocks: int, tx_per_block: int):
+    source = build_chain(blocks, tx_per_block)
+    stream = io.BytesIO()
+    export_chain(source, stream)
+    tip = source.get_latest_block().hash
+    source.close()
+
+    target = Blockchain(data_dir)
+    target.difficulty = 1
+    stream.seek(0)
+    import_chain(target, stream, trusted_hash=tip)
+    target.save_snapshot()
+    target.close()
+
+
+# Runs main.py, then reports the process's own peak RSS on stderr. (The
+# rusage of a child also counts this process's memory at fork time.)
+RUN_MAIN = """
+import runpy, sys
+sys.argv = ["main.py"] + sys.argv[1:]
+try:
+    runpy.run_path("main.py", run_name="__main__")
+finally:
+    with open("/proc/self/status") as f:
+        sys.stderr.write(f.read())
+"""
+
+
+def run_cli(data_dir: str, *command: str):
+    """
+    Run main.py once and return (seconds, peak RSS in MB).
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", RUN_MAIN, "--data-dir", data_dir, "--difficulty", "1", *command],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode:
+        raise SystemExit(f"main.py {' '.join(command)} exited with status {result.returncode}:\n{result.stderr}")
+    peak_kb = int(re.search(r"^VmHWM:\s+(\d+) kB", result.stderr, re.MULTILINE).group(1))
+    return elapsed, peak_kb / 1024
+
+
+def drop_snapshots(data_dir: str):
+    for height in list_snapshots(data_dir):
+        os.remove(snapshot_path(data_dir, height))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, nargs="+", default=[1000, 10_000, 50_000])
+    parser.add_argument("--tx-per-block", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'blocks':>8} {'case':<18} {'seconds':>9} {'peak RSS MB':>12}")
+    for blocks in args.blocks:
+        with tempfile.TemporaryDirectory() as data_dir:
+            build_store(data_dir, blocks, args.tx_per_block)
+            snapshot = snapshot_path(data_dir, blocks)
+            with open(snapshot, "rb") as f:
+                saved = f.read()
+
+            def with_snapshot():
+                return run_cli(data_dir, "balance", "address1")
+
+            def replay():
+                # Start-up writes a snapshot after a long replay; remove it every run
+                drop_snapshots(data_dir)
+                result = run_cli(data_dir, "balance", "address1")
+                drop_snapshots(data_dir)
+                with open(snapshot, "wb") as f:
+                    f.write(saved)
+                return result
+
+            def verify_tail():
+                return run_cli(data_dir, "verify", "--from", str(max(1, blocks - 99)))
+
+            for name, case in (("balance", with_snapshot), ("balance (replay)", replay),
+                               ("verify --from", verify_tail)):
+                elapsed, rss = min(case() for _ in range(args.repeat))
+                print(f"{blocks:>8} {name:<18} {elapsed:>9.3f} {rss:>12.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Cold-start time for a persisted chain.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_storage [--blocks 100000] [--data-dir DIR]
+
+Builds a chain of --blocks blocks on disk (skipping Proof-of-Work, which does
+not affect loading), then times:
+
+* opening the BlockStore and reading the tip,
+* random lookups by height and by hash,
+* a full Blockchain() start, which also rebuilds the balance cache.
+"""
+import argparse
+import random
+import tempfile
+import time
+from decimal import Decimal
+
+from src.block import Block
+from src.blockchain import Blockchain
+from src.storage import BlockStore
+from src.transaction import Transaction
+
+
+def build_store(data_dir: str, blocks: int):
+    store = BlockStore(data_dir)
+    previous_hash = "0"
+    for height in range(len(store), blocks):
+        block = Block([Transaction("System", f"miner{height % 100}", Decimal(10))], previous_hash)
+        store.append(block)
+        previous_hash = block.hash
+    store.close()
+
+
+def open_and_read_tip(data_dir: str) -> BlockStore:
+    store = BlockStore(data_dir)
+    store[-1]
+    return store
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<36} {time.perf_counter() - start:>9.4f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=100_000)
+    parser.add_argument("--data-dir", help="reuse/keep a chain in this directory")
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    tmp = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        tmp = tempfile.TemporaryDirectory()
+        data_dir = tmp.name
+
+    timed(f"build {args.blocks:,} blocks", lambda: build_store(data_dir, args.blocks))
+
+    store = timed("open store + read tip", lambda: open_and_read_tip(data_dir))
+    heights = [random.randrange(len(store)) for _ in range(args.lookups)]
+    timed(f"{args.lookups} random lookups by height", lambda: [store.get(h) for h in heights])
+    hashes = [store.get_hash(h) for h in heights]
+    timed("first lookup by hash (builds map)", lambda: store.height_of(hashes[0]))
+    timed(f"{args.lookups} lookups by hash", lambda: [store.get_by_hash(h) for h in hashes])
+    store.close()
+
+    blockchain = timed("Blockchain() full start", lambda: Blockchain(data_dir=data_dir))
+    blockchain.close()
+
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
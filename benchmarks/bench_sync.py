@@ -0,0 +1,76 @@
+"""
+Peer sync benchmark: how long a fresh node takes to catch up on a long chain.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sync [--blocks 50000] [--peers 3] [--difficulty 1]
+
+A source chain is mined in memory, then served by --peers nodes on free
+localhost ports (all sharing that one chain). A fresh in-memory node syncs
+from them: headers first, then block bodies downloaded from every peer in
+parallel. Both phases are timed separately. Everything runs in one process
+and one event loop, so on a single core the figures include serving as well
+as syncing.
+"""
+import argparse
+import asyncio
+import time
+
+from src.blockchain import Blockchain
+from src.node import Node, NodeClient
+from src.sync import ChainSync
+
+
+def build_chain(blocks: int, difficulty: int) -> Blockchain:
+    blockchain = Blockchain()
+    blockchain.difficulty = difficulty
+    for i in range(blocks):
+        blockchain.mine_pending_transactions(f"miner{i % 16}")
+    return blockchain
+
+
+async def run(source: Blockchain, peers: int, difficulty: int):
+    nodes = [Node(source, port=0) for _ in range(peers)]
+    for node in nodes:
+        await node.start()
+    clients = [await NodeClient.connect(*node.address) for node in nodes]
+
+    fresh = Blockchain()
+    fresh.difficulty = difficulty
+    sync = ChainSync(fresh, clients)
+    try:
+        start = time.perf_counter()
+        peer = await sync.best_peer()
+        fork_height, headers = await sync.fetch_headers(peer)
+        headers_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        synced = await sync.sync()
+        total_elapsed = time.perf_counter() - start
+    finally:
+        for client in clients:
+            await client.close()
+        for node in nodes:
+            await node.stop()
+
+    assert fresh.get_latest_block().hash == source.get_latest_block().hash
+    print(f"headers: {len(headers):,} in {headers_elapsed:.2f}s ({len(headers) / headers_elapsed:,.0f}/s)")
+    print(f"full sync: {synced:,} blocks from {peers} peers in {total_elapsed:.2f}s "
+          f"({synced / total_elapsed:,.0f} blocks/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=50_000)
+    parser.add_argument("--peers", type=int, default=3)
+    parser.add_argument("--difficulty", type=int, default=1)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    source = build_chain(args.blocks, args.difficulty)
+    print(f"mined {args.blocks:,} blocks at difficulty {args.difficulty} in {time.perf_counter() - start:.2f}s")
+    asyncio.run(run(source, args.peers, args.difficulty))
+
+
+if __name__ == "__main__":
+    main()
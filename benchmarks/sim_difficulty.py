@@ -0,0 +1,59 @@
+"""
+Difficulty retargeting simulation: do block times converge on the target?
+
+Run from the repository root:
+
+    python -m benchmarks.sim_difficulty [--blocks 2000] [--interval 20] [--block-time 10]
+                                        [--hashrate 5000] [--hashrate-change 8] [--seed 1]
+
+No hashing is done. Each block's mining time is drawn from an exponential
+distribution with mean target_work(target) / hashrate, the same distribution
+real proof of work follows, and the resulting timestamps drive the same
+TargetSchedule that Blockchain enforces. Half-way through, the network
+hashrate is multiplied by --hashrate-change to show the schedule
+re-converging. One line is printed per retarget period.
+"""
+import argparse
+import random
+
+from src.config import MINING_DIFFICULTY, TARGET_BLOCK_TIME
+from src.difficulty import TargetSchedule
+from src.mining import difficulty_to_target, target_work
+
+
+def simulate(blocks: int, interval: int, block_time: float, hashrate: float, hashrate_change: float,
+             seed: int, difficulty: int):
+    rng = random.Random(seed)
+    schedule = TargetSchedule(difficulty_to_target(difficulty), interval, block_time)
+    timestamps = [0.0]
+    print(f"{'period':>6}  {'heights':>13}  {'hashrate':>10}  {'work/block':>12}  {'avg block time (s)':>18}")
+    for period_start in range(1, blocks + 1, interval):
+        period_end = min(period_start + interval, blocks + 1)
+        rate = hashrate * (hashrate_change if period_start > blocks // 2 else 1)
+        target = schedule.target_at(period_start, timestamps.__getitem__)
+        for _ in range(period_start, period_end):
+            timestamps.append(timestamps[-1] + rng.expovariate(rate / target_work(target)))
+        average = (timestamps[-1] - timestamps[period_start - 1]) / (period_end - period_start)
+        print(f"{(period_start - 1) // interval:>6}  {period_start:>6}-{period_end - 1:<6}  {rate:>10,.0f}"
+              f"  {target_work(target):>12,}  {average:>18.2f}")
+
+    tail = timestamps[-(blocks // 4) - 1:]
+    print(f"aim {block_time:.2f}s; last quarter averaged {(tail[-1] - tail[0]) / (len(tail) - 1):.2f}s per block")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=2000)
+    parser.add_argument("--interval", type=int, default=20, help="blocks per retarget period")
+    parser.add_argument("--block-time", type=float, default=TARGET_BLOCK_TIME, help="seconds per block to aim for")
+    parser.add_argument("--hashrate", type=float, default=5000, help="network hashes per second")
+    parser.add_argument("--hashrate-change", type=float, default=8, help="hashrate multiplier half-way through")
+    parser.add_argument("--difficulty", type=int, default=MINING_DIFFICULTY, help="starting leading zeros")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    simulate(args.blocks, args.interval, args.block_time, args.hashrate, args.hashrate_change, args.seed,
+             args.difficulty)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+Benchmark suite with regression tracking.
+
+Run from the repository root:
+
+    python -m benchmarks.suite [--quick] [--repeat 7] [--only mine] [--output results.json]
+                               [--baseline benchmarks/baseline.json] [--threshold 0.3]
+    python -m benchmarks.suite --save-baseline
+
+Runs every registered case (mining at several difficulties and block sizes,
+bulk add_transaction, full chain verification, balance lookups, ledger
+replays and serialisation), reporting the best of --repeat timed runs; setup is not timed.
+
+Every run is paired with a calibration loop (SHA-256 and dict work) timed
+just before it, and the median of the run/calibration ratios is the case's
+normalised score. Those scores are what get compared with the baseline:
+they cancel out both how fast the machine is and how its speed drifts
+during the run, so a baseline stays roughly meaningful across machines. A case whose normalised score drops by more than
+--threshold is reported as a regression and the exit status is 1.
+
+--save-baseline stores this run as the new baseline; re-record it (and
+commit the file) whenever a change is meant to move the numbers.
+--quick shrinks every case about tenfold for a smoke test, so quick results
+are only compared with a quick baseline.
+"""
+import argparse
+import fnmatch
+import gc
+import hashlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from decimal import Decimal
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from src.block import Block, HEADER_BLOCK_VERSION, JSON_BLOCK_VERSION
+from src.blockchain import Blockchain
+from src.codec import decode_block, encode_block
+from src.config import MINING_REWARD
+from src.storage import _decode_json_block, _encode_json_block
+from src.transaction import Transaction
+
+RESULTS_VERSION = 1
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# A normalised score this much below the baseline is a regression
+DEFAULT_THRESHOLD = 0.3
+
+# A case builds its inputs and returns (make_run, operations): make_run() does
+# any per-run setup untimed and returns the callable that is timed, which
+# performs `operations` units of work
+Case = Callable[[int], Tuple[Callable[[], Callable[[], None]], int]]
+
+
+class Spec(NamedTuple):
+    case: Case
+    unit: str
+
+
+CASES: Dict[str, Spec] = {}
+
+
+def benchmark(name: str, unit: str):
+    def register(case: Case) -> Case:
+        CASES[name] = Spec(case, unit)
+        return case
+    return register
+
+
+def time_once(run: Callable[[], None]) -> float:
+    """
+    Time one call with the garbage collector paused (as timeit does).
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        run()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+# Iterations of the calibration workload
+CALIBRATION_LOOPS = 20_000
+
+
+def calibration_run():
+    """
+    A fixed pure-Python workload (SHA-256 and dict updates), the machine's yardstick.
+    """
+    table = {}
+    for i in range(CALIBRATION_LOOPS):
+        table[i & 1023] = hashlib.sha256(str(i).encode()).digest()
+
+
+def measure(make_run: Callable[[], Callable[[], None]], operations: int, repeat: int) -> Tuple[float, float]:
+    """
+    Time a case `repeat` times, each run paired with a calibration run just before it.
+
+    :return: (best operations per second, median normalised score). The
+             score divides each run's rate by its own calibration rate, so
+             a machine that speeds up or slows down mid-run (as shared and
+             virtual machines do) affects both sides of every pair alike.
+    """
+    rates, scores = [], []
+    for _ in range(repeat):
+        run = make_run()
+        calibration = CALIBRATION_LOOPS / time_once(calibration_run)
+        rate = operations / time_once(run)
+        rates.append(rate)
+        scores.append(rate / calibration)
+    return max(rates), statistics.median(scores)
+
+
+# Mining: nonces tried per second. Fixed timestamps make every run find the
+# same nonce, so each case always does the same amount of work.
+
+def _mining_case(version: int, difficulty: int, tx_count: int) -> Case:
+    def case(scale: int):
+        transactions = [Transaction(f"sender{i}", f"recipient{i}", Decimal(i + 1), 1700000000.0 + i)
+                        for i in range(tx_count)]
+
+        def make_block() -> Block:
+            return Block(transactions, "0" * 64, 1700000000.0, version)
+
+        probe = make_block()
+        probe.mine(difficulty, 1)
+
+        def make_run():
+            block = make_block()
+            return lambda: block.mine(difficulty, 1)
+        return make_run, probe.nonce + 1
+    return case
+
+
+for _version, _difficulty, _tx_count in ((JSON_BLOCK_VERSION, 3, 1), (JSON_BLOCK_VERSION, 4, 1),
+                                         (JSON_BLOCK_VERSION, 3, 100), (JSON_BLOCK_VERSION, 3, 1000),
+                                         (HEADER_BLOCK_VERSION, 4, 1), (HEADER_BLOCK_VERSION, 4, 1000)):
+    benchmark(f"mine/v{_version}/d{_difficulty}/tx{_tx_count}", "hash/s")(
+        _mining_case(_version, _difficulty, _tx_count))
+
+
+def _funded_chain(senders: int) -> Blockchain:
+    blockchain = Blockchain(data_dir=None, require_signatures=False)
+    for i in range(senders):
+        blockchain.balances[f"sender{i}"] = Decimal(1_000_000)
+    return blockchain
+
+
+@benchmark("add_transaction/loop", "tx/s")
+def add_transaction_loop(scale: int):
+    count = 500 * scale
+    transactions = [Transaction(f"sender{i % 100}", f"recipient{i}", Decimal("1.50")) for i in range(count)]
+
+    def make_run():
+        blockchain = _funded_chain(100)
+
+        def run():
+            for tx in transactions:
+                blockchain.add_transaction(tx)
+        return run
+    return make_run, count
+
+
+@benchmark("add_transaction/batch", "tx/s")
+def add_transaction_batch(scale: int):
+    count = 500 * scale
+    transactions = [Transaction(f"sender{i % 100}", f"recipient{i}", Decimal("1.50")) for i in range(count)]
+
+    def make_run():
+        blockchain = _funded_chain(100)
+        return lambda: blockchain.add_transactions(transactions)
+    return make_run, count
+
+
+def _long_chain(blocks: int, tx_per_block: int) -> Blockchain:
+    blockchain = Blockchain(data_dir=None, require_signatures=False)
+    blockchain.difficulty = 1
+    for height in range(1, blocks + 1):
+        timestamp = 1700000000.0 + height
+        # Spend earlier rewards; the block's own reward comes last
+        transactions = [Transaction("miner", f"address{(height * tx_per_block + i) % 997}", Decimal("0.01"),
+                                    timestamp + i / 1000) for i in range(tx_per_block - 1 if height > 1 else 0)]
+        transactions.append(Transaction("System", "miner", Decimal(MINING_REWARD), timestamp))
+        block = Block(transactions, blockchain.get_latest_block().hash, timestamp)
+        block.mine(blockchain.difficulty, 1, blockchain.next_target())
+        blockchain.add_blocks([block])
+    return blockchain
+
+
+@benchmark("is_chain_valid/full", "block/s")
+def verify_chain(scale: int):
+    blocks = 100 * scale
+    blockchain = _long_chain(blocks, 5)
+    return (lambda: lambda: blockchain.verify_chain(full=True, workers=1)), blocks
+
+
+@benchmark("balance/lookup", "lookup/s")
+def balance_lookup(scale: int):
+    blockchain = _long_chain(10 * scale, 20)
+    addresses = [f"address{i}" for i in range(997)] + [f"unknown{i}" for i in range(3)]
+    count = 1000 * scale
+
+    def run():
+        for i in range(count):
+            blockchain.get_balance(addresses[i % 1000])
+    return (lambda: run), count
+
+
+@benchmark("balance/spendable", "lookup/s")
+def spendable_lookup(scale: int):
+    blockchain = _funded_chain(100)
+    blockchain.add_transactions([Transaction(f"sender{i % 100}", f"recipient{i}", Decimal(1)) for i in range(1000)])
+    count = 1000 * scale
+
+    def run():
+        for i in range(count):
+            blockchain.get_spendable_balance(f"sender{i % 100}")
+    return (lambda: run), count
+
+
+def _replay_case(cents: bool) -> Case:
+    def case(scale: int):
+        blocks = [Block([Transaction(f"address{i % 997}", f"address{(i * 7 + 1) % 997}", Decimal(f"{i % 900 + 1}.25"),
+                                     1700000000.0 + i, Decimal("0.10")) for i in range(start, start + 1000)],
+                        "0" * 64, 1700000000.0)
+                  for start in range(0, 1000 * scale, 1000)]
+
+        def run():
+            balances = {}
+            for block in blocks:
+                Blockchain._apply_block(balances, block, cents)
+        return (lambda: run), 1000 * scale
+    return case
+
+
+benchmark("ledger/replay_decimal", "tx/s")(_replay_case(False))
+benchmark("ledger/replay_cents", "tx/s")(_replay_case(True))
+
+
+@benchmark("serialize/transaction_hash", "tx/s")
+def transaction_hash(scale: int):
+    count = 1000 * scale
+
+    def run():
+        for i in range(count):
+            Transaction("sender", "recipient", Decimal("12.50"), 1700000000.0 + i, Decimal("0.10"))
+    return (lambda: run), count
+
+
+def _sample_blocks(scale: int) -> List[Block]:
+    blocks = []
+    for height in range(scale):
+        transactions = [Transaction(f"address{i % 97}", f"address{(i * 7) % 101}", Decimal(f"{i % 500 + 1}.25"),
+                                    1700000000.0 + i, Decimal("0.10"))
+                        for i in range(height * 100, height * 100 + 100)]
+        blocks.append(Block(transactions, "0" * 64, 1700000000.0 + height))
+    return blocks
+
+
+@benchmark("serialize/binary_encode", "tx/s")
+def binary_encode(scale: int):
+    blocks = _sample_blocks(scale)
+    return (lambda: lambda: [encode_block(block) for block in blocks]), 100 * scale
+
+
+@benchmark("serialize/binary_decode", "tx/s")
+def binary_decode(scale: int):
+    payloads = [encode_block(block) for block in _sample_blocks(scale)]
+    return (lambda: lambda: [decode_block(payload) for payload in payloads]), 100 * scale
+
+
+@benchmark("serialize/json_record_roundtrip", "tx/s")
+def json_roundtrip(scale: int):
+    blocks = _sample_blocks(scale)
+    return (lambda: lambda: [_decode_json_block(_encode_json_block(block)) for block in blocks]), 100 * scale
+
+
+def run_suite(quick: bool, repeat: int, patterns: Optional[List[str]] = None) -> dict:
+    scale = 1 if quick else 10
+    results = {}
+    for name, spec in CASES.items():
+        if patterns and not any(fnmatch.fnmatch(name, pattern) or pattern in name for pattern in patterns):
+            continue
+        make_run, operations = spec.case(scale)
+        value, normalised = measure(make_run, operations, repeat)
+        results[name] = {"value": value, "unit": spec.unit, "normalised": normalised}
+        print(f"{name:<36} {value:>14,.0f} {spec.unit}", flush=True)
+    return {
+        "version": RESULTS_VERSION,
+        "quick": quick,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+class Comparison(NamedTuple):
+    name: str
+    change: float
+    regressed: bool
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> List[Comparison]:
+    """
+    Compare normalised scores of the cases both runs have.
+
+    :return: One entry per shared case; `change` is the relative difference
+             (-0.3 = 30% slower than the baseline).
+    """
+    comparisons = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        change = result["normalised"] / reference["normalised"] - 1
+        comparisons.append(Comparison(name, change, change < -threshold))
+    return comparisons
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller inputs, for a smoke test")
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per case (the best is kept)")
+    parser.add_argument("--only", nargs="+", metavar="PATTERN", help="run only matching cases")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="results to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slow-down counted as a regression")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    args = parser.parse_args()
+
+    current = run_suite(args.quick, args.repeat, args.only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("quick") != current["quick"]:
+        print("Baseline was recorded with a different --quick setting; not comparing.")
+        return
+
+    comparisons = compare(current, baseline, args.threshold)
+    print(f"\nversus baseline (normalised; regression below -{args.threshold:.0%}):")
+    for comparison in comparisons:
+        flag = "  REGRESSION" if comparison.regressed else ""
+        print(f"{comparison.name:<36} {comparison.change:>+8.1%}{flag}")
+    regressions = [c.name for c in comparisons if c.regressed]
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,91 @@
+import argparse
 import sys
 import datetime
 from decimal import Decimal, InvalidOperation
 from src.blockchain import Blockchain
-from src.transaction import Transaction
 from src.wallet import Wallet
-from src.config import CURRENCY
+from src.config import CURRENCY, DATA_DIR
+from src.metrics import METRICS, profiling
+
+PAGE_SIZE = 10
+
+def print_block(height, block):
+    print("-------------------------")
+    print(f"Index:         {height}")
+
+    dt_object = datetime.datetime.fromtimestamp(block.timestamp)
+    print(f"Timestamp:     {dt_object.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    print(f"Hash:          {block.hash}")
+    print(f"Previous Hash: {block.previous_hash}")
+
+    print("Transactions:")
+    if not block.transactions:
+        print("  (No transactions)")
+    else:
+        for tx in block.transactions:
+            print(f"  - {tx.sender} -> {tx.recipient}: {tx.amount} {CURRENCY}")
+    print("-------------------------")
 
 def main():
+    parser = argparse.ArgumentParser(description="Interactive RandCoin wallet and miner, or run one command and exit.")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="persistent chain directory (default: in memory)")
+    parser.add_argument("--difficulty", type=int, help="override MINING_DIFFICULTY")
+    parser.add_argument("--metrics-file", help="write Prometheus metrics to this file on exit")
+    parser.add_argument("--profile", metavar="PATH", help="record a cProfile of the session to PATH")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND",
+                                     help="run non-interactively (default: the interactive menu)")
+    balance_parser = commands.add_parser("balance", help="print the balance of an address")
+    balance_parser.add_argument("address")
+    verify_parser = commands.add_parser("verify", help="verify the chain; exits with status 1 if it is invalid")
+    verify_parser.add_argument("--from", dest="start", type=int, metavar="HEIGHT",
+                               help="only check blocks from HEIGHT on (default: from genesis)")
+    verify_parser.add_argument("--workers", type=int, help="processes for a check from genesis (0 = all cores)")
+    args = parser.parse_args()
+    if args.metrics_file:
+        METRICS.enabled = True
+    status = 0
+    try:
+        with profiling(args.profile):
+            # A persistent chain opens from its latest snapshot and blocks are
+            # read on demand, so start-up doesn't grow with the chain
+            blockchain = Blockchain(args.data_dir)
+            if args.difficulty is not None:
+                blockchain.difficulty = args.difficulty
+            try:
+                if args.command == "balance":
+                    print(blockchain.get_balance(args.address))
+                elif args.command == "verify":
+                    status = verify(blockchain, args.start, args.workers)
+                else:
+                    run(blockchain)
+            finally:
+                blockchain.close()
+    finally:
+        if args.metrics_file:
+            METRICS.write(args.metrics_file)
+    sys.exit(status)
+
+def verify(blockchain, start=None, workers=None):
+    """
+    Verify the chain and report the outcome.
+
+    :return: Exit status: 0 if valid, 1 if not.
+    """
+    result = blockchain.verify_chain(full=start is None, workers=workers, start=start)
+    if not result.valid:
+        print(f"Blockchain is NOT valid! First invalid block: {result.first_invalid_index}")
+        return 1
+    print(f"Blockchain is valid. ({result.checked} block(s) checked)")
+    return 0
+
+def run(blockchain):
     print("==========================================")
     print("       RandCoin 🪙  - ZAR Linked          ")
     print("   The Apex of African Digital Excellence ")
     print("==========================================")
     print("Tags: [Blockchain] [Python] [ZAR] [FinTech]")
     print("")
-    blockchain = Blockchain()
 
     # Create a default wallet for the user (simulation)
     my_wallet = Wallet()
@@ -27,41 +99,35 @@ def main():
         print("4. Check Balance")
         print("5. Verify Chain Integrity")
         print("6. Generate New Wallet")
-        print("7. Exit")
+        print("7. Address History")
+        print("8. Exit")
 
         choice = input("Enter choice: ")
 
         if choice == '1':
-            for block in blockchain.chain:
-                print("-------------------------")
-                print(f"Index:         {blockchain.chain.index(block)}")
-
-                dt_object = datetime.datetime.fromtimestamp(block.timestamp)
-                print(f"Timestamp:     {dt_object.strftime('%Y-%m-%d %H:%M:%S')}")
-
-                print(f"Hash:          {block.hash}")
-                print(f"Previous Hash: {block.previous_hash}")
-
-                print("Transactions:")
-                if not block.transactions:
-                    print("  (No transactions)")
-                else:
-                    for tx in block.transactions:
-                        print(f"  - {tx.sender} -> {tx.recipient}: {tx.amount} {CURRENCY}")
-                print("-------------------------")
+            newest_first = input("Newest first? (y/N): ").strip().lower() == 'y'
+            # Stream one page at a time so large chains list without loading every block
+            pages = -(-len(blockchain.chain) // PAGE_SIZE)
+            for page in range(pages):
+                for height, block in blockchain.explorer.blocks_page(page, PAGE_SIZE, newest_first):
+                    print_block(height, block)
+                if page + 1 < pages:
+                    if input("Enter for more, 'q' to stop: ").strip().lower() == 'q':
+                        break
 
         elif choice == '2':
-            sender = input("Sender (leave blank for your wallet): ").strip()
-            if not sender:
-                sender = my_wallet.address
-
+            # Transfers are signed, so they can only be sent from your own wallet
+            print(f"Sending from your wallet: {my_wallet.address}")
             recipient = input("Recipient: ").strip()
             try:
                 amount_str = input(f"Amount ({CURRENCY}): ")
                 amount = Decimal(amount_str)
+                fee_str = input(f"Fee ({CURRENCY}, leave blank for none): ").strip()
+                fee = Decimal(fee_str) if fee_str else Decimal(0)
 
                 # Check for overdraft before adding (double check in UI)
-                blockchain.add_transaction(Transaction(sender, recipient, amount))
+                transaction = my_wallet.create_transaction(recipient, amount, fee)
+                blockchain.add_transaction(transaction)
                 print("Transaction added to pool.")
             except InvalidOperation:
                 print("Error: Invalid amount format.")
@@ -86,16 +152,32 @@ def main():
             print(f"Balance of {address}: {balance} {CURRENCY}")
 
         elif choice == '5':
-            if blockchain.is_chain_valid():
-                print("Blockchain is valid.")
+            full = input("Full re-verification from genesis? (y/N): ").strip().lower() == 'y'
+            result = blockchain.verify_chain(full=full)
+            if result.valid:
+                print(f"Blockchain is valid. ({result.checked} block(s) checked)")
             else:
-                print("Blockchain is NOT valid!")
+                print(f"Blockchain is NOT valid! First invalid block: {result.first_invalid_index}")
 
         elif choice == '6':
             my_wallet = Wallet()
             print(f"New Wallet Generated: {my_wallet.address}")
 
         elif choice == '7':
+            address = input("Address (leave blank for your wallet): ").strip()
+            if not address:
+                address = my_wallet.address
+
+            total = blockchain.explorer.address_transaction_count(address)
+            print(f"{total} transaction(s) for {address}, newest first:")
+            for offset in range(0, total, PAGE_SIZE):
+                for height, _, tx in blockchain.explorer.address_history(address, offset, PAGE_SIZE):
+                    print(f"  [block {height}] {tx.sender} -> {tx.recipient}: {tx.amount} {CURRENCY}")
+                if offset + PAGE_SIZE < total:
+                    if input("Enter for more, 'q' to stop: ").strip().lower() == 'q':
+                        break
+
+        elif choice == '8':
             print("Exiting...")
             break
 
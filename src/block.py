@@ -1,52 +1,223 @@
 import hashlib
 import json
+import struct
 import time
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 from src.transaction import Transaction
+from src.config import BLOCK_VERSION, MINING_WORKERS
+from src.merkle import MerkleTree, MerkleProof
+from src.metrics import METRICS
+from src.mining import NONCE_FORMAT, WorkUnit, difficulty_to_target, parallel_search, _search_header_range
+
+# Version 1 blocks hash a JSON document of the whole block.
+# Version 2 blocks hash a fixed-size binary header:
+#   version (u32) | previous_hash (32) | merkle_root (32) | timestamp (f64) | nonce (u64)
+# The nonce is the last field so miners can reuse the SHA-256 midstate of the rest.
+JSON_BLOCK_VERSION = 1
+HEADER_BLOCK_VERSION = 2
+SUPPORTED_VERSIONS = (JSON_BLOCK_VERSION, HEADER_BLOCK_VERSION)
+HEADER_PREFIX_FORMAT = struct.Struct("<I32s32sd")
+HEADER_SIZE = HEADER_PREFIX_FORMAT.size + NONCE_FORMAT.size
+
+# Nonces handed out by block templates: the range a binary header can hold
+NONCE_LIMIT = 1 << 64
+
+MINE_SECONDS = METRICS.histogram("randcoin_block_mine_seconds", "Time spent mining each block.")
+MINE_ATTEMPTS = METRICS.histogram("randcoin_block_mine_attempts", "Nonces tried per mined block.",
+                                  [16 ** i for i in range(1, 9)])
+HASHES = METRICS.counter("randcoin_mining_hashes_total", "Nonces tried across all mined blocks.")
+HASH_RATE = METRICS.gauge("randcoin_mining_hash_rate", "Hashes per second while mining the latest block.")
 
 class Block:
     """
     Represents a block in the RandCoin blockchain.
     """
-    def __init__(self, transactions: List[Transaction], previous_hash: str, timestamp: float = None):
+    def __init__(self, transactions: List[Transaction], previous_hash: str, timestamp: float = None,
+                 version: int = BLOCK_VERSION):
         """
         Initialize a new block.
 
         :param transactions: List of transactions in the block.
         :param previous_hash: Hash of the previous block.
         :param timestamp: Creation timestamp.
+        :param version: Block format version (1 = JSON hash, 2 = binary header hash).
         """
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported block version: {version}")
+        self.version = version
         self.transactions = transactions
         self.previous_hash = previous_hash
-        self.timestamp = timestamp or time.time()
+        # Always a float, as the binary codec stores it (see Transaction)
+        self.timestamp = float(timestamp) if timestamp else time.time()
         self.nonce = 0
+        self._merkle_tree = None
         self.hash = self.calculate_hash()
 
+    @classmethod
+    def restore(cls, transactions: List[Transaction], previous_hash: str, timestamp: float,
+                nonce: int, block_hash: str, version: int = BLOCK_VERSION) -> "Block":
+        """
+        Rebuild an already-mined block (e.g. from storage) without re-hashing it.
+
+        The stored hash is trusted as-is; use has_valid_hash() to verify it.
+        """
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported block version: {version}")
+        block = cls.__new__(cls)
+        block.version = version
+        block.transactions = transactions
+        block.previous_hash = previous_hash
+        block.timestamp = float(timestamp)
+        block.nonce = nonce
+        block._merkle_tree = None
+        block.hash = block_hash
+        return block
+
     def calculate_hash(self) -> str:
         """
-        Calculate the SHA-256 hash of the block.
+        Calculate the SHA-256 hash of the block, according to its version.
+        """
+        if self.version == HEADER_BLOCK_VERSION:
+            return hashlib.sha256(self.serialize_header()).hexdigest()
+        return self._calculate_json_hash()
+
+    def has_valid_hash(self) -> bool:
+        """
+        Whether the stored hash matches the block's contents and commits to
+        no other transaction list (a binary header's Merkle root must not come
+        from a mutated tree; see MerkleTree.mutated).
+        """
+        if self.hash != self.calculate_hash():
+            return False
+        return self.version != HEADER_BLOCK_VERSION or not self.merkle_tree.mutated
+
+    @property
+    def merkle_tree(self) -> MerkleTree:
+        """
+        Merkle tree over the block's transaction ids, cached on the block.
+
+        The cache is checked against the current transactions on every access.
+        Replaced transactions only rehash their path to the root; the tree is
+        rebuilt only when transactions are added or removed.
         """
+        tx_ids = [t.id for t in self.transactions]
+        tree = self._merkle_tree
+        if tree is None or len(tree) != len(tx_ids):
+            self._merkle_tree = MerkleTree(tx_ids)
+        else:
+            for index, tx_id in enumerate(tx_ids):
+                if tree.leaf(index) != tx_id:
+                    tree.update(index, tx_id)
+        return self._merkle_tree
+
+    @property
+    def merkle_root(self) -> str:
+        """
+        Hex Merkle root of the block's transactions.
+        """
+        return self.merkle_tree.root.hex()
+
+    def get_inclusion_proof(self, tx_id: str) -> MerkleProof:
+        """
+        Build an O(log n) proof that a transaction is in this block.
+
+        Check it with src.merkle.verify_proof against the block's merkle_root.
+
+        :param tx_id: Id of the transaction to prove.
+        :raises ValueError: If the transaction is not in the block.
+        """
+        tree = self.merkle_tree
+        for index in range(len(tree)):
+            if tree.leaf(index) == tx_id:
+                return tree.proof(index)
+        raise ValueError(f"Transaction {tx_id} is not in this block.")
+
+    def header_prefix(self) -> bytes:
+        """
+        Serialise every binary header field except the trailing nonce.
+        """
+        # The genesis block links to "0"; pad to a full 32-byte hash
+        previous = bytes.fromhex(self.previous_hash.zfill(64))
+        return HEADER_PREFIX_FORMAT.pack(self.version, previous, self.merkle_tree.root, self.timestamp)
+
+    def serialize_header(self) -> bytes:
+        """
+        Serialise the fixed-size binary block header (version 2+).
+        """
+        return self.header_prefix() + NONCE_FORMAT.pack(self.nonce)
+
+    def pow_input(self) -> Tuple[bytes, bytes]:
+        """
+        The bytes hashed on either side of the nonce, for searching nonces
+        outside the block (see src/miner.py).
+
+        :return: (prefix, suffix). The block's hash is the SHA-256 of prefix,
+                 nonce and suffix, the nonce being 8 little-endian bytes in a
+                 binary header (suffix is then empty) and decimal text in a
+                 JSON block.
+        """
+        if self.version == HEADER_BLOCK_VERSION:
+            return self.header_prefix(), b""
+        # Keys are pre-sorted and "nonce" sorts first, so everything after it is fixed
+        static_content = {
+            "previous_hash": self.previous_hash,
+            "timestamp": self.timestamp,
+            "transactions": [t.to_dict(copy=False) for t in self.transactions]
+        }
+        suffix = ", " + json.dumps(static_content, separators=(', ', ': '))[1:]
+        return b'{"nonce": ', suffix.encode()
+
+    def _calculate_json_hash(self) -> str:
         # Bolt Optimization: Construct dict with alphabetically sorted keys
         # to avoid O(N log N) recursive sorting in json.dumps
         block_content = {
-            "transactions": [t.to_dict(copy=False) for t in self.transactions],
-            "previous_hash": self.previous_hash,
             "nonce": self.nonce,
             "previous_hash": self.previous_hash,
             "timestamp": self.timestamp,
-            "transactions": [t.to_dict() for t in self.transactions]
+            "transactions": [t.to_dict(copy=False) for t in self.transactions]
         }
         # Keys are pre-sorted, use separators=(', ', ': ') to match sort_keys=True output
         block_string = json.dumps(block_content, separators=(', ', ': ')).encode()
         return hashlib.sha256(block_string).hexdigest()
 
-    def mine(self, difficulty: int):
+    def mine(self, difficulty: int, workers: Optional[int] = None, target: Optional[int] = None):
         """
         Mine the block by finding a nonce that satisfies the difficulty.
 
         :param difficulty: Number of leading zeros required in the hash.
+        :param workers: Number of processes to search with (0 = all cores).
+                        Defaults to MINING_WORKERS. Any worker count yields the
+                        same nonce and hash as single-core mining.
+        :param target: 256-bit target the hash must not exceed; overrides
+                       `difficulty` (see Blockchain.next_target).
         """
-        target = "0" * difficulty
+        if workers is None:
+            workers = MINING_WORKERS
+        if target is None:
+            target = difficulty_to_target(difficulty)
+        if not METRICS.enabled:
+            self._mine(target, workers)
+            return
+
+        first_nonce = self.nonce
+        start = time.perf_counter()
+        self._mine(target, workers)
+        elapsed = time.perf_counter() - start
+        # Parallel workers may try a few nonces past the winner; those aren't counted
+        attempts = self.nonce - first_nonce + 1
+        MINE_SECONDS.observe(elapsed)
+        MINE_ATTEMPTS.observe(attempts)
+        HASHES.inc(attempts)
+        if elapsed > 0:
+            HASH_RATE.set(attempts / elapsed)
+
+    def _mine(self, target: int, workers: int):
+        if self.version == HEADER_BLOCK_VERSION:
+            self._mine_header(target, workers)
+            return
+
+        # Fixed-width lowercase hex compares in the same order as the numbers
+        target_hex = f"{target:064x}"
 
         # Optimization: Pre-compute the dict representation of transactions
         # This avoids re-converting transactions to dicts and floats in every iteration
@@ -80,7 +251,7 @@ class Block:
                 "timestamp": self.timestamp,
                 "transactions": tx_list
             }
-            while self.hash[:difficulty] != target:
+            while self.hash > target_hex:
                 self.nonce += 1
                 block_content["nonce"] = self.nonce
                 block_string = json.dumps(block_content).encode()
@@ -89,16 +260,95 @@ class Block:
 
         # Fast path: Construct JSON string manually
         # Expected format: {"nonce": <value>, "previous_hash": ..., ...}
+        prefix, suffix = self.pow_input()
 
-        # Get the suffix: everything after the nonce value
-        # json.dumps(static_content) -> {"previous_hash": ...}
-        # We need: , "previous_hash": ...
-        # So we take the dump of static_content, strip the opening '{', and prepend ", "
-        suffix = ", " + json.dumps(static_content, separators=(', ', ': '))[1:]
-        prefix = '{"nonce": '
+        if workers != 1 and self.hash > target_hex:
+            self.nonce = parallel_search(prefix, suffix, target, start=self.nonce + 1, workers=workers)
+            self.hash = hashlib.sha256(prefix + str(self.nonce).encode() + suffix).hexdigest()
+            return
 
-        while self.hash[:difficulty] != target:
+        while self.hash > target_hex:
             self.nonce += 1
-            # String concatenation is much faster than full JSON serialization
-            block_string = (prefix + str(self.nonce) + suffix).encode()
-            self.hash = hashlib.sha256(block_string).hexdigest()
+            # Byte concatenation is much faster than full JSON serialization
+            self.hash = hashlib.sha256(prefix + str(self.nonce).encode() + suffix).hexdigest()
+
+    def _mine_header(self, target: int, workers: int):
+        """
+        Mine a binary-header block.
+
+        ⚡ Bolt Optimization: The header prefix (including the Merkle root) is
+        hashed once. Each attempt copies that SHA-256 midstate and feeds in only
+        the 8 nonce bytes, so the cost per hash is constant regardless of how
+        many transactions the block holds.
+        """
+        prefix = self.header_prefix()
+        if int(self.hash, 16) <= target:
+            return
+
+        if workers != 1:
+            self.nonce = parallel_search(prefix, b"", target, start=self.nonce + 1,
+                                         workers=workers, search=_search_header_range)
+        else:
+            target_bytes = target.to_bytes(32, "big")
+            midstate = hashlib.sha256(prefix)
+            pack_nonce = NONCE_FORMAT.pack
+            nonce = self.nonce
+            while True:
+                nonce += 1
+                attempt = midstate.copy()
+                attempt.update(pack_nonce(nonce))
+                if attempt.digest() <= target_bytes:
+                    break
+            self.nonce = nonce
+
+        self.hash = hashlib.sha256(prefix + NONCE_FORMAT.pack(self.nonce)).hexdigest()
+
+
+class BlockTemplate:
+    """
+    An unmined block on a known tip, handed out in nonce ranges (work units)
+    to mining backends that only see the bytes around the nonce
+    (see Blockchain.create_template and src/miner.py).
+    """
+    def __init__(self, block: Block, height: int, target: int, pool_revision: int):
+        """
+        :param block: The unmined block; its previous_hash is the tip it builds on.
+        :param height: Height the block will have.
+        :param target: 256-bit target its hash must not exceed.
+        :param pool_revision: Mempool revision the transactions were selected at.
+        """
+        self.block = block
+        self.height = height
+        self.target = target
+        self.pool_revision = pool_revision
+        self.created = time.monotonic()
+        self.prefix, self.suffix = block.pow_input()
+        self.id = hashlib.sha256(self.prefix + self.suffix).hexdigest()[:16]
+
+    def work_unit(self, start: int, stop: int) -> WorkUnit:
+        """
+        The nonces in [start, stop) of this template.
+        """
+        return WorkUnit(self.id, self.block.version, self.prefix, self.suffix, start, stop, self.target)
+
+    def work_units(self, size: int, start: int = 0) -> Iterator[WorkUnit]:
+        """
+        Consecutive work units of `size` nonces covering the nonce space from `start`.
+        """
+        for unit_start in range(start, NONCE_LIMIT, size):
+            yield self.work_unit(unit_start, min(unit_start + size, NONCE_LIMIT))
+
+    def solve(self, nonce: int) -> Block:
+        """
+        A copy of the block with `nonce` filled in and its hash computed.
+        The caller checks the hash against the target.
+
+        :raises ValueError: If the nonce is outside the nonce space.
+        """
+        if not 0 <= nonce < NONCE_LIMIT:
+            raise ValueError("Nonce out of range.")
+        block = self.block
+        solved = Block.restore(block.transactions, block.previous_hash, block.timestamp, nonce, "", block.version)
+        solved._merkle_tree = block._merkle_tree
+        solved.hash = solved.calculate_hash()
+        return solved
@@ -1,50 +1,337 @@
-from typing import List, Dict
+import threading
+import time
+from concurrent.futures import Executor
+from operator import attrgetter
+from typing import Iterable, Iterator, List, Dict, NamedTuple, Optional, Sequence, Tuple
 from decimal import Decimal
-from src.block import Block
-from src.transaction import Transaction
-from src.config import MINING_DIFFICULTY, MINING_REWARD, CURRENCY
+from src.block import Block, BlockTemplate
+from src.explorer import ChainExplorer, TransactionHistory
+from src.locks import RWLock
+from src.mempool import Mempool
+from src.metrics import METRICS, timed
+from src.difficulty import TargetSchedule
+from src.mining import difficulty_to_target, meets_target, target_work
+from src.signatures import SignatureVerifier
+from src.storage import BlockStore, encode_record
+from src.snapshot import Snapshot, discard_snapshots_above, find_snapshot, prune_snapshots, read_snapshot, \
+    snapshot_path, write_snapshot
+from src.transaction import Transaction, apply_transfers, from_cents, to_cents
+from src.txindex import TransactionIndex
+from src.validation import ValidationResult, block_error, first_invalid_block, median_time_past, \
+    parallel_first_invalid_block, timestamp_error, _first_bad_hash, VALIDATION_CHUNK_SIZE
+from src.config import MINING_DIFFICULTY, MINING_REWARD, MINING_WORKERS, VALIDATION_WORKERS, CURRENCY, DATA_DIR, \
+    SNAPSHOT_INTERVAL, SNAPSHOT_KEEP, MEMPOOL_MAX_SIZE, MEMPOOL_PRIORITY, MAX_BLOCK_TRANSACTIONS, RETARGET_INTERVAL, \
+    TARGET_BLOCK_TIME, REQUIRE_SIGNATURES, LEDGER_CENTS
 
-# System senders that don't require balance validation
+# Senders of the genesis placeholder and block rewards: they need no balance
+# or signature, so submitted transactions may never use them
 SYSTEM_SENDERS = ["genesis", "System"]
 
+# Fixed so that every node derives the same genesis block and can sync with peers
+GENESIS_TIMESTAMP = 1700000000.0
+
+# What a transaction credits its recipient and debits its sender, in each
+# ledger unit: Decimal ZAR, or integer cents (see Blockchain's ledger_cents)
+ZAR_AMOUNT, ZAR_COST = attrgetter("amount"), attrgetter("cost")
+CENTS_AMOUNT, CENTS_COST = attrgetter("cents"), attrgetter("cost_cents")
+
+class TransactionResult(NamedTuple):
+    """
+    Per-item outcome of a batch submission (aligned with the input by position).
+    """
+    accepted: bool
+    error: Optional[str] = None
+
+# Results are immutable, so every accepted item shares one instance
+ACCEPTED = TransactionResult(True)
+
+# How many times mining rebuilds a block that went stale while it was being mined
+MAX_MINE_ATTEMPTS = 3
+
+ADD_TRANSACTION_SECONDS = METRICS.histogram("randcoin_add_transaction_seconds",
+                                            "Latency of Blockchain.add_transaction, accepted or not.")
+TRANSACTIONS_ACCEPTED = METRICS.counter("randcoin_transactions_accepted_total",
+                                        "Transactions admitted to the pending pool.")
+TRANSACTIONS_REJECTED = METRICS.counter("randcoin_transactions_rejected_total",
+                                        "Transactions turned away from the pending pool, by reason.")
+VERIFY_CHAIN_SECONDS = METRICS.histogram("randcoin_verify_chain_seconds", "Time spent in each chain verification.")
+BLOCKS_VERIFIED = METRICS.counter("randcoin_blocks_verified_total", "Blocks checked by chain verification.")
+APPLY_BLOCK_SECONDS = METRICS.histogram("randcoin_update_balance_seconds",
+                                        "Time to apply one block to the balance cache and history.")
+
+# Rejection reason labels, matched against the start of the error message
+REJECT_REASONS = (
+    ("Transaction amount must be positive", "invalid_amount"),
+    ("System transactions", "system_sender"),
+    ("Transaction amounts must be whole cents", "invalid_amount"),
+    ("Invalid signature", "bad_signature"),
+    ("Transaction is not signed", "unsigned"),
+    ("Transaction is already pending", "duplicate"),
+    ("Duplicate transaction", "duplicate"),
+    ("Insufficient funds", "insufficient_funds"),
+    ("Mempool is full", "pool_full"),
+)
+
+def reject_reason(error: str) -> str:
+    """
+    Short, fixed label for a rejection message (messages embed amounts and
+    ids, which would make one metric series per transaction).
+    """
+    for prefix, reason in REJECT_REASONS:
+        if error.startswith(prefix):
+            return reason
+    return "other"
+
+def _reward_error(block: Block) -> Optional[str]:
+    """
+    Check that the only system transaction of a mined block is its last: a
+    "System" reward of exactly MINING_REWARD plus the block's fees.
+
+    :return: Why the block is invalid, or None.
+    """
+    if not block.transactions:
+        return "it has no mining reward"
+    *transfers, reward = block.transactions
+    for tx in transfers:
+        if tx.sender in SYSTEM_SENDERS:
+            return f"transaction {tx.id} is sent by {tx.sender}, but only its last may be the mining reward"
+    if reward.sender != "System":
+        return "its last transaction is not a mining reward"
+    expected = Decimal(MINING_REWARD) + sum((tx.fee for tx in transfers), Decimal(0))
+    if reward.amount != expected or reward.fee:
+        return f"its mining reward is {reward.amount}, not {expected}"
+    return None
+
+class StaleBlockError(ValueError):
+    """
+    Raised by commit_block when the chain or pool changed under a prepared block.
+    """
+
 class Blockchain:
     """
     Represents the RandCoin blockchain.
+
+    Safe to share between threads. Chain state (blocks, balances, indexes) is
+    guarded by a readers-writer lock, so any number of balance queries and
+    transaction validations run together and only block commits are
+    exclusive. The pending pool has its own mutex, always taken after the
+    state lock. Mining holds neither while searching for a nonce: the block
+    is prepared from the pool, mined unlocked, then committed, and
+    submissions that arrive in between wait in the pool for the next block.
     """
-    def __init__(self):
+    def __init__(self, data_dir: Optional[str] = DATA_DIR, ledger_cents: bool = LEDGER_CENTS,
+                 require_signatures: bool = REQUIRE_SIGNATURES):
         """
         Initialize the blockchain.
+
+        :param data_dir: Directory for persistent storage. When set, the chain is
+                         loaded from (and appended to) an on-disk BlockStore and
+                         survives restarts; otherwise it lives in memory only.
+        :param ledger_cents: Keep `balances` and pending outflows as integer
+                             cents rather than Decimal ZAR. Queries still
+                             return Decimal; amounts with fractions of a cent
+                             are rejected.
+        :param require_signatures: Reject unsigned transfers, submitted or in
+                                   blocks. A stored chain is loaded either
+                                   way; turn off only to import or sync
+                                   blocks from before transfers were signed.
         """
-        self.chain: List[Block] = [self.create_genesis_block()]
-        self.pending_transactions: List[Transaction] = []
-        self.pending_outflows: Dict[str, Decimal] = {}
+        self.data_dir = data_dir
+        self.ledger_cents = ledger_cents
+        self._amount_of = CENTS_AMOUNT if ledger_cents else ZAR_AMOUNT
+        self._cost_of = CENTS_COST if ledger_cents else ZAR_COST
+        self._state_lock = RWLock()
+        self._pool_lock = threading.Lock()
+        # One miner at a time; a second would only produce a stale block
+        self._mining_lock = threading.Lock()
+        if data_dir:
+            self.chain = BlockStore(data_dir)
+            if not len(self.chain):
+                self.chain.append(self.create_genesis_block())
+        else:
+            self.chain: List[Block] = [self.create_genesis_block()]
+        self.mempool = Mempool(MEMPOOL_MAX_SIZE, MEMPOOL_PRIORITY, SYSTEM_SENDERS, self._cost_of)
+        self.max_block_transactions = MAX_BLOCK_TRANSACTIONS
+        # Leading hex zeros of the starting target; retargeting adjusts it from there
         self.difficulty = MINING_DIFFICULTY
+        self.retarget_interval = RETARGET_INTERVAL
+        self.target_block_time = TARGET_BLOCK_TIME
+        self._schedule: Optional[TargetSchedule] = None
+        self.mining_workers = MINING_WORKERS
+        self.validation_workers = VALIDATION_WORKERS
+        # Checked outside the locks; remembers every signature that passed
+        self.signatures = SignatureVerifier()
+        self.require_signatures = require_signatures
+        # Validation checkpoint: blocks up to this height/hash are known good.
+        # verify_chain only holds the read lock, so concurrent checks update
+        # the pair under _checkpoint_lock; other writers hold the write lock.
+        self.validated_height = 0
+        self.validated_hash = self.chain[0].hash
+        self._checkpoint_lock = threading.Lock()
+        self.snapshot_interval = SNAPSHOT_INTERVAL
+        # Address -> balance in ledger units (see ledger_cents)
         self.balances: Dict[str, Decimal] = {}
-        self.pending_outflows: Dict[str, Decimal] = {}
-        # Initialize balance cache with genesis block
-        self._update_balance_from_block(self.chain[0])
+        # Address / tx-id history index; None until built (see transaction_history)
+        self.history: Optional[TransactionHistory] = TransactionHistory()
 
-    def _update_balance_from_block(self, block: Block):
+        # Initialize balance cache: start from the newest matching snapshot (if
+        # any) and replay only the blocks after it
+        replay_from = 0
+        if data_dir:
+            snapshot = find_snapshot(data_dir, self.chain)
+            if snapshot is not None:
+                self.balances = self._from_zar_table(snapshot.balances)
+                replay_from = snapshot.height + 1
+                # A partial replay can't build the history; defer it to the first query
+                self.history = None
+        try:
+            for height in range(replay_from, len(self.chain)):
+                self._update_balance_from_block(self.chain[height], height)
+        except TypeError:
+            raise ValueError("The chain has amounts with fractions of a cent; it needs a Decimal ledger.") from None
+        # No recent snapshot (e.g. an imported chain): take one now so the
+        # next start-up doesn't replay the same blocks again
+        if data_dir and self.snapshot_interval and len(self.chain) - replay_from > self.snapshot_interval:
+            self._save_snapshot()
+        self.explorer = ChainExplorer(self)
+
+        # Replay protection: ids of every mined transaction. The on-disk index
+        # remembers how far it got, so only blocks added since are indexed.
+        self.tx_index = TransactionIndex(data_dir)
+        self.tx_index.sync(self.chain)
+
+    @property
+    def pending_transactions(self) -> List[Transaction]:
         """
-        Update the local balance cache based on transactions in the block.
+        Pending transactions in arrival order.
         """
-        for tx in block.transactions:
-            # Credit recipient
-            if tx.recipient not in self.balances:
-                self.balances[tx.recipient] = Decimal(0)
-            self.balances[tx.recipient] += tx.amount
+        with self._pool_lock:
+            return list(self.mempool)
+
+    @property
+    def pending_outflows(self) -> Dict[str, Decimal]:
+        """
+        Amount (plus fees) each sender has committed in the pending pool
+        (a point-in-time copy).
+        """
+        with self._pool_lock:
+            return self._to_zar_table(self.mempool.outflows)
+
+    def close(self):
+        """
+        Release on-disk storage, if any. In-memory chains need no cleanup.
+        """
+        if isinstance(self.chain, BlockStore):
+            self.chain.close()
+        self.tx_index.close()
+        self.signatures.close()
+
+    @timed(APPLY_BLOCK_SECONDS)
+    def _update_balance_from_block(self, block: Block, height: Optional[int] = None):
+        """
+        Update the local balance cache and history index based on transactions in the block.
+
+        :param block: The block, already on the chain.
+        :param height: Its height (defaults to the chain tip).
+        """
+        self._apply_block(self.balances, block, self.ledger_cents)
+        if self.history is not None:
+            self.history.add_block(block, len(self.chain) - 1 if height is None else height)
+
+    def transaction_history(self) -> TransactionHistory:
+        """
+        The address and transaction-id history index, built on first use if
+        the balances were restored from a snapshot.
+        """
+        history = self.history
+        if history is None:
+            with self._state_lock.read():
+                history = TransactionHistory()
+                for height in range(len(self.chain)):
+                    history.add_block(self.chain[height], height)
+                self.history = history
+        return history
+
+    @staticmethod
+    def _apply_block(balances: Dict[str, Decimal], block: Block, cents: bool = False):
+        """
+        Apply a block's transfers to a balance table (of ZAR, or of integer
+        cents if `cents`). Fees go to the miner through the block reward.
+        """
+        apply_transfers(balances, block.transactions, cents)
+
+    @staticmethod
+    def _revert_block(balances: Dict[str, Decimal], block: Block, cents: bool = False):
+        """
+        Undo _apply_block for a block being rolled back.
+        """
+        amount_of, cost_of = (CENTS_AMOUNT, CENTS_COST) if cents else (ZAR_AMOUNT, ZAR_COST)
+        for tx in reversed(block.transactions):
+            balances[tx.sender] += cost_of(tx)
+            balances[tx.recipient] -= amount_of(tx)
+
+    def _to_zar(self, value) -> Decimal:
+        """
+        A ledger value (balance or outflow) as ZAR, for callers.
+        """
+        return from_cents(value) if self.ledger_cents else Decimal(value)
+
+    def _to_zar_table(self, table: Dict[str, Decimal]) -> Dict[str, Decimal]:
+        if not self.ledger_cents:
+            return dict(table)
+        return {address: from_cents(value) for address, value in table.items()}
 
-            # Debit sender
-            if tx.sender not in self.balances:
-                self.balances[tx.sender] = Decimal(0)
-            self.balances[tx.sender] -= tx.amount
+    def _from_zar_table(self, table: Dict[str, Decimal]) -> Dict[str, Decimal]:
+        if not self.ledger_cents:
+            return table
+        return {address: to_cents(value) for address, value in table.items()}
+
+    def save_snapshot(self) -> str:
+        """
+        Write a snapshot of the balance cache at the current chain tip.
+
+        Older snapshots beyond SNAPSHOT_KEEP are pruned.
+
+        :return: Path of the snapshot file.
+        :raises ValueError: If the chain is not persistent.
+        """
+        if not self.data_dir:
+            raise ValueError("Snapshots require a persistent chain (data_dir).")
+        with self._state_lock.read():
+            return self._save_snapshot()
+
+    def _save_snapshot(self) -> str:
+        height = len(self.chain) - 1
+        path = snapshot_path(self.data_dir, height)
+        write_snapshot(path, Snapshot(height, self.get_latest_block().hash, self._to_zar_table(self.balances)))
+        prune_snapshots(self.data_dir, SNAPSHOT_KEEP)
+        return path
+
+    def verify_snapshot(self, path: str) -> bool:
+        """
+        Check a snapshot against a full replay of the chain up to its height.
+
+        :param path: Snapshot file to check.
+        :return: True if the snapshot's block is on this chain and its balances
+                 match a replay from genesis exactly.
+        """
+        snapshot = read_snapshot(path)
+        with self._state_lock.read():
+            if snapshot.height >= len(self.chain) or self.chain[snapshot.height].hash != snapshot.block_hash:
+                return False
+
+            replayed: Dict[str, Decimal] = {}
+            for height in range(snapshot.height + 1):
+                self._apply_block(replayed, self.chain[height])
+        # A rolled-back block can leave zero entries a replay never creates; both mean "no funds"
+        return {a: v for a, v in replayed.items() if v} == {a: v for a, v in snapshot.balances.items() if v}
 
     def create_genesis_block(self) -> Block:
         """
         Create the first block in the chain.
         """
         # Genesis transaction issues initial supply or just starts the chain
-        return Block([Transaction("genesis", "system", Decimal(0))], "0")
+        return Block([Transaction("genesis", "system", Decimal(0), GENESIS_TIMESTAMP)], "0", GENESIS_TIMESTAMP)
 
     def get_latest_block(self) -> Block:
         """
@@ -52,47 +339,652 @@ class Blockchain:
         """
         return self.chain[-1]
 
+    def block_records(self, start: int, stop: int, chunk_size: int = 1000) -> Iterator[bytes]:
+        """
+        Stream blocks [start, stop) as storage records (see encode_record);
+        persistent chains hand them over as stored, without decoding.
+
+        The read lock is taken per chunk, so blocks can be committed while a
+        long export runs.
+
+        :raises ValueError: If the range is out of bounds or is reorganised
+                            away before it has been read.
+        """
+        with self._state_lock.read():
+            if not 0 <= start <= stop <= len(self.chain):
+                raise ValueError(f"Blocks {start}-{stop} are not on this chain.")
+            last_hash = self.chain[stop - 1].hash if stop else None
+        for chunk_start in range(start, stop, chunk_size):
+            with self._state_lock.read():
+                # Unchanged last block means every block below it is unchanged too
+                if len(self.chain) < stop or self.chain[stop - 1].hash != last_hash:
+                    raise ValueError("The chain was reorganised while it was being read.")
+                chain = self.chain
+                if isinstance(chain, BlockStore):
+                    records = [chain.get_record(h) for h in range(chunk_start, min(chunk_start + chunk_size, stop))]
+                else:
+                    records = [encode_record(block) for block in chain[chunk_start:min(chunk_start + chunk_size, stop)]]
+            yield from records
+
     def add_transaction(self, transaction: Transaction):
         """
         Add a transaction to the pending pool after validation.
 
         :param transaction: The transaction to add.
-        :raises ValueError: If the transaction is invalid or funds are insufficient.
+        :raises ValueError: If the transaction is invalid, funds are insufficient
+                            or the pool is full of higher-priority transactions.
+        """
+        if not METRICS.enabled:
+            self._add_transaction(transaction)
+            return
+        start = time.perf_counter()
+        try:
+            self._add_transaction(transaction)
+        except ValueError as e:
+            TRANSACTIONS_REJECTED.inc(reason=reject_reason(str(e)))
+            raise
+        else:
+            TRANSACTIONS_ACCEPTED.inc()
+        finally:
+            ADD_TRANSACTION_SECONDS.observe(time.perf_counter() - start)
+
+    def _add_transaction(self, transaction: Transaction):
+        error = self._submission_error(transaction)
+        if error:
+            raise ValueError(error)
+        # Signatures are the slow check and need no chain state: done before locking
+        error = self._signature_errors([transaction])[0]
+        if error:
+            raise ValueError(error)
+
+        with self._state_lock.read(), self._pool_lock:
+            self._admit(transaction)
+
+    def _submission_error(self, transaction: Transaction) -> Optional[str]:
         """
+        Checks on a submitted transaction alone: coins are only created by
+        block rewards, never by a transfer from a system sender.
+        """
+        if transaction.sender in SYSTEM_SENDERS:
+            return "System transactions can only be created by mining."
         if transaction.amount <= 0:
-            raise ValueError("Transaction amount must be positive.")
+            return "Transaction amount must be positive."
+        if self.ledger_cents and transaction.cost_cents is None:
+            return "Transaction amounts must be whole cents."
+        return None
+
+    def _admit(self, transaction: Transaction):
+        """
+        add_transaction's checks and admission; the caller holds both locks.
+        """
+        # Replay protection: O(1) id lookups against the pool and mined history
+        error = self._duplicate_error(transaction)
+        if error:
+            raise ValueError(error)
+
+        # Verify Sender Balance
+        spendable_balance = self._spendable_balance(transaction.sender)
+        if spendable_balance < self._cost_of(transaction):
+            raise ValueError(self._insufficient_funds(spendable_balance, transaction))
+
+        # The mempool keeps pending outflows in step with admissions and evictions
+        self.mempool.add(transaction)
+
+    def _insufficient_funds(self, spendable, transaction: Transaction) -> str:
+        return (f"Insufficient funds. Spendable Balance: {self._to_zar(spendable)} {CURRENCY}, "
+                f"Required: {transaction.cost} {CURRENCY}")
+
+    def _duplicate_error(self, transaction: Transaction) -> Optional[str]:
+        """
+        Reject resubmission of a transaction that is pending or already mined.
+        """
+        if transaction.id in self.mempool:
+            return "Transaction is already pending."
+        if transaction.id in self.tx_index:
+            return "Duplicate transaction: already included in the chain."
+        return None
+
+    def _signature_errors(self, transactions: Sequence[Transaction]) -> List[Optional[str]]:
+        """
+        Check the signatures of a batch (in parallel if it is large; cached
+        results are reused). Needs no lock.
+
+        :return: Per transaction, why its signature is unacceptable, or None.
+        """
+        signed = [tx for tx in transactions if tx.signature is not None]
+        valid = iter(self.signatures.verify_many(signed) if signed else ())
+        errors: List[Optional[str]] = []
+        for tx in transactions:
+            if tx.signature is not None:
+                errors.append(None if next(valid) else "Invalid signature.")
+            elif self.require_signatures and tx.sender not in SYSTEM_SENDERS:
+                errors.append("Transaction is not signed.")
+            else:
+                errors.append(None)
+        return errors
+
+    def add_transactions(self, transactions: Iterable[Transaction]) -> List[TransactionResult]:
+        """
+        Validate and add a batch of transactions to the pending pool in one pass.
+
+        Transactions are checked in order with the same rules as add_transaction,
+        but rejections are reported per item instead of raised, so one bad
+        transfer doesn't abort the batch.
+
+        :param transactions: The transactions to add.
+        :return: One TransactionResult per input, in order.
+        """
+        transactions = list(transactions)
+        signature_errors = self._signature_errors(transactions)
+        with self._state_lock.read(), self._pool_lock:
+            results = self._admit_batch(transactions, signature_errors)
+        if METRICS.enabled:
+            for result in results:
+                if result.accepted:
+                    TRANSACTIONS_ACCEPTED.inc()
+                else:
+                    TRANSACTIONS_REJECTED.inc(reason=reject_reason(result.error))
+        return results
+
+    def _admit_batch(self, transactions: Iterable[Transaction],
+                     signature_errors: Optional[List[Optional[str]]] = None) -> List[TransactionResult]:
+        # Bolt Optimization: Look up each sender's spendable balance once and
+        # track what remains of it locally (one ledger-unit op per
+        # transaction), then admit everything that passed into the mempool in
+        # one go.
+        remaining: Dict[str, Decimal] = {}
+        results: List[TransactionResult] = []
+        accepted: List[Transaction] = []
+        positions: List[int] = []
+        seen = set()
+        pending = self.mempool
+        cost_of = self._cost_of
+
+        for position, tx in enumerate(transactions):
+            error = self._submission_error(tx)
+            if error:
+                results.append(TransactionResult(False, error))
+                continue
+            if signature_errors and signature_errors[position]:
+                results.append(TransactionResult(False, signature_errors[position]))
+                continue
+            if tx.id in seen:
+                results.append(TransactionResult(False, "Transaction is already pending."))
+                continue
+            error = self._duplicate_error(tx)
+            if error:
+                results.append(TransactionResult(False, error))
+                continue
+
+            sender = tx.sender
+            cost = cost_of(tx)
+            spendable = remaining.get(sender)
+            if spendable is None:
+                spendable = self._spendable_balance(sender)
+            if spendable < cost:
+                remaining[sender] = spendable
+                results.append(TransactionResult(False, self._insufficient_funds(spendable, tx)))
+                continue
+            remaining[sender] = spendable - cost
+
+            seen.add(tx.id)
+            accepted.append(tx)
+            positions.append(position)
+            results.append(ACCEPTED)
+
+        if len(pending) + len(accepted) <= pending.max_size:
+            pending.extend(accepted)
+        else:
+            # Pool would overflow: admit one by one so eviction/rejection applies per item
+            for position, tx in zip(positions, accepted):
+                try:
+                    pending.add(tx)
+                except ValueError as e:
+                    results[position] = TransactionResult(False, str(e))
+        return results
+
+    def mine_pending_transactions(self, miner_address: str) -> Block:
+        """
+        Mine the highest-priority pending transactions into a new block.
 
-        # Verify Sender Balance (skip check for system/genesis)
-        if transaction.sender not in SYSTEM_SENDERS:
-            spendable_balance = self.get_spendable_balance(transaction.sender)
-            if spendable_balance < transaction.amount:
-                raise ValueError(f"Insufficient funds. Spendable Balance: {spendable_balance} {CURRENCY}, Required: {transaction.amount} {CURRENCY}")
+        At most max_block_transactions are included; the rest stay pending
+        (with their outflows still reserved) for a later block. Fees of the
+        included transactions are added to the miner's reward.
 
-        self.pending_transactions.append(transaction)
+        :param miner_address: The address to receive the mining reward.
+        :return: The new block.
+        """
+        with self._mining_lock:
+            for attempt in range(MAX_MINE_ATTEMPTS):
+                new_block = self.prepare_block(miner_address)
+                new_block.mine(self.difficulty, self.mining_workers, self.next_target())
+                try:
+                    self.commit_block(new_block)
+                    return new_block
+                except StaleBlockError:
+                    # A transaction was evicted (or another miner won) while mining
+                    if attempt == MAX_MINE_ATTEMPTS - 1:
+                        raise
+
+    def prepare_block(self, miner_address: str) -> Block:
+        """
+        Build an unmined block on the current tip from the highest-priority
+        pending transactions, ending with the miner's reward. Nothing is
+        removed from the pool until the block is committed.
 
-        # Update pending outflows cache only for non-system/genesis senders
-        if transaction.sender not in SYSTEM_SENDERS:
-            if transaction.sender not in self.pending_outflows:
-                self.pending_outflows[transaction.sender] = Decimal(0)
-            self.pending_outflows[transaction.sender] += transaction.amount
+        :param miner_address: The address to receive the mining reward.
+        """
+        with self._state_lock.read(), self._pool_lock:
+            selected = self.mempool.select(self.max_block_transactions)
+            previous_hash = self.get_latest_block().hash
+            median_past = median_time_past(len(self.chain), self._timestamp_at)
+        return self._assemble_block(selected, previous_hash, miner_address, median_past)
 
-    def mine_pending_transactions(self, miner_address: str):
+    def create_template(self, miner_address: str) -> BlockTemplate:
         """
-        Mine all pending transactions into a new block.
+        Like prepare_block(), but packaged for external mining: the template
+        also records the target the block must meet and the pool revision
+        its transactions were selected at, so miners can tell when it has
+        gone stale.
 
         :param miner_address: The address to receive the mining reward.
         """
+        with self._state_lock.read(), self._pool_lock:
+            selected = self.mempool.select(self.max_block_transactions)
+            previous_hash = self.get_latest_block().hash
+            height = len(self.chain)
+            target = self._target_at(height)
+            median_past = median_time_past(height, self._timestamp_at)
+            revision = self.mempool.revision
+        block = self._assemble_block(selected, previous_hash, miner_address, median_past)
+        return BlockTemplate(block, height, target, revision)
+
+    def submit_solution(self, template: BlockTemplate, nonce: int) -> Tuple[int, Block]:
+        """
+        Commit a template's block with a nonce found by a miner.
+
+        :return: The committed block's height and the block.
+        :raises ValueError: If the nonce doesn't meet the template's target.
+        :raises StaleBlockError: As commit_block().
+        """
+        block = template.solve(nonce)
+        if not meets_target(block.hash, template.target):
+            raise ValueError("Solution does not meet the target.")
+        return self.commit_block(block), block
+
+    @property
+    def pool_revision(self) -> int:
+        """
+        Changes whenever the pending pool does (see Mempool.revision).
+        """
+        return self.mempool.revision
+
+    @staticmethod
+    def _assemble_block(selected: List[Transaction], previous_hash: str, miner_address: str,
+                        median_past: float) -> Block:
         # Add a reward for the miner
-        reward_tx = Transaction("System", miner_address, Decimal(MINING_REWARD))
-        self.pending_transactions.append(reward_tx)
+        fees = sum((tx.fee for tx in selected), Decimal(0))
+        reward_tx = Transaction("System", miner_address, Decimal(MINING_REWARD) + fees)
+
+        # Peers refuse blocks not later than the median time past, even if our clock is behind
+        return Block(selected + [reward_tx], previous_hash, max(time.time(), median_past + 0.001))
+
+    def commit_block(self, block: Block) -> int:
+        """
+        Append a block from prepare_block() once it has been mined.
+
+        :return: The block's height.
+
+        :raises StaleBlockError: If the tip has moved, or one of the block's
+                                 transactions left the pool (e.g. was
+                                 evicted) while it was being mined.
+        """
+        selected = block.transactions[:-1]
+        with self._state_lock.write(), self._pool_lock:
+            if block.previous_hash != self.get_latest_block().hash:
+                raise StaleBlockError("Stale block: the chain tip has moved.")
+            if any(tx.id not in self.mempool for tx in selected):
+                raise StaleBlockError("Stale block: a transaction is no longer pending.")
+
+            self.chain.append(block)
+            self._update_balance_from_block(block)
+            self.tx_index.add_block(block)
+            self.mempool.remove(selected)
+
+            if self.data_dir and self.snapshot_interval and (len(self.chain) - 1) % self.snapshot_interval == 0:
+                self._save_snapshot()
+            return len(self.chain) - 1
+
+    def _target_schedule(self) -> TargetSchedule:
+        # Rebuilt whenever the difficulty settings are changed
+        params = (difficulty_to_target(self.difficulty), self.retarget_interval, self.target_block_time)
+        schedule = self._schedule
+        if schedule is None or schedule.params != params:
+            schedule = self._schedule = TargetSchedule(*params)
+        return schedule
+
+    def _timestamp_at(self, height: int) -> float:
+        return self.chain[height].timestamp
+
+    def target_at(self, height: int) -> int:
+        """
+        The 256-bit proof-of-work target the block at `height` must meet
+        (`height` may be one past the tip, i.e. the next block).
+        """
+        with self._state_lock.read():
+            return self._target_at(height)
+
+    def _target_at(self, height: int) -> int:
+        return self._target_schedule().target_at(height, self._timestamp_at)
+
+    def next_target(self) -> int:
+        """
+        The target for the next block on the current tip.
+        """
+        with self._state_lock.read():
+            return self._target_at(len(self.chain))
+
+    def branch_targets(self, fork_height: int, timestamps: Sequence[float]) -> List[int]:
+        """
+        Expected targets of a competing branch after `fork_height`, whose
+        blocks have the given timestamps (retargets within the branch use them).
+        """
+        with self._state_lock.read():
+            return self._branch_targets(fork_height, timestamps)
+
+    def _branch_targets(self, fork_height: int, timestamps: Sequence[float]) -> List[int]:
+        schedule = self._target_schedule().copy()
+        schedule.truncate(fork_height)
+
+        def timestamp_at(height: int) -> float:
+            return self._timestamp_at(height) if height <= fork_height else timestamps[height - fork_height - 1]
+        return [schedule.target_at(fork_height + 1 + offset, timestamp_at) for offset in range(len(timestamps))]
+
+    def chain_work(self, above: int = 0) -> int:
+        """
+        Cumulative proof of work of the blocks above height `above`; fork
+        choice follows the chain with the most.
+        """
+        with self._state_lock.read():
+            return self._chain_work(above)
+
+    def _chain_work(self, above: int) -> int:
+        return self._target_schedule().work(above + 1, len(self.chain), self._timestamp_at)
+
+    def add_blocks(self, blocks: Sequence[Block]) -> int:
+        """
+        Append blocks mined by other nodes to the tip.
+
+        Each block is checked for linkage, hash and proof of work, its
+        timestamp (after the median of the previous blocks, not too far ahead
+        of our clock), its mining reward, duplicate transactions and
+        overdrafts before it is applied. Pending
+        transactions they include (or now conflict with) leave the pool.
+
+        :return: Number of blocks appended.
+        :raises ValueError: At the first invalid block; those before it stay appended.
+        """
+        # Verify every signature up front, across processes and without the
+        # lock; _connect_block then finds them in the verifier's cache
+        self._signature_errors([tx for block in blocks for tx in block.transactions])
+        with self._state_lock.write(), self._pool_lock:
+            start_height = len(self.chain) - 1
+            try:
+                for block in blocks:
+                    error = self._connect_block(block)
+                    if error:
+                        raise ValueError(f"Invalid block at height {len(self.chain)}: {error}.")
+            finally:
+                if len(self.chain) - 1 > start_height:
+                    self._refresh_pool([])
+                    self._maybe_snapshot(start_height)
+            return len(self.chain) - 1 - start_height
+
+    def import_blocks(self, blocks: Sequence[Block], verify: bool = True, pool: Optional[Executor] = None) -> int:
+        """
+        Append a batch of already-mined blocks to the tip in bulk (see src/bootstrap.py).
 
-        new_block = Block(self.pending_transactions, self.get_latest_block().hash)
-        new_block.mine(self.difficulty)
+        Cheaper than add_blocks for large imports: the whole batch is checked
+        and applied under one lock acquisition, balance changes are staged in
+        a single pass, the blocks reach storage in one write, and the history
+        index is dropped (it is rebuilt on first query).
 
-        self.chain.append(new_block)
-        self._update_balance_from_block(new_block)
-        self.pending_transactions = []
-        self.pending_outflows = {}
+        :param verify: Apply add_blocks' checks (hash, proof of work,
+                       timestamp, reward, signatures, duplicate
+                       transactions, overdrafts). If
+                       False only the hashes and their linkage are checked:
+                       for data whose final hash is already trusted.
+        :param pool: Executor to spread hash recomputation over.
+        :return: Number of blocks appended.
+        :raises ValueError: At the first invalid block; none of the batch is applied.
+        """
+        if not blocks:
+            return 0
+        # Slow checks that need no chain state run before locking
+        if verify:
+            self._signature_errors([tx for block in blocks for tx in block.transactions])
+        bad_hashes = []
+        if pool is not None:
+            bad_hashes = [pool.submit(_first_bad_hash, offset, list(blocks[offset:offset + VALIDATION_CHUNK_SIZE]))
+                          for offset in range(0, len(blocks), VALIDATION_CHUNK_SIZE)]
+            bad_hashes = [bad for bad in (future.result() for future in bad_hashes) if bad is not None]
+
+        with self._state_lock.write(), self._pool_lock:
+            start = len(self.chain)
+            first_bad_hash = min(bad_hashes, default=None)
+            targets = self._branch_targets(start - 1, [block.timestamp for block in blocks]) if verify else None
+            now = time.time()
+
+            def timestamp_at(height: int) -> float:
+                return self._timestamp_at(height) if height < start else blocks[height - start].timestamp
+            previous_hash = self.get_latest_block().hash
+            changes: Dict[str, Decimal] = {}
+            balances = self.balances
+            amount_of, cost_of = self._amount_of, self._cost_of
+            seen = set()
+            for offset, block in enumerate(blocks):
+                error = None
+                if block.previous_hash != previous_hash:
+                    error = "it does not extend the current chain"
+                elif offset == first_bad_hash or (pool is None and not block.has_valid_hash()):
+                    error = "its hash does not match its contents"
+                elif verify:
+                    if not meets_target(block.hash, targets[offset]):
+                        error = "its proof of work does not meet the required target"
+                    else:
+                        error = (timestamp_error(block.timestamp, median_time_past(start + offset, timestamp_at), now)
+                                 or self._stage_transactions(block, changes, seen))
+                else:
+                    for tx in block.transactions:
+                        if cost_of(tx) is None:
+                            error = f"transaction {tx.id} has fractions of a cent"
+                            break
+                        changes[tx.recipient] = changes.get(tx.recipient, balances.get(tx.recipient, 0)) + amount_of(tx)
+                        changes[tx.sender] = changes.get(tx.sender, balances.get(tx.sender, 0)) - cost_of(tx)
+                if error:
+                    raise ValueError(f"Invalid block at height {start + offset}: {error}.")
+                previous_hash = block.hash
+
+            self.chain.extend(blocks)
+            balances.update(changes)
+            self.history = None
+            for block in blocks:
+                self.tx_index.add_block(block)
+            if verify and self.validated_height == start - 1:
+                self.validated_height = len(self.chain) - 1
+                self.validated_hash = previous_hash
+            self._refresh_pool([])
+            self._maybe_snapshot(start - 1)
+            return len(blocks)
+
+    def _stage_transactions(self, block: Block, changes: Dict[str, Decimal], seen: set) -> Optional[str]:
+        """
+        Check a block's transactions (reward, signatures, duplicates,
+        overdrafts, whole cents in a cents ledger)
+        against the balances with `changes` staged on top, staging its
+        transfers as it goes. Ids are added to `seen`.
+
+        :return: Why the block is invalid (`changes` is then partly updated), or None.
+        """
+        error = _reward_error(block)
+        if error:
+            return error
+        for tx, error in zip(block.transactions, self._signature_errors(block.transactions)):
+            if error:
+                return f"transaction {tx.id} is {'signed incorrectly' if tx.signature else 'not signed'}"
+        balances = self.balances
+        amount_of, cost_of = self._amount_of, self._cost_of
+        reward = block.transactions[-1]
+        for tx in block.transactions:
+            if tx.id in seen or tx.id in self.tx_index:
+                return f"transaction {tx.id} is already on the chain"
+            cost = cost_of(tx)
+            if cost is None:
+                return f"transaction {tx.id} has fractions of a cent"
+            seen.add(tx.id)
+            changes[tx.recipient] = changes.get(tx.recipient, balances.get(tx.recipient, 0)) + amount_of(tx)
+            remaining = changes.get(tx.sender, balances.get(tx.sender, 0)) - cost
+            if remaining < 0 and tx is not reward:
+                return f"transaction {tx.id} overdraws {tx.sender}"
+            changes[tx.sender] = remaining
+        return None
+
+    def rewind(self, height: int):
+        """
+        Roll the chain back so the block at `height` is the tip, reverting
+        balances block by block. Transfers from the dropped blocks are not
+        returned to the pool.
+        """
+        with self._state_lock.write(), self._pool_lock:
+            if not 0 <= height < len(self.chain):
+                raise ValueError(f"Height {height} is not on this chain.")
+            while len(self.chain) - 1 > height:
+                self._disconnect_tip()
+            if self.validated_height > height:
+                self.validated_height = height
+                self.validated_hash = self.chain[height].hash
+            if self.data_dir:
+                discard_snapshots_above(self.data_dir, height)
+            self._refresh_pool([])
+
+    def reorganize(self, fork_height: int, blocks: Sequence[Block]):
+        """
+        Switch to a competing branch that forks off after `fork_height`.
+
+        Blocks above the fork are rolled back from the tip down, reverting
+        their balance changes transaction by transaction (no replay from
+        genesis), then the branch is validated and applied block by block. If
+        any branch block is invalid, the original chain is restored.
+        Transfers from the abandoned blocks (not their mining rewards) go back
+        into the pool if they are still valid.
+
+        :param fork_height: Height of the last block both chains share.
+        :param blocks: The branch, starting at fork_height + 1.
+        :raises ValueError: If the branch is invalid or doesn't carry more work.
+        """
+        self._signature_errors([tx for block in blocks for tx in block.transactions])
+        with self._state_lock.write(), self._pool_lock:
+            if not 0 <= fork_height < len(self.chain):
+                raise ValueError(f"Fork height {fork_height} is not on this chain.")
+            targets = self._branch_targets(fork_height, [block.timestamp for block in blocks])
+            if sum(map(target_work, targets)) <= self._chain_work(fork_height):
+                raise ValueError("Branch does not have more work than the current chain.")
+
+            abandoned = []
+            while len(self.chain) - 1 > fork_height:
+                abandoned.append(self._disconnect_tip())
+            abandoned.reverse()
+
+            for block in blocks:
+                error = self._connect_block(block)
+                if error:
+                    height = len(self.chain)
+                    while len(self.chain) - 1 > fork_height:
+                        self._disconnect_tip()
+                    # Restored without re-validation: they were already on the
+                    # chain, and checks added since (e.g. required signatures
+                    # on older history) must not leave it half-restored
+                    for old in abandoned:
+                        self.chain.append(old)
+                        self._update_balance_from_block(old)
+                        self.tx_index.add_block(old)
+                    raise ValueError(f"Invalid block at height {height}: {error}.")
+
+            if self.validated_height > fork_height:
+                self.validated_height = fork_height
+                self.validated_hash = self.chain[fork_height].hash
+            if self.data_dir:
+                discard_snapshots_above(self.data_dir, fork_height)
+            # The last transaction of each block is its miner's reward
+            self._refresh_pool([tx for block in abandoned for tx in block.transactions[:-1]])
+            self._maybe_snapshot(fork_height)
+
+    def _connect_block(self, block: Block) -> Optional[str]:
+        """
+        Validate a block against the current state and append it.
+        The caller holds both locks. State is unchanged if it is invalid.
+
+        :return: Why the block is invalid, or None once it is appended.
+        """
+        height = len(self.chain)
+        error = (block_error(block, self.get_latest_block().hash, self._target_at(height))
+                 or timestamp_error(block.timestamp, median_time_past(height, self._timestamp_at)))
+        if error:
+            return error
+
+        # Stage balance changes so a bad transaction leaves the cache untouched
+        changes: Dict[str, Decimal] = {}
+        error = self._stage_transactions(block, changes, set())
+        if error:
+            return error
+
+        self.chain.append(block)
+        self.balances.update(changes)
+        if self.history is not None:
+            self.history.add_block(block, len(self.chain) - 1)
+        self.tx_index.add_block(block)
+        return None
+
+    def _disconnect_tip(self) -> Block:
+        """
+        Roll back the tip block. The caller holds both locks.
+        """
+        height = len(self.chain) - 1
+        block = self.chain[height]
+        self._revert_block(self.balances, block, self.ledger_cents)
+        if self.history is not None:
+            self.history.remove_block(block, height)
+        self.tx_index.remove_block(block)
+        if isinstance(self.chain, BlockStore):
+            self.chain.truncate(height)
+        else:
+            del self.chain[height:]
+        if self._schedule is not None:
+            self._schedule.truncate(height - 1)
+        return block
+
+    def _refresh_pool(self, returning: List[Transaction]):
+        """
+        Re-check the pending pool after blocks from elsewhere changed the
+        chain: mined and now-unaffordable transactions are dropped, and
+        `returning` (transfers from rolled-back blocks) are re-admitted first.
+        The caller holds both locks.
+        """
+        pending = returning + list(self.mempool)
+        revision = self.mempool.revision
+        self.mempool = Mempool(self.mempool.max_size, self.mempool.policy, SYSTEM_SENDERS, self._cost_of)
+        # Keep counting from the old pool so outstanding templates see a change
+        self.mempool.revision = revision + 1
+        if pending:
+            self._admit_batch(pending)
+
+    def _maybe_snapshot(self, previous_height: int):
+        """
+        Write a snapshot if the tip has crossed a snapshot interval since `previous_height`.
+        """
+        interval = self.snapshot_interval
+        if self.data_dir and interval and (len(self.chain) - 1) // interval > previous_height // interval:
+            self._save_snapshot()
 
     def get_balance(self, address: str) -> Decimal:
         """
@@ -101,28 +993,82 @@ class Blockchain:
         :param address: The address to check.
         :return: The current balance.
         """
-        return self.balances.get(address, Decimal(0))
+        with self._state_lock.read():
+            return self._to_zar(self.balances.get(address, 0))
 
     def get_spendable_balance(self, address: str) -> Decimal:
         """
         Get balance considering pending transactions.
         """
-        balance = self.get_balance(address)
+        with self._state_lock.read(), self._pool_lock:
+            return self._to_zar(self._spendable_balance(address))
+
+    def _spendable_balance(self, address: str) -> Decimal:
+        """
+        Balance minus pending outflows, in ledger units.
+        """
+        balance = self.balances.get(address, 0)
         # Bolt Optimization: Use cached pending outflows instead of iterating the entire pool
-        pending_outgoing = self.pending_outflows.get(address, Decimal(0))
+        pending_outgoing = self.mempool.outflows.get(address, 0)
         return balance - pending_outgoing
 
     def is_chain_valid(self) -> bool:
         """
-        Check if the blockchain is valid.
+        Check if the blockchain is valid, re-verifying every block.
         """
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i-1]
+        return self.verify_chain(full=True).valid
 
-            if current_block.hash != current_block.calculate_hash():
-                return False
+    def verify_chain(self, full: bool = False, workers: Optional[int] = None,
+                     start: Optional[int] = None) -> ValidationResult:
+        """
+        Verify the chain and report the first invalid block.
 
-            if current_block.previous_hash != previous_block.hash:
-                return False
-        return True
+        By default only blocks after the validation checkpoint are checked, so
+        repeated health checks cost O(new blocks). If the checkpointed block has
+        been replaced (e.g. a reorganisation) it falls back to a full check.
+        The checkpoint isn't persisted, so the first check after a restart is
+        a full one unless `start` is given.
+
+        :param full: Re-verify every block from genesis.
+        :param workers: Processes for full verification (defaults to
+                        validation_workers; 1 = sequential, 0 = all cores).
+        :param start: Verify from this height instead (blocks below it are
+                      trusted); overrides `full`.
+        :return: ValidationResult with the first invalid height, if any.
+        """
+        with self._state_lock.read():
+            if not METRICS.enabled:
+                return self._verify_chain(full, workers, start)
+            started = time.perf_counter()
+            result = self._verify_chain(full, workers, start)
+            VERIFY_CHAIN_SECONDS.observe(time.perf_counter() - started)
+            BLOCKS_VERIFIED.inc(result.checked)
+            return result
+
+    def _verify_chain(self, full: bool, workers: Optional[int], start: Optional[int] = None) -> ValidationResult:
+        end = len(self.chain)
+        with self._checkpoint_lock:
+            validated_height, validated_hash = self.validated_height, self.validated_hash
+        resume = validated_height + 1
+        if full or validated_height >= end or self.chain[validated_height].hash != validated_hash:
+            resume = 1
+        # The checkpoint may only advance over blocks joined to it
+        contiguous = start is None or start <= resume
+        start = resume if start is None else min(max(1, start), end)
+
+        if workers is None:
+            workers = self.validation_workers
+        if start == 1 and workers != 1 and end > 1:
+            first_bad = parallel_first_invalid_block(self.chain, start, end, workers, self._target_at)
+        else:
+            first_bad = first_invalid_block(self.chain, start, end, self._target_at) if start < end else None
+
+        # Advance the checkpoint to the last block known to be good
+        good_height = end - 1 if first_bad is None else first_bad - 1
+        if contiguous and good_height >= start - 1:
+            good_hash = self.chain[good_height].hash
+            with self._checkpoint_lock:
+                self.validated_height, self.validated_hash = good_height, good_hash
+
+        checked = end - start if first_bad is None else first_bad - start + 1
+        return ValidationResult(first_bad is None, first_bad, checked)
@@ -0,0 +1,232 @@
+import argparse
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, TextIO, Tuple
+from src.blockchain import Blockchain
+from src.codec import FRAME_HEADER
+from src.config import DATA_DIR, IMPORT_BATCH_SIZE
+from src.mining import resolve_workers
+from src.storage import decode_record
+
+# Chain export files: a header, then one frame (u32 length + storage record) per block
+EXPORT_MAGIC = b"RNDC"
+EXPORT_FORMAT_VERSION = 1
+# magic (4) | format version (u8) | height of the first block (u64) | block count (u64)
+EXPORT_HEADER = struct.Struct("<4sBQQ")
+
+# Called with (blocks done, bytes done) as an export or import advances
+ProgressCallback = Callable[[int, int], None]
+
+
+class Progress:
+    """
+    Progress and throughput reporting for long exports and imports: prints
+    blocks done, blocks/s and MB/s at most once per `interval` seconds.
+    """
+    def __init__(self, label: str, total: int, stream: TextIO = sys.stderr, interval: float = 1.0):
+        self.label = label
+        self.total = total
+        self.stream = stream
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._last_report = self.started
+        self.blocks = 0
+        self.bytes = 0
+
+    def __call__(self, blocks: int, nbytes: int):
+        self.blocks = blocks
+        self.bytes = nbytes
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report(now)
+
+    def report(self, now: Optional[float] = None):
+        elapsed = max((now or time.perf_counter()) - self.started, 1e-9)
+        share = f" ({self.blocks / self.total:.0%})" if self.total else ""
+        print(f"{self.label} {self.blocks:,}/{self.total:,} blocks{share}  {self.blocks / elapsed:,.0f} blocks/s"
+              f"  {self.bytes / elapsed / 1e6:.1f} MB/s", file=self.stream, flush=True)
+
+
+def write_export(stream: BinaryIO, start: int, count: int, records: Iterable[bytes],
+                 progress: Optional[ProgressCallback] = None) -> int:
+    """
+    Write an export file from encoded block records, one at a time.
+
+    :return: Number of blocks written.
+    :raises ValueError: If `records` doesn't hold exactly `count` blocks.
+    """
+    stream.write(EXPORT_HEADER.pack(EXPORT_MAGIC, EXPORT_FORMAT_VERSION, start, count))
+    written = 0
+    size = EXPORT_HEADER.size
+    for record in records:
+        stream.write(FRAME_HEADER.pack(len(record)))
+        stream.write(record)
+        written += 1
+        size += FRAME_HEADER.size + len(record)
+        if progress is not None:
+            progress(written, size)
+    if written != count:
+        raise ValueError(f"Expected {count} blocks, wrote {written}.")
+    return written
+
+
+def export_chain(blockchain: Blockchain, stream: BinaryIO, start: int = 0, stop: Optional[int] = None,
+                 progress: Optional[ProgressCallback] = None) -> int:
+    """
+    Stream blocks [start, stop) to a binary file-like object without loading
+    the chain into memory (see Blockchain.block_records).
+
+    :param stop: One past the last height to export (defaults to the tip).
+    :return: Number of blocks written.
+    """
+    if stop is None:
+        stop = len(blockchain.chain)
+    return write_export(stream, start, stop - start, blockchain.block_records(start, stop), progress)
+
+
+def read_export(stream: BinaryIO) -> Tuple[int, int, Iterator[bytes]]:
+    """
+    Open an export file.
+
+    :return: (height of its first block, block count, iterator over the encoded records).
+    :raises ValueError: If it is not an export file, or (while iterating) it is truncated.
+    """
+    header = stream.read(EXPORT_HEADER.size)
+    if len(header) < EXPORT_HEADER.size:
+        raise ValueError("Not a chain export: file too short.")
+    magic, version, start, count = EXPORT_HEADER.unpack(header)
+    if magic != EXPORT_MAGIC:
+        raise ValueError("Not a chain export.")
+    if version != EXPORT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported export format version: {version}")
+
+    def records() -> Iterator[bytes]:
+        for _ in range(count):
+            frame = stream.read(FRAME_HEADER.size)
+            if len(frame) < FRAME_HEADER.size:
+                raise ValueError("Truncated chain export.")
+            (length,) = FRAME_HEADER.unpack(frame)
+            record = stream.read(length)
+            if len(record) < length:
+                raise ValueError("Truncated chain export.")
+            yield record
+    return start, count, records()
+
+
+def import_chain(blockchain: Blockchain, stream: BinaryIO, trusted_hash: Optional[str] = None,
+                 batch_size: int = IMPORT_BATCH_SIZE, workers: Optional[int] = None,
+                 progress: Optional[ProgressCallback] = None) -> int:
+    """
+    Append the blocks of an export file to the chain in batches (see
+    Blockchain.import_blocks).
+
+    Blocks the chain already has are skipped (after checking they match),
+    so an import can be resumed. By default every block is fully verified,
+    with hash recomputation spread over `workers` processes. With
+    `trusted_hash`, proof of work, signature and balance checks are skipped,
+    but transaction ids and block hashes are still recomputed, so the file's
+    contents are bound to its hash linkage; the last block of the file must
+    then have that hash, and if it doesn't, or the import fails for any
+    other reason, everything imported is rolled back.
+
+    :param workers: Processes for hash verification (defaults to the
+                    chain's validation_workers; 1 = in-process).
+    :return: Number of blocks appended.
+    :raises ValueError: If the file is malformed, doesn't continue this
+                        chain, holds an invalid block (without `trusted_hash`,
+                        earlier batches stay appended) or doesn't end at
+                        `trusted_hash`.
+    """
+    start, count, records = read_export(stream)
+    tip = len(blockchain.chain) - 1
+    if start > tip + 1:
+        raise ValueError(f"Export starts at height {start}, past this chain's tip ({tip}).")
+    verify = trusted_hash is None
+    if workers is None:
+        workers = blockchain.validation_workers
+    pool = ProcessPoolExecutor(max_workers=resolve_workers(workers)) if workers != 1 else None
+
+    appended = 0
+    done = 0
+    size = EXPORT_HEADER.size
+    last_hash = None
+    batch: List = []
+    try:
+        for height, record in enumerate(records, start):
+            # Ids are recomputed even when trusted: the trusted hash only covers them
+            block = decode_record(record)
+            last_hash = block.hash
+            done += 1
+            size += FRAME_HEADER.size + len(record)
+            if height <= tip:
+                if blockchain.chain[height].hash != block.hash:
+                    raise ValueError(f"Block {height} of the export differs from this chain's.")
+                continue
+            batch.append(block)
+            if len(batch) >= batch_size:
+                appended += blockchain.import_blocks(batch, verify, pool)
+                batch = []
+                if progress is not None:
+                    progress(done, size)
+        appended += blockchain.import_blocks(batch, verify, pool)
+        if progress is not None:
+            progress(done, size)
+        if not verify and last_hash != trusted_hash:
+            raise ValueError(f"The export ends at {last_hash}, not the trusted hash {trusted_hash}.")
+    except BaseException:
+        # Unverified blocks must not outlive a file that never reached the trusted hash
+        if not verify:
+            blockchain.rewind(tip)
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return appended
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a RandCoin chain to a file, or bootstrap one from it.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write the chain to FILE")
+    export.add_argument("file")
+    export.add_argument("--from", dest="start", type=int, default=0, help="first height to export")
+    export.add_argument("--to", dest="stop", type=int, help="last height to export (default: the tip)")
+    load = commands.add_parser("import", help="append the blocks in FILE to the chain")
+    load.add_argument("file")
+    load.add_argument("--trust-hash", help="skip proof-of-work, signature and balance checks; "
+                                           "the file must end at this block hash")
+    load.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    load.add_argument("--workers", type=int, help="processes for hash verification (0 = all cores)")
+    load.add_argument("--allow-unsigned", action="store_true",
+                      help="accept unsigned transfers (chains from before transfers were signed)")
+    for command in (export, load):
+        command.add_argument("--data-dir", default=DATA_DIR, help="persistent chain directory (default: in memory)")
+    args = parser.parse_args()
+
+    blockchain = Blockchain(args.data_dir, require_signatures=not getattr(args, "allow_unsigned", False))
+    try:
+        if args.command == "export":
+            stop = len(blockchain.chain) if args.stop is None else args.stop + 1
+            progress = Progress("exported", stop - args.start)
+            with open(args.file, "wb") as f:
+                export_chain(blockchain, f, args.start, stop, progress)
+        else:
+            with open(args.file, "rb") as f:
+                _, count, _ = read_export(f)
+                f.seek(0)
+                progress = Progress("imported", count)
+                import_chain(blockchain, f, args.trust_hash, args.batch_size, args.workers, progress)
+        progress.report()
+        print(f"Chain height {len(blockchain.chain) - 1}, tip {blockchain.get_latest_block().hash}")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        blockchain.close()
+
+
+if __name__ == "__main__":
+    main()
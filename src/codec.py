@@ -0,0 +1,219 @@
+import struct
+from typing import BinaryIO, Iterable, Iterator, Tuple, Union
+from src.block import Block
+from src.secp256k1 import PUBLIC_KEY_SIZE, SIGNATURE_SIZE
+from src.transaction import Transaction, from_cents, to_cents
+
+# Bumped whenever the layout below changes; every encoded block starts with it
+CODEC_VERSION = 2
+# Versions decode_block still reads (1 predates signatures)
+SUPPORTED_CODEC_VERSIONS = (1, 2)
+
+# codec version (u8) | block version (u8) | nonce (u64) | timestamp (f64) |
+# hash (32) | previous hash (32) | transaction count (u32)
+BLOCK_PREFIX = struct.Struct("<BBQd32s32sI")
+# id (32) | amount in cents (i64) | fee in cents (i64) | timestamp (f64) |
+# sender length (u16) | recipient length (u16), followed by both UTF-8 addresses
+TRANSACTION_PREFIX = struct.Struct("<32sqqdHH")
+# From version 2 the addresses are followed by a witness flag (u8): 0 for an
+# unsigned transaction, 1 followed by the public key and signature
+WITNESS_SIZE = PUBLIC_KEY_SIZE + SIGNATURE_SIZE
+# Block streams: each encoded block is preceded by its length (u32)
+FRAME_HEADER = struct.Struct("<I")
+
+# The genesis block links to "0", stored as an all-zero hash
+GENESIS_PREVIOUS_HASH = "0"
+_ZERO_HASH = bytes(32)
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _encode_address(address: str) -> bytes:
+    encoded = address.encode()
+    if len(encoded) > 0xFFFF:
+        raise ValueError("Address is too long to encode.")
+    return encoded
+
+
+def _write_transaction(out: bytearray, tx: Transaction):
+    sender = _encode_address(tx.sender)
+    recipient = _encode_address(tx.recipient)
+    cents = tx.cents
+    cost_cents = tx.cost_cents
+    if cost_cents is None:
+        # Raises with the offending amount
+        to_cents(tx.amount if cents is None else tx.fee)
+    out += TRANSACTION_PREFIX.pack(bytes.fromhex(tx.id), cents, cost_cents - cents, tx.timestamp,
+                                   len(sender), len(recipient))
+    out += sender
+    out += recipient
+    if tx.signature is None:
+        out.append(0)
+    else:
+        out.append(1)
+        out += tx.public_key
+        out += tx.signature
+
+
+def encode_transaction(tx: Transaction) -> bytes:
+    """
+    Encode a transaction in the binary format.
+
+    :raises ValueError: If an amount is not a whole number of cents.
+    """
+    out = bytearray()
+    _write_transaction(out, tx)
+    return bytes(out)
+
+
+def decode_transaction(buffer: Buffer, offset: int = 0, verify: bool = True,
+                       codec_version: int = CODEC_VERSION) -> Tuple[Transaction, int]:
+    """
+    Decode a transaction from `buffer` at `offset` without copying the buffer.
+
+    :param verify: Recompute the transaction id and check it against the
+                   stored one. Skip only for data this node wrote itself.
+                   Signatures are not checked here (see SignatureVerifier).
+    :param codec_version: Version of the enclosing block's encoding.
+    :return: (transaction, offset just past it).
+    :raises ValueError: If the data is truncated or the id does not match.
+    """
+    view = memoryview(buffer)
+    try:
+        tx_id, amount, fee, timestamp, sender_length, recipient_length = \
+            TRANSACTION_PREFIX.unpack_from(view, offset)
+    except struct.error:
+        raise ValueError("Truncated transaction.") from None
+    start = offset + TRANSACTION_PREFIX.size
+    middle = start + sender_length
+    end = middle + recipient_length
+    if end > len(view):
+        raise ValueError("Truncated transaction.")
+    sender = str(view[start:middle], "utf-8")
+    recipient = str(view[middle:end], "utf-8")
+    public_key = signature = None
+    if codec_version >= 2:
+        if end >= len(view):
+            raise ValueError("Truncated transaction.")
+        signed = view[end]
+        end += 1
+        if signed:
+            if end + WITNESS_SIZE > len(view):
+                raise ValueError("Truncated transaction.")
+            public_key = bytes(view[end:end + PUBLIC_KEY_SIZE])
+            signature = bytes(view[end + PUBLIC_KEY_SIZE:end + WITNESS_SIZE])
+            end += WITNESS_SIZE
+    tx_id = tx_id.hex()
+    if verify:
+        tx = Transaction(sender, recipient, from_cents(amount), timestamp, fee=from_cents(fee))
+        if tx.id != tx_id:
+            raise ValueError(f"Transaction {tx_id} does not match its contents.")
+        if signature is not None:
+            tx.attach_signature(public_key, signature)
+    else:
+        tx = Transaction.restore(sender, recipient, from_cents(amount), timestamp, from_cents(fee), tx_id,
+                                 public_key, signature, amount, fee)
+    return tx, end
+
+
+def encode_block(block: Block) -> bytes:
+    """
+    Encode a block and its transactions in the binary format.
+
+    :raises ValueError: If an amount is not a whole number of cents.
+    """
+    previous = _ZERO_HASH if block.previous_hash == GENESIS_PREVIOUS_HASH else bytes.fromhex(block.previous_hash)
+    out = bytearray(BLOCK_PREFIX.pack(CODEC_VERSION, block.version, block.nonce, block.timestamp,
+                                      bytes.fromhex(block.hash), previous, len(block.transactions)))
+    for tx in block.transactions:
+        _write_transaction(out, tx)
+    return bytes(out)
+
+
+def decode_block(buffer: Buffer, offset: int = 0, verify: bool = True) -> Tuple[Block, int]:
+    """
+    Decode a block from `buffer` at `offset` without copying the buffer.
+
+    The block hash is taken as stored (see Block.restore); `verify` only
+    controls whether transaction ids are recomputed.
+
+    :return: (block, offset just past it).
+    :raises ValueError: If the data is truncated, of an unknown codec version
+                        or (with `verify`) holds a transaction that doesn't
+                        match its id.
+    """
+    view = memoryview(buffer)
+    try:
+        codec_version, version, nonce, timestamp, block_hash, previous, count = BLOCK_PREFIX.unpack_from(view, offset)
+    except struct.error:
+        raise ValueError("Truncated block.") from None
+    if codec_version not in SUPPORTED_CODEC_VERSIONS:
+        raise ValueError(f"Unsupported codec version: {codec_version}")
+    offset += BLOCK_PREFIX.size
+    transactions = []
+    for _ in range(count):
+        tx, offset = decode_transaction(view, offset, verify, codec_version)
+        transactions.append(tx)
+    previous_hash = GENESIS_PREVIOUS_HASH if previous == _ZERO_HASH else previous.hex()
+    return Block.restore(transactions, previous_hash, timestamp, nonce, block_hash.hex(), version), offset
+
+
+def write_blocks(stream: BinaryIO, blocks: Iterable[Block]) -> int:
+    """
+    Stream length-prefixed encoded blocks to a binary file-like object.
+
+    :return: Number of blocks written.
+    """
+    written = 0
+    for block in blocks:
+        payload = encode_block(block)
+        stream.write(FRAME_HEADER.pack(len(payload)))
+        stream.write(payload)
+        written += 1
+    return written
+
+
+def read_blocks(stream: BinaryIO, verify: bool = True) -> Iterator[Block]:
+    """
+    Decode blocks written by write_blocks, one at a time, from a binary file-like object.
+
+    :raises ValueError: If the stream ends part-way through a block.
+    """
+    while True:
+        header = stream.read(FRAME_HEADER.size)
+        if not header:
+            return
+        if len(header) < FRAME_HEADER.size:
+            raise ValueError("Truncated block stream.")
+        (length,) = FRAME_HEADER.unpack(header)
+        payload = stream.read(length)
+        if len(payload) < length:
+            raise ValueError("Truncated block stream.")
+        block, end = decode_block(payload, 0, verify)
+        if end != length:
+            raise ValueError("Block length does not match its frame.")
+        yield block
+
+
+def iter_blocks(buffer: Buffer, verify: bool = True) -> Iterator[Block]:
+    """
+    Decode blocks written by write_blocks from an in-memory buffer (bytes,
+    memoryview, mmap), without copying it.
+
+    :raises ValueError: If the buffer ends part-way through a block.
+    """
+    view = memoryview(buffer)
+    offset = 0
+    while offset < len(view):
+        if offset + FRAME_HEADER.size > len(view):
+            raise ValueError("Truncated block stream.")
+        (length,) = FRAME_HEADER.unpack_from(view, offset)
+        offset += FRAME_HEADER.size
+        end = offset + length
+        if end > len(view):
+            raise ValueError("Truncated block stream.")
+        block, decoded_end = decode_block(view[:end], offset, verify)
+        if decoded_end != end:
+            raise ValueError("Block length does not match its frame.")
+        yield block
+        offset = end
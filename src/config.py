@@ -1,3 +1,63 @@
 MINING_DIFFICULTY = 2
 MINING_REWARD = 10
 CURRENCY = "ZAR"
+# Number of processes used to search for a nonce (1 = single core, 0 = all cores)
+MINING_WORKERS = 1
+# Format of newly created blocks (1 = JSON hash, 2 = binary header with Merkle root)
+BLOCK_VERSION = 2
+# Directory for persistent chain storage (None = keep the chain in memory only)
+DATA_DIR = None
+# Number of decoded blocks kept in memory when the chain is stored on disk
+BLOCK_CACHE_SIZE = 1024
+# Number of processes used for full chain re-verification (1 = sequential, 0 = all cores)
+VALIDATION_WORKERS = 1
+# Write a balance snapshot every N blocks on persistent chains (0 = never)
+SNAPSHOT_INTERVAL = 1000
+# Number of balance snapshots to keep on disk
+SNAPSHOT_KEEP = 2
+# Maximum number of pending transactions held in the mempool
+MEMPOOL_MAX_SIZE = 100000
+# Mempool ordering: "fee" (highest fee first) or "age" (oldest first)
+MEMPOOL_PRIORITY = "fee"
+# Maximum number of pending transactions mined into one block (excluding the reward)
+MAX_BLOCK_TRANSACTIONS = 5000
+# Expected number of transactions on the chain; sizes the duplicate-detection index
+TXINDEX_CAPACITY = 1000000
+# Target false-positive rate of the duplicate-detection Bloom filter
+TXINDEX_ERROR_RATE = 0.001
+# Address the JSON-RPC node listens on (localhost only; 0 = pick a free port)
+NODE_HOST = "127.0.0.1"
+NODE_PORT = 8545
+# Seconds the network aims to spend mining each block
+TARGET_BLOCK_TIME = 10.0
+# Retarget proof of work every N blocks from the observed block times (0 = fixed MINING_DIFFICULTY)
+RETARGET_INTERVAL = 0
+# Most the target may be multiplied or divided by in a single retarget
+MAX_RETARGET_FACTOR = 4
+# A block's timestamp must be later than the median of this many blocks before it
+MEDIAN_TIME_BLOCKS = 11
+# Seconds a block's timestamp may run ahead of this node's clock
+MAX_FUTURE_BLOCK_TIME = 2 * 60 * 60
+# Reject unsigned transfers (block rewards are always unsigned). Turn off only
+# to import chains from before transfers were signed (see src/bootstrap.py)
+REQUIRE_SIGNATURES = True
+# Number of processes used to verify large batches of signatures (1 = sequential, 0 = all cores)
+SIGNATURE_WORKERS = 1
+# Signatures sent to a worker process per task
+SIGNATURE_CHUNK_SIZE = 64
+# Number of verified signatures remembered, so none is checked twice
+SIGNATURE_CACHE_SIZE = 100000
+# Record metrics (counters, histograms) on the hot paths; off costs one attribute check per call
+METRICS_ENABLED = False
+# Upper bounds (seconds) of the latency histogram buckets
+METRICS_LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0)
+# Blocks checked and applied together by a bulk import (see src/bootstrap.py)
+IMPORT_BATCH_SIZE = 500
+# Keep balances and pending outflows as integer cents instead of Decimal (amounts must be whole cents)
+LEDGER_CENTS = False
+# Nonces in each work unit handed to a mining backend (see src/miner.py)
+MINING_UNIT_SIZE = 100000
+# Seconds before a block template is rebuilt to pick up newly arrived transactions
+MINING_REFRESH_INTERVAL = 5.0
+# Port a standalone mining worker (python -m src.miner) listens on
+MINER_PORT = 8560
@@ -0,0 +1,103 @@
+import threading
+from typing import Callable, List, Tuple
+from src.config import MAX_RETARGET_FACTOR
+from src.mining import target_work
+
+# Largest (easiest) possible 256-bit target
+MAX_TARGET = (1 << 256) - 1
+
+
+def retarget(target: int, actual_timespan: float, expected_timespan: float,
+             max_factor: int = MAX_RETARGET_FACTOR) -> int:
+    """
+    Scale a target by how long a retarget period actually took.
+
+    Blocks that came too fast give a smaller (harder) target, slow ones a
+    larger (easier) one. The adjustment is clamped to `max_factor` either
+    way, which bounds the damage from a skewed timestamp. Times are rounded
+    to milliseconds so that every node computes exactly the same integer.
+    """
+    actual = min(max(actual_timespan, expected_timespan / max_factor), expected_timespan * max_factor)
+    new_target = target * round(actual * 1000) // round(expected_timespan * 1000)
+    return min(max(new_target, 1), MAX_TARGET)
+
+
+class TargetSchedule:
+    """
+    The proof-of-work target expected at each height of a chain.
+
+    Heights 1..interval use the initial target. Each following period of
+    `interval` blocks gets a target scaled (see retarget) by how long the
+    previous period took, from the block before it to its last block,
+    against interval * block_time. The first period is timed from block 1
+    instead, since the genesis timestamp is fixed long before any chain
+    starts (and with interval 1 it is not retargeted at all). With interval
+    0 every height uses the initial target.
+
+    Period targets are computed on first use and cached; period p only
+    depends on the timestamps of blocks up to height p * interval, so after
+    a rollback truncate() drops what the removed blocks fed into.
+    """
+    def __init__(self, initial_target: int, interval: int, block_time: float):
+        """
+        :param initial_target: Target of the first period.
+        :param interval: Blocks per retarget period (0 = never retarget).
+        :param block_time: Seconds per block the schedule aims for.
+        """
+        self.params: Tuple[int, int, float] = (initial_target, interval, block_time)
+        self.interval = interval
+        self.block_time = block_time
+        self._targets: List[int] = [initial_target]
+        # Readers extend the cache concurrently
+        self._lock = threading.Lock()
+
+    def period(self, height: int) -> int:
+        if not self.interval:
+            return 0
+        return max(0, height - 1) // self.interval
+
+    def target_at(self, height: int, timestamp_at: Callable[[int], float]) -> int:
+        """
+        :param height: Height of the block (blocks below it must be known).
+        :param timestamp_at: Timestamp of the block at a given height.
+        """
+        period = self.period(height)
+        with self._lock:
+            targets = self._targets
+            interval = self.interval
+            while len(targets) <= period:
+                last = len(targets) - 1
+                start, end = max(last * interval, 1), (last + 1) * interval
+                if end == start:
+                    targets.append(targets[last])
+                    continue
+                timespan = timestamp_at(end) - timestamp_at(start)
+                targets.append(retarget(targets[last], timespan, (end - start) * self.block_time))
+            return targets[period]
+
+    def work(self, start: int, stop: int, timestamp_at: Callable[[int], float]) -> int:
+        """
+        Total expected work of the blocks at heights [start, stop), summed
+        period by period.
+        """
+        total = 0
+        height = max(start, 1)
+        while height < stop:
+            period_end = stop if not self.interval else min(stop, (self.period(height) + 1) * self.interval + 1)
+            total += (period_end - height) * target_work(self.target_at(height, timestamp_at))
+            height = period_end
+        return total
+
+    def truncate(self, height: int):
+        """
+        Forget period targets that depend on blocks above `height`.
+        """
+        if self.interval:
+            with self._lock:
+                del self._targets[height // self.interval + 1:]
+
+    def copy(self) -> "TargetSchedule":
+        schedule = TargetSchedule(*self.params)
+        with self._lock:
+            schedule._targets = list(self._targets)
+        return schedule
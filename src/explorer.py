@@ -0,0 +1,178 @@
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from src.block import Block
+from src.transaction import Transaction
+
+# A location packs (block height, position in block) into one int:
+# height << POSITION_BITS | position. Keeps per-entry memory to 8 bytes.
+POSITION_BITS = 20
+POSITION_MASK = (1 << POSITION_BITS) - 1
+
+
+class TransactionLocation(NamedTuple):
+    height: int
+    position: int
+    transaction: Transaction
+
+
+def pack_location(height: int, position: int) -> int:
+    if position > POSITION_MASK:
+        raise ValueError(f"Block position {position} exceeds the {POSITION_BITS}-bit location format.")
+    return (height << POSITION_BITS) | position
+
+
+def unpack_location(location: int) -> Tuple[int, int]:
+    return location >> POSITION_BITS, location & POSITION_MASK
+
+
+class TransactionHistory:
+    """
+    Address -> locations, tx id -> location and block hash -> height indexes
+    over mined blocks.
+
+    Each address maps to a compact array of packed locations in chain order,
+    so history queries never walk the chain.
+    """
+    def __init__(self):
+        self.by_address: Dict[str, array] = {}
+        self.by_tx: Dict[str, int] = {}
+        self.by_block: Dict[str, int] = {}
+
+    def _record(self, address: str, location: int):
+        locations = self.by_address.get(address)
+        if locations is None:
+            locations = self.by_address[address] = array("Q")
+        locations.append(location)
+
+    def add_block(self, block: Block, height: int):
+        """
+        Index a block appended at `height`.
+        """
+        self.by_block[block.hash] = height
+        for position, tx in enumerate(block.transactions):
+            location = pack_location(height, position)
+            self.by_tx[tx.id] = location
+            self._record(tx.sender, location)
+            # A self-transfer appears once in its address's history
+            if tx.recipient != tx.sender:
+                self._record(tx.recipient, location)
+
+    def remove_block(self, block: Block, height: int):
+        """
+        Un-index the block at `height`, which must be the highest indexed one.
+        """
+        self.by_block.pop(block.hash, None)
+        for tx in block.transactions:
+            self.by_tx.pop(tx.id, None)
+            for address in (tx.sender, tx.recipient):
+                locations = self.by_address.get(address)
+                # Entries are in chain order, so the block's own are at the end
+                while locations and locations[-1] >> POSITION_BITS == height:
+                    locations.pop()
+                if locations is not None and not locations:
+                    del self.by_address[address]
+
+
+class ChainExplorer:
+    """
+    Read-side query layer over a Blockchain: paginated block listings,
+    per-address history and transaction lookup by id.
+
+    The history index is kept current by Blockchain._update_balance_from_block;
+    on a chain restored from a snapshot it is built on first query with one
+    pass over the chain. Queries hold the chain's state lock for reading, so
+    they never see a reorganisation half-applied.
+    """
+    def __init__(self, blockchain):
+        self.blockchain = blockchain
+
+    @property
+    def history(self) -> TransactionHistory:
+        return self.blockchain.transaction_history()
+
+    def _locate(self, location: int) -> TransactionLocation:
+        height, position = unpack_location(location)
+        return TransactionLocation(height, position, self.blockchain.chain[height].transactions[position])
+
+    def iter_blocks(self, start: int = 0, stop: Optional[int] = None,
+                    newest_first: bool = False) -> Iterator[Tuple[int, Block]]:
+        """
+        Stream (height, block) pairs without materialising the chain.
+
+        :param start: First height (inclusive).
+        :param stop: Last height (exclusive); defaults to the chain length.
+        :param newest_first: Yield from the tip backwards.
+        """
+        blockchain = self.blockchain
+        with blockchain._state_lock.read():
+            length = len(blockchain.chain)
+        stop = length if stop is None else min(stop, length)
+        heights = range(stop - 1, start - 1, -1) if newest_first else range(start, stop)
+        for height in heights:
+            # Locked per block, not across the yield: the caller may take it too
+            with blockchain._state_lock.read():
+                if height >= len(blockchain.chain):
+                    return
+                block = blockchain.chain[height]
+            yield height, block
+
+    def blocks_page(self, page: int, page_size: int = 10, newest_first: bool = False) -> List[Tuple[int, Block]]:
+        """
+        One page of (height, block) pairs. Page numbers start at 0.
+        """
+        chain = self.blockchain.chain
+        with self.blockchain._state_lock.read():
+            length = len(chain)
+            if newest_first:
+                stop = length - page * page_size
+                heights = range(stop - 1, max(0, stop - page_size) - 1, -1)
+            else:
+                heights = range(page * page_size, min(length, (page + 1) * page_size))
+            return [(height, chain[height]) for height in heights]
+
+    def find_block(self, block_hash: str) -> Optional[Tuple[int, Block]]:
+        """
+        Find a block by hash.
+
+        :return: (height, block), or None if it is not on the chain.
+        """
+        history = self.history
+        with self.blockchain._state_lock.read():
+            height = history.by_block.get(block_hash)
+            return None if height is None else (height, self.blockchain.chain[height])
+
+    def address_history(self, address: str, offset: int = 0, limit: Optional[int] = None,
+                        newest_first: bool = True) -> List[TransactionLocation]:
+        """
+        Transactions sent or received by `address`, paginated.
+
+        :param offset: Number of matching transactions to skip.
+        :param limit: Maximum number to return (None = all remaining).
+        :param newest_first: Order from the most recent transaction.
+        """
+        history = self.history
+        with self.blockchain._state_lock.read():
+            locations = history.by_address.get(address)
+            if not locations:
+                return []
+            count = len(locations)
+            end = count if limit is None else min(count, offset + limit)
+            if newest_first:
+                picked = (locations[count - 1 - i] for i in range(offset, end))
+            else:
+                picked = (locations[i] for i in range(offset, end))
+            return [self._locate(location) for location in picked]
+
+    def address_transaction_count(self, address: str) -> int:
+        history = self.history
+        with self.blockchain._state_lock.read():
+            return len(history.by_address.get(address, ()))
+
+    def find_transaction(self, tx_id: str) -> Optional[TransactionLocation]:
+        """
+        Find a mined transaction by id.
+        """
+        history = self.history
+        with self.blockchain._state_lock.read():
+            location = history.by_tx.get(tx_id)
+            return None if location is None else self._locate(location)
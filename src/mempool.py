@@ -0,0 +1,209 @@
+import heapq
+import itertools
+from decimal import Decimal
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+from src.transaction import Transaction
+
+PRIORITY_FEE = "fee"
+PRIORITY_AGE = "age"
+PRIORITY_POLICIES = (PRIORITY_FEE, PRIORITY_AGE)
+
+
+class MempoolFullError(ValueError):
+    """
+    Raised when the pool is full and a transaction doesn't outrank anything in it.
+    """
+
+
+class Mempool:
+    """
+    Bounded pool of pending transactions with priority ordering and eviction.
+
+    Priority is either by fee (highest first, older first on ties) or by age
+    (oldest first). Two heaps with lazy deletion give O(log n) admission,
+    eviction of the lowest-priority entry and selection of the highest ones.
+
+    `outflows` tracks the total each sender has committed in the pool
+    (amount + fee), in the units of `cost_of` (the ledger's: ZAR or integer
+    cents). It is kept exactly in step with the pool: entries leave
+    it only when they are evicted or removed after being mined, so
+    transactions carried over to a later block keep their reservation.
+
+    `revision` goes up whenever the contents change, so a block template
+    can tell cheaply whether newer transactions have arrived since it was
+    built.
+    """
+    def __init__(self, max_size: int, policy: str = PRIORITY_FEE, exempt_senders: Sequence[str] = (),
+                 cost_of: Callable[[Transaction], Any] = attrgetter("cost")):
+        """
+        Create an empty pool.
+
+        :param max_size: Maximum number of pending transactions.
+        :param policy: PRIORITY_FEE or PRIORITY_AGE.
+        :param exempt_senders: Senders whose outflows are not tracked (system senders).
+        :param cost_of: What a transaction adds to its sender's outflow.
+        """
+        if policy not in PRIORITY_POLICIES:
+            raise ValueError(f"Unknown mempool priority policy: {policy}")
+        self.max_size = max_size
+        self.policy = policy
+        self.exempt_senders = exempt_senders
+        self.cost_of = cost_of
+        self.outflows: Dict[str, Decimal] = {}
+        # id -> (arrival sequence, transaction); dicts keep arrival order
+        self._entries: Dict[str, Tuple[int, Transaction]] = {}
+        # Min-heaps of flat (*priority key, id) tuples; stale ids are skipped on access
+        self._best: List[tuple] = []
+        self._worst: List[tuple] = []
+        self._sequence = itertools.count()
+        self.revision = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, tx_id: str) -> bool:
+        return tx_id in self._entries
+
+    def __iter__(self) -> Iterator[Transaction]:
+        """
+        Iterate pending transactions in arrival order.
+        """
+        for _, tx in self._entries.values():
+            yield tx
+
+    def _heap_items(self, tx: Transaction, seq: int) -> Tuple[tuple, tuple]:
+        """
+        Entries for the best-first and worst-first heaps.
+        """
+        if self.policy == PRIORITY_FEE:
+            fee = tx.fee
+            return (-fee if fee else fee, seq, tx.id), (fee, -seq, tx.id)
+        return (seq, tx.id), (-seq, tx.id)
+
+    def add(self, tx: Transaction) -> List[Transaction]:
+        """
+        Admit a transaction, evicting the lowest-priority entry if the pool is full.
+
+        The caller is responsible for checking the sender can afford it.
+
+        :return: Transactions evicted to make room (empty if none).
+        :raises MempoolFullError: If the pool is full and the transaction
+                                  ranks no higher than the worst entry.
+        :raises ValueError: If the transaction is already pending.
+        """
+        if tx.id in self._entries:
+            raise ValueError("Transaction is already pending.")
+
+        seq = next(self._sequence)
+        best_item, worst_item = self._heap_items(tx, seq)
+        evicted = []
+        if len(self._entries) >= self.max_size:
+            worst = self._peek_worst()
+            if worst is None or worst[:-1] >= worst_item[:-1]:
+                raise MempoolFullError("Mempool is full; transaction priority is too low.")
+            evicted.append(self._discard(worst[-1]))
+
+        self._entries[tx.id] = (seq, tx)
+        self.revision += 1
+        heapq.heappush(self._best, best_item)
+        heapq.heappush(self._worst, worst_item)
+        if tx.sender not in self.exempt_senders:
+            self.outflows[tx.sender] = self.outflows.get(tx.sender, 0) + self.cost_of(tx)
+        self._compact()
+        return evicted
+
+    def extend(self, transactions: List[Transaction]):
+        """
+        Admit a batch of already-validated transactions.
+
+        ⚡ Bolt Optimization: When the whole batch fits, entries are appended
+        and the heaps re-heapified once (O(n + m) rather than m pushes), and
+        outflows are merged once per sender. Otherwise falls back to add().
+
+        :return: Transactions evicted to make room (empty if none).
+        :raises ValueError: As add(); transactions before the failing one stay admitted.
+        """
+        if len(self._entries) + len(transactions) > self.max_size:
+            evicted = []
+            for tx in transactions:
+                evicted.extend(self.add(tx))
+            return evicted
+
+        entries = self._entries
+        exempt = self.exempt_senders
+        by_fee = self.policy == PRIORITY_FEE
+        cost_of = self.cost_of
+        batch_outflows: Dict[str, Decimal] = {}
+        best, worst = [], []
+        for tx in transactions:
+            tx_id = tx.id
+            if tx_id in entries:
+                raise ValueError("Transaction is already pending.")
+            seq = next(self._sequence)
+            entries[tx_id] = (seq, tx)
+            if by_fee:
+                fee = tx.fee
+                best.append((-fee if fee else fee, seq, tx_id))
+                worst.append((fee, -seq, tx_id))
+            else:
+                best.append((seq, tx_id))
+                worst.append((-seq, tx_id))
+            sender = tx.sender
+            if sender not in exempt:
+                batch_outflows[sender] = batch_outflows.get(sender, 0) + cost_of(tx)
+
+        self.revision += 1
+        self._best.extend(best)
+        self._worst.extend(worst)
+        heapq.heapify(self._best)
+        heapq.heapify(self._worst)
+        for sender, amount in batch_outflows.items():
+            self.outflows[sender] = self.outflows.get(sender, 0) + amount
+        return []
+
+    def _peek_worst(self):
+        while self._worst and self._worst[0][-1] not in self._entries:
+            heapq.heappop(self._worst)
+        return self._worst[0] if self._worst else None
+
+    def _discard(self, tx_id: str) -> Transaction:
+        _, tx = self._entries.pop(tx_id)
+        self.revision += 1
+        if tx.sender not in self.exempt_senders:
+            remaining = self.outflows[tx.sender] - self.cost_of(tx)
+            if remaining:
+                self.outflows[tx.sender] = remaining
+            else:
+                del self.outflows[tx.sender]
+        return tx
+
+    def _compact(self):
+        """
+        Rebuild the heaps once stale entries outnumber live ones.
+        """
+        if len(self._best) > 2 * len(self._entries) + 64:
+            live = self._entries
+            self._best = [item for item in self._best if item[-1] in live]
+            self._worst = [item for item in self._worst if item[-1] in live]
+            heapq.heapify(self._best)
+            heapq.heapify(self._worst)
+
+    def select(self, limit: int) -> List[Transaction]:
+        """
+        Pick up to `limit` highest-priority transactions for a block, without
+        removing them. Call remove() once the block is on the chain.
+        """
+        live = self._entries
+        chosen = heapq.nsmallest(limit, (item for item in self._best if item[-1] in live))
+        return [live[item[-1]][1] for item in chosen]
+
+    def remove(self, transactions: Iterable[Transaction]):
+        """
+        Drop transactions that have been mined, releasing their outflows.
+        Transactions no longer in the pool are ignored.
+        """
+        for tx in transactions:
+            if tx.id in self._entries:
+                self._discard(tx.id)
+        self._compact()
@@ -0,0 +1,121 @@
+import hashlib
+from typing import List, Tuple
+
+EMPTY_ROOT = bytes(32)
+
+# A proof is the list of sibling hashes from leaf to root. Each step holds the
+# sibling's hex digest and whether the sibling sits on the left.
+MerkleProof = List[Tuple[str, bool]]
+
+
+def _hash_pair(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(left + right).digest()
+
+
+class MerkleTree:
+    """
+    Binary Merkle tree over transaction ids.
+
+    Leaves are the raw 32-byte SHA-256 digests behind each hex id. When a level
+    has an odd number of nodes the last node is paired with itself, so a list
+    ending in a repeat of its odd tail has the same root (see `mutated`). All
+    levels are kept so proofs and single-leaf updates cost O(log n).
+    """
+    def __init__(self, tx_ids: List[str]):
+        """
+        Build the tree.
+
+        :param tx_ids: Hex transaction ids, in block order.
+        """
+        self.levels: List[List[bytes]] = [[bytes.fromhex(tx_id) for tx_id in tx_ids]]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            self.levels.append([
+                _hash_pair(level[i], level[i + 1] if i + 1 < len(level) else level[i])
+                for i in range(0, len(level), 2)
+            ])
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    @property
+    def root(self) -> bytes:
+        """
+        The 32-byte root (all zeros for an empty tree).
+        """
+        if not self.levels[0]:
+            return EMPTY_ROOT
+        return self.levels[-1][0]
+
+    @property
+    def mutated(self) -> bool:
+        """
+        Whether two nodes paired at some level are equal. Such a tree shares
+        its root with the shorter list that pairs that node with itself (e.g.
+        [a, b, c, c] and [a, b, c]), so blocks holding one are invalid.
+        """
+        return any(level[i] == level[i + 1] for level in self.levels for i in range(0, len(level) - 1, 2))
+
+    def leaf(self, index: int) -> str:
+        return self.levels[0][index].hex()
+
+    def update(self, index: int, tx_id: str):
+        """
+        Replace one leaf and rehash only the path up to the root.
+
+        :param index: Position of the transaction in the block.
+        :param tx_id: The new hex transaction id.
+        """
+        self.levels[0][index] = bytes.fromhex(tx_id)
+        for depth in range(1, len(self.levels)):
+            below = self.levels[depth - 1]
+            left = index - (index % 2)
+            right = left + 1 if left + 1 < len(below) else left
+            index //= 2
+            self.levels[depth][index] = _hash_pair(below[left], below[right])
+
+    def proof(self, index: int) -> MerkleProof:
+        """
+        Build an inclusion proof for the leaf at `index`.
+
+        :param index: Position of the transaction in the block.
+        :return: Sibling hashes from leaf to root, O(log n) entries.
+        :raises IndexError: If the index is out of range.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError("Merkle leaf index out of range.")
+
+        path = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling >= len(level):
+                sibling = index
+            path.append((level[sibling].hex(), sibling < index))
+            index //= 2
+        return path
+
+
+def merkle_root(tx_ids: List[str]) -> bytes:
+    """
+    Compute the Merkle root of a list of transaction ids.
+
+    :param tx_ids: Hex transaction ids, in block order.
+    :return: The 32-byte root (all zeros for an empty list).
+    """
+    return MerkleTree(tx_ids).root
+
+
+def verify_proof(tx_id: str, proof: MerkleProof, root: str) -> bool:
+    """
+    Check that `tx_id` is included under `root` without the rest of the block.
+
+    :param tx_id: Hex id of the transaction being proven.
+    :param proof: The proof returned by MerkleTree.proof.
+    :param root: Hex Merkle root taken from a trusted block header.
+    :return: True if the proof hashes up to the root.
+    """
+    node = bytes.fromhex(tx_id)
+    for sibling_hex, sibling_is_left in proof:
+        sibling = bytes.fromhex(sibling_hex)
+        node = _hash_pair(sibling, node) if sibling_is_left else _hash_pair(node, sibling)
+    return node.hex() == root
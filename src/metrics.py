@@ -0,0 +1,243 @@
+import bisect
+import cProfile
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from src.config import METRICS_ENABLED, METRICS_LATENCY_BUCKETS
+
+if TYPE_CHECKING:
+    import asyncio
+
+# Sorted (name, value) label pairs identifying one series of a metric
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    A monotonically increasing count, optionally split by labels.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield self.name, labels, value
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    """
+    A value that can go up and down (e.g. the latest hash rate).
+    """
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets, plus their sum and count.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = METRICS_LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        with self._lock:
+            counts, total, count = list(self._counts), self.sum, self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            yield f"{self.name}_bucket", (("le", _format_value(bound)),), cumulative
+        yield f"{self.name}_sum", (), total
+        yield f"{self.name}_count", (), count
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+
+class Registry:
+    """
+    The set of metrics a process exports.
+
+    Instrumented code checks `enabled` before measuring anything, so with
+    metrics off a hot path pays one attribute lookup per call.
+    """
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, factory: Callable, name: str, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory(name, *args)
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._register(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = METRICS_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, buckets)
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def reset(self):
+        """
+        Zero every metric (the metrics themselves stay registered).
+        """
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format.
+        """
+        lines: List[str] = []
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        for name, metric in metrics:
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        Write render() to a file, replacing it atomically (safe to scrape mid-write).
+        """
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            f.write(self.render())
+        os.replace(temporary, path)
+
+
+# The process-wide registry instrumented modules record into
+METRICS = Registry()
+
+
+def timed(histogram: Histogram, registry: Registry = METRICS):
+    """
+    Decorator: observe each call's duration in `histogram` while metrics are enabled.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+async def _handle_scrape(registry: Registry, reader: "asyncio.StreamReader", writer: "asyncio.StreamWriter"):
+    import asyncio
+    try:
+        # Any request gets the metrics; read up to the blank line ending its headers
+        while (await reader.readline()).strip():
+            pass
+        body = registry.render().encode()
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                     + f"Content-Length: {len(body)}\r\n".encode()
+                     + b"Connection: close\r\n\r\n" + body)
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_metrics(host: str, port: int, registry: Registry = METRICS) -> "asyncio.AbstractServer":
+    """
+    Serve render() over plain HTTP (e.g. http://host:port/metrics) for a Prometheus scraper.
+
+    :param port: Port to listen on (0 picks a free one; see server.sockets).
+    """
+    # Imported here rather than at module level: every entry point loads
+    # this module, and asyncio alone is a third of the CLI's start-up time
+    import asyncio
+    return await asyncio.start_server(functools.partial(_handle_scrape, registry), host, port)
+
+
+@contextmanager
+def profiling(path: Optional[str]):
+    """
+    Run the body under cProfile and dump the stats to `path` (read them with
+    `python -m pstats PATH`). Does nothing if `path` is None.
+
+    Only the calling thread is profiled; worker threads and processes are not.
+    """
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
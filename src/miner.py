@@ -0,0 +1,338 @@
+import argparse
+import json
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from src.block import Block, BlockTemplate, HASHES, MINE_SECONDS, JSON_BLOCK_VERSION, HEADER_BLOCK_VERSION
+from src.blockchain import Blockchain, StaleBlockError
+from src.config import MINING_UNIT_SIZE, MINING_REFRESH_INTERVAL, MINING_WORKERS, MINER_PORT, NODE_HOST
+from src.metrics import METRICS
+from src.mining import SearchPool, WorkUnit, parallel_search, resolve_workers, _search_range, _search_header_range
+
+# Worker function searching a work unit of each block version
+SEARCH_FUNCTIONS = {
+    JSON_BLOCK_VERSION: _search_range,
+    HEADER_BLOCK_VERSION: _search_header_range,
+}
+
+# Work units are newline-delimited JSON; prefixes of large JSON blocks need room
+MAX_UNIT_SIZE = 16 * 1024 * 1024
+
+
+def is_stale(blockchain: Blockchain, template: BlockTemplate, refresh_interval: float) -> bool:
+    """
+    Whether a template should be replaced: always once the tip has moved
+    (its block can no longer be committed), and once the pending pool has
+    changed if the template is at least `refresh_interval` seconds old.
+    """
+    if blockchain.get_latest_block().hash != template.block.previous_hash:
+        return True
+    return (blockchain.pool_revision != template.pool_revision
+            and time.monotonic() - template.created >= refresh_interval)
+
+
+def work_unit_to_json(unit: WorkUnit) -> Dict[str, Any]:
+    return {"template": unit.template_id, "version": unit.version, "prefix": unit.prefix.hex(),
+            "suffix": unit.suffix.hex(), "start": unit.start, "stop": unit.stop, "target": f"{unit.target:064x}"}
+
+
+def work_unit_from_json(data: Dict[str, Any]) -> WorkUnit:
+    """
+    :raises ValueError: If the work unit is malformed.
+    """
+    try:
+        unit = WorkUnit(str(data["template"]), int(data["version"]), bytes.fromhex(data["prefix"]),
+                        bytes.fromhex(data["suffix"]), int(data["start"]), int(data["stop"]),
+                        int(data["target"], 16))
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed work unit: {e}")
+    if unit.version not in SEARCH_FUNCTIONS:
+        raise ValueError(f"Unsupported block version: {unit.version}")
+    return unit
+
+
+class InProcessBackend:
+    """
+    Searches work units on the calling thread.
+    """
+    def search(self, unit: WorkUnit) -> Optional[int]:
+        """
+        :return: The lowest winning nonce in the unit, or None.
+        """
+        return SEARCH_FUNCTIONS[unit.version](unit.prefix, unit.suffix, unit.start, unit.stop, unit.target)
+
+    def close(self):
+        pass
+
+
+class ProcessPoolBackend:
+    """
+    Searches each work unit across a pool of processes kept for the
+    backend's lifetime (see parallel_search).
+    """
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 50000):
+        """
+        :param workers: Number of processes (0/None = all cores).
+        :param chunk_size: Most nonces per process task; a unit is cut into at
+                           least one task per process.
+        """
+        self.pool = SearchPool(workers)
+        self.chunk_size = chunk_size
+        # The pool serves one search at a time
+        self._lock = threading.Lock()
+
+    def search(self, unit: WorkUnit) -> Optional[int]:
+        # Spread every unit over all processes, however small it is
+        chunk_size = min(self.chunk_size, max(1, -(-(unit.stop - unit.start) // self.pool.workers)))
+        with self._lock:
+            return parallel_search(unit.prefix, unit.suffix, unit.target, unit.start, unit.stop,
+                                   chunk_size=chunk_size, search=SEARCH_FUNCTIONS[unit.version],
+                                   pool=self.pool)
+
+    def close(self):
+        self.pool.close()
+
+
+class SocketBackend:
+    """
+    Sends work units to a remote worker (see serve_worker) over TCP, one
+    newline-delimited JSON object each way: the unit, then {"nonce": n}
+    (null if the unit holds no winner).
+    """
+    def __init__(self, host: str, port: int = MINER_PORT, timeout: Optional[float] = None):
+        self.address = (host, port)
+        self.timeout = timeout
+        self._socket: Optional[socket.socket] = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._socket = socket.create_connection(self.address, self.timeout)
+        self._file = self._socket.makefile("rwb")
+
+    def search(self, unit: WorkUnit) -> Optional[int]:
+        """
+        :raises ConnectionError: If the worker is unreachable or hung up.
+        """
+        with self._lock:
+            if self._socket is None:
+                self._connect()
+            try:
+                self._file.write(json.dumps(work_unit_to_json(unit)).encode() + b"\n")
+                self._file.flush()
+                line = self._file.readline()
+            except OSError:
+                self._disconnect()
+                raise
+            if not line:
+                self._disconnect()
+                raise ConnectionError(f"Mining worker {self.address[0]}:{self.address[1]} closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise ValueError(f"Mining worker rejected the work unit: {response['error']}")
+        return response["nonce"]
+
+    def _disconnect(self):
+        if self._socket is not None:
+            self._file.close()
+            self._socket.close()
+            self._socket = self._file = None
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        backend = self.server.backend
+        while True:
+            line = self.rfile.readline(MAX_UNIT_SIZE)
+            if not line:
+                return
+            try:
+                response = {"nonce": backend.search(work_unit_from_json(json.loads(line)))}
+            except ValueError as e:
+                response = {"error": str(e)}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    """
+    Serves work units from SocketBackends with a local backend.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int], backend):
+        super().__init__(address, _WorkerHandler)
+        self.backend = backend
+
+
+def serve_worker(host: str = NODE_HOST, port: int = MINER_PORT, backend=None) -> WorkerServer:
+    """
+    Start a mining worker in a background thread.
+
+    :param port: TCP port (0 = pick a free one; see server_address).
+    :param backend: Backend doing the search (default: in-process).
+    :return: The running server; call shutdown() and server_close() to stop it.
+    """
+    server = WorkerServer((host, port), backend or InProcessBackend())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _MiningJob:
+    """
+    State shared by the backends mining one block: the current template,
+    the next work unit to hand out, and the outcome.
+    """
+    def __init__(self, blockchain: Blockchain, miner_address: str, unit_size: int, refresh_interval: float):
+        self.blockchain = blockchain
+        self.miner_address = miner_address
+        self.unit_size = unit_size
+        self.refresh_interval = refresh_interval
+        self.block: Optional[Block] = None
+        self.height = 0
+        self.errors: List[Exception] = []
+        self._lock = threading.Lock()
+        self._new_template()
+
+    def _new_template(self):
+        self.template = self.blockchain.create_template(self.miner_address)
+        self._units = self.template.work_units(self.unit_size)
+
+    def next_unit(self) -> Optional[Tuple[BlockTemplate, WorkUnit]]:
+        """
+        The next unit to search, from a fresh template if the current one
+        went stale, or None once the block has been mined.
+        """
+        with self._lock:
+            if self.block is not None:
+                return None
+            if is_stale(self.blockchain, self.template, self.refresh_interval):
+                self._new_template()
+            return self.template, next(self._units)
+
+    def submit(self, template: BlockTemplate, nonce: int):
+        # Solutions to superseded templates still count while they can be committed
+        try:
+            height, block = self.blockchain.submit_solution(template, nonce)
+        except StaleBlockError:
+            with self._lock:
+                if self.block is None and template is self.template:
+                    self._new_template()
+            return
+        with self._lock:
+            self.block = block
+            self.height = height
+
+    def run(self, backend):
+        try:
+            while True:
+                work = self.next_unit()
+                if work is None:
+                    return
+                template, unit = work
+                nonce = backend.search(unit)
+                if METRICS.enabled:
+                    HASHES.inc((unit.stop if nonce is None else nonce + 1) - unit.start)
+                if nonce is not None:
+                    self.submit(template, nonce)
+        except Exception as e:
+            # The other backends carry on; the units this one skipped are simply not searched
+            with self._lock:
+                self.errors.append(e)
+
+
+class Miner:
+    """
+    Mines blocks for a Blockchain by handing work units of block templates
+    to one or more backends (in-process, process pool, or remote workers),
+    each pulling units on its own thread.
+
+    The template is rebuilt when the tip moves and, every `refresh_interval`
+    seconds, when new transactions have arrived, so transfers submitted
+    while mining make it into the block being mined. A backend finishes the
+    unit it is searching before moving on, which bounds the time wasted on a
+    stale template to one unit.
+    """
+    def __init__(self, blockchain: Blockchain, backends: Sequence = (), unit_size: int = MINING_UNIT_SIZE,
+                 refresh_interval: float = MINING_REFRESH_INTERVAL):
+        """
+        :param blockchain: The chain to mine on.
+        :param backends: Backends to search with (default: one in-process backend).
+        :param unit_size: Nonces per work unit.
+        :param refresh_interval: Seconds before a template is rebuilt for new transactions.
+        """
+        self.blockchain = blockchain
+        self.backends = list(backends) or [InProcessBackend()]
+        self.unit_size = unit_size
+        self.refresh_interval = refresh_interval
+        # One block at a time: backends can only serve one job
+        self._lock = threading.Lock()
+
+    def mine(self, miner_address: str) -> Tuple[int, Block]:
+        """
+        Mine and commit a block rewarding `miner_address`.
+
+        :return: The committed block's height and the block.
+        :raises Exception: The first backend error, if every backend failed.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            job = _MiningJob(self.blockchain, miner_address, self.unit_size, self.refresh_interval)
+            if len(self.backends) == 1:
+                job.run(self.backends[0])
+            else:
+                threads = [threading.Thread(target=job.run, args=(backend,), daemon=True)
+                           for backend in self.backends]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            if job.block is None:
+                raise job.errors[0]
+            if METRICS.enabled:
+                MINE_SECONDS.observe(time.perf_counter() - start)
+            return job.height, job.block
+
+    def close(self):
+        for backend in self.backends:
+            backend.close()
+
+
+def default_backend(workers: Optional[int] = None):
+    """
+    In-process for one worker, otherwise a process pool.
+    """
+    if workers is None:
+        workers = MINING_WORKERS
+    return InProcessBackend() if resolve_workers(workers) == 1 else ProcessPoolBackend(workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a RandCoin mining worker for nodes started with --miner.")
+    parser.add_argument("--host", default=NODE_HOST)
+    parser.add_argument("--port", type=int, default=MINER_PORT, help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=MINING_WORKERS,
+                        help="processes to search with (1 = in-process, 0 = all cores)")
+    args = parser.parse_args()
+
+    backend = default_backend(args.workers)
+    server = WorkerServer((args.host, args.port), backend)
+    host, port = server.server_address[:2]
+    print(f"RandCoin mining worker listening on {host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import hashlib
+import multiprocessing
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, NamedTuple, Optional
+
+# Nonce encoding used by binary block headers: unsigned 64-bit little-endian
+NONCE_FORMAT = struct.Struct("<Q")
+
+# How often (in attempts) a worker checks whether another worker already won
+CANCEL_CHECK_INTERVAL = 4096
+
+# Shared value holding the lowest winning nonce found so far (-1 while searching).
+# Set in each worker process by _init_worker.
+_best_nonce = None
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """
+    Normalise a worker-count setting.
+
+    :param workers: Requested worker count. 0 or None means "use all CPU cores".
+    :return: A worker count of at least 1.
+    """
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+class WorkUnit(NamedTuple):
+    """
+    A range of nonces of one block template, handed to a mining backend
+    (see src/miner.py). A nonce wins if the SHA-256 of prefix, nonce and
+    suffix is at or below `target`.
+    """
+    template_id: str
+    # Block version: decides how the nonce is encoded (see Block.pow_input)
+    version: int
+    prefix: bytes
+    suffix: bytes
+    start: int
+    stop: int
+    target: int
+
+
+class SearchPool:
+    """
+    A process pool kept between parallel_search calls, so mining many blocks
+    (or work units) pays the process start-up only once. Serves one search
+    at a time.
+    """
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = resolve_workers(workers)
+        self.best_nonce = multiprocessing.Value('q', -1)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(self.best_nonce,))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def _init_worker(best_nonce):
+    global _best_nonce
+    _best_nonce = best_nonce
+
+
+def difficulty_to_target(difficulty: int) -> int:
+    """
+    Convert a leading-hex-zeros difficulty into a 256-bit target.
+
+    A digest has at least `difficulty` leading hex zeros exactly when it
+    compares <= this target.
+    """
+    return (1 << (4 * (64 - difficulty))) - 1
+
+
+def meets_target(block_hash: str, target: int) -> bool:
+    """
+    Check a hex block hash against a 256-bit target.
+    """
+    return int(block_hash, 16) <= target
+
+
+def target_work(target: int) -> int:
+    """
+    Expected number of hashes needed to mine one block at `target`;
+    fork choice sums this to compare competing chains.
+    """
+    return (1 << 256) // (target + 1)
+
+
+def _cancelled(nonce: int) -> bool:
+    winner = _best_nonce.value
+    return 0 <= winner < nonce
+
+
+def _record_winner(nonce: int):
+    with _best_nonce.get_lock():
+        if _best_nonce.value < 0 or nonce < _best_nonce.value:
+            _best_nonce.value = nonce
+
+
+def _search_range(prefix: bytes, suffix: bytes, start: int, stop: int, target: int) -> Optional[int]:
+    """
+    Search nonces in [start, stop) of a version 1 (JSON) block for a hash at
+    or below `target`. The nonce is hashed as decimal text between `prefix`
+    and `suffix`.
+
+    Runs inside a worker process. Gives up early once another worker has found
+    a winning nonce lower than the one currently being tried, because this
+    range can then no longer contain the lowest solution.
+
+    :return: The first winning nonce in the range, or None.
+    """
+    # Fixed-width lowercase hex compares in the same order as the numbers
+    target = f"{target:064x}"
+    sha256 = hashlib.sha256
+    shared = _best_nonce is not None
+
+    for nonce in range(start, stop):
+        if shared and (nonce - start) % CANCEL_CHECK_INTERVAL == 0 and _cancelled(nonce):
+            return None
+
+        if sha256(prefix + str(nonce).encode() + suffix).hexdigest() <= target:
+            if shared:
+                _record_winner(nonce)
+            return nonce
+    return None
+
+
+def _search_header_range(prefix: bytes, suffix: bytes, start: int, stop: int, target: int) -> Optional[int]:
+    """
+    Search nonces in [start, stop) of a binary (version 2+) block header.
+
+    `prefix` is every header field before the nonce; it is hashed once and each
+    attempt only feeds the 8 nonce bytes into a copy of that midstate, so the
+    cost per attempt does not depend on block size. `suffix` is unused because
+    the nonce is the last header field.
+
+    :return: The first winning nonce in the range, or None.
+    """
+    target = target.to_bytes(32, "big")
+    midstate = hashlib.sha256(prefix)
+    pack_nonce = NONCE_FORMAT.pack
+    shared = _best_nonce is not None
+
+    for nonce in range(start, stop):
+        if shared and (nonce - start) % CANCEL_CHECK_INTERVAL == 0 and _cancelled(nonce):
+            return None
+
+        attempt = midstate.copy()
+        attempt.update(pack_nonce(nonce))
+        if attempt.digest() <= target:
+            if shared:
+                _record_winner(nonce)
+            return nonce
+    return None
+
+
+def parallel_search(prefix: bytes, suffix: bytes, target: int, start: int = 0,
+                    stop: Optional[int] = None, workers: Optional[int] = None,
+                    chunk_size: int = 50000,
+                    search: Callable[..., Optional[int]] = _search_range,
+                    pool: Optional[SearchPool] = None) -> Optional[int]:
+    """
+    Search the nonce space across a process pool.
+
+    The space is cut into consecutive chunks handed out in order. When a chunk
+    reports a winner, chunks above it are cancelled and the search only waits
+    for chunks below it, so the returned nonce is always the lowest winner -
+    the same one a single-core sweep from `start` would find.
+
+    :param prefix: Bytes hashed before the nonce.
+    :param suffix: Bytes hashed after the nonce.
+    :param target: 256-bit target the hash must not exceed.
+    :param start: First nonce to try.
+    :param stop: Exclusive upper bound, or None to search until a winner is found.
+    :param workers: Number of worker processes (0/None = all cores).
+    :param chunk_size: Nonces per work unit.
+    :param search: Worker function for the block layout being mined
+                   (_search_range for JSON blocks, _search_header_range for
+                   binary headers).
+    :param pool: Pool to search with (`workers` is then ignored); by
+                 default one is started for this search and shut down after.
+    :return: The lowest winning nonce, or None if [start, stop) has no winner.
+    """
+    owned = pool is None
+    if owned:
+        pool = SearchPool(workers)
+    else:
+        pool.best_nonce.value = -1
+    workers = pool.workers
+    executor = pool.executor
+    pending = {}
+    next_start = start
+    found = None
+    try:
+        while True:
+            # Keep every worker busy with a small queue of upcoming chunks
+            while found is None and len(pending) < workers * 2 and (stop is None or next_start < stop):
+                chunk_stop = next_start + chunk_size
+                if stop is not None:
+                    chunk_stop = min(chunk_stop, stop)
+                future = executor.submit(search, prefix, suffix, next_start, chunk_stop, target)
+                pending[future] = next_start
+                next_start = chunk_stop
+
+            if not pending:
+                return found
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                nonce = future.result()
+                if nonce is not None and (found is None or nonce < found):
+                    found = nonce
+
+            if found is not None:
+                for future, chunk_start in list(pending.items()):
+                    if chunk_start > found:
+                        future.cancel()
+                        del pending[future]
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned:
+            pool.close()
+        else:
+            # Let stragglers finish before the pool's shared winner is reset
+            wait(pending)
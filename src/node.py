@@ -0,0 +1,565 @@
+import argparse
+import asyncio
+import inspect
+import itertools
+import json
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+from src.block import BlockTemplate
+from src.blockchain import Blockchain, StaleBlockError, MAX_MINE_ATTEMPTS
+from src.config import NODE_HOST, NODE_PORT, DATA_DIR, MINING_REFRESH_INTERVAL, MINER_PORT
+from src.miner import Miner, SocketBackend, default_backend, is_stale
+from src.metrics import METRICS, profiling, serve_metrics
+from src.sync import BLOCKS_PER_REQUEST, HEADERS_PER_REQUEST, ChainSync, SyncError, block_from_json, \
+    block_to_json, find_fork, header_to_json
+from src.transaction import Transaction
+
+JSONRPC_VERSION = "2.0"
+# Messages are newline-delimited JSON; large blocks need more than asyncio's 64 KiB default
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+# The chain rejected the call (invalid transaction, unknown block, ...)
+REJECTED = -32000
+
+# Block templates handed out by get_work that can still be submitted
+MAX_WORK_TEMPLATES = 16
+
+
+class RpcError(Exception):
+    """
+    A JSON-RPC error, raised by handlers and by NodeClient.call.
+    """
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _decimal(value: Any, name: str) -> Decimal:
+    """
+    Parse an amount sent over the wire. Strings are preferred (exact);
+    numbers are accepted via their shortest repr.
+    """
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise RpcError(INVALID_PARAMS, f"{name} must be a decimal string or number")
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise RpcError(INVALID_PARAMS, f"{name} is not a valid amount: {value!r}")
+
+
+class Node:
+    """
+    Asyncio service exposing a Blockchain over newline-delimited JSON-RPC 2.0
+    on a local TCP socket.
+
+    Handlers run on the event loop. Slow work runs in an executor so queries
+    and submissions keep being served: the proof-of-work search of mine()
+    (the block is prepared and committed on the loop, so transactions that
+    arrive meanwhile wait for the next block) and the application of blocks
+    downloaded from peers. Blockchain's own locking keeps the two consistent.
+    With a Miner, mine() hands the search to its backends instead, and
+    transactions that arrive meanwhile are picked up when its template is
+    refreshed. External miners can also fetch work with get_work() and
+    return it with submit_work().
+
+    Nodes also act as peers to each other: they serve headers and blocks,
+    relay newly accepted blocks to their peers, and sync from them (see
+    ChainSync) when a block arrives that doesn't extend their tip.
+    """
+    def __init__(self, blockchain: Blockchain, host: str = NODE_HOST, port: int = NODE_PORT,
+                 miner: Optional[Miner] = None):
+        """
+        :param blockchain: The chain to serve.
+        :param host: Interface to listen on.
+        :param port: TCP port (0 = pick a free one; see `address` after start()).
+        :param miner: Mines blocks for mine() (default: Block.mine on the executor).
+        """
+        self.blockchain = blockchain
+        self.miner = miner
+        # Template id -> template, oldest first
+        self._templates: "OrderedDict[str, BlockTemplate]" = OrderedDict()
+        self.host = host
+        self.port = port
+        self.address: Optional[Tuple[str, int]] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        # Only one block is mined at a time; later mine() calls queue up
+        self._mining = asyncio.Lock()
+        self.peers: Dict[Tuple[str, int], NodeClient] = {}
+        self._sync_task: Optional[asyncio.Task] = None
+        self._sync_again = False
+        self._background: set = set()
+        self.methods = {
+            "add_transaction": self.add_transaction,
+            "get_balance": self.get_balance,
+            "get_spendable_balance": self.get_spendable_balance,
+            "get_height": self.get_height,
+            "get_block": self.get_block,
+            "get_block_by_hash": self.get_block_by_hash,
+            "mine": self.mine,
+            "get_work": self.get_work,
+            "submit_work": self.submit_work,
+            "get_tip": self.get_tip,
+            "get_headers": self.get_headers,
+            "get_blocks": self.get_blocks,
+            "submit_block": self.submit_block,
+            "add_peer": self.add_peer,
+            "sync": self.sync,
+            "get_metrics": self.get_metrics,
+        }
+
+    async def start(self) -> Tuple[str, int]:
+        """
+        Start listening.
+
+        :return: The (host, port) actually bound.
+        """
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  limit=MAX_MESSAGE_SIZE)
+        self.address = self._server.sockets[0].getsockname()[:2]
+        return self.address
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+        for task in list(self._background):
+            task.cancel()
+        for client in self.peers.values():
+            await client.close()
+        self.peers.clear()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(self._encode(self._error(None, INVALID_REQUEST, "Message too large")))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = await self.handle_message(line)
+                if response is not None:
+                    writer.write(self._encode(response))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _encode(response: Dict[str, Any]) -> bytes:
+        return json.dumps(response, separators=(',', ':')).encode() + b"\n"
+
+    @staticmethod
+    def _error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+        return {"jsonrpc": JSONRPC_VERSION, "id": request_id, "error": {"code": code, "message": message}}
+
+    async def handle_message(self, line: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Handle one JSON-RPC request.
+
+        :return: The response, or None for a notification (no "id").
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return self._error(None, PARSE_ERROR, "Parse error")
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return self._error(None, INVALID_REQUEST, "Invalid request")
+
+        request_id = request.get("id")
+        try:
+            result = await self.dispatch(request["method"], request.get("params", []))
+        except RpcError as e:
+            response = self._error(request_id, e.code, e.message)
+        except ValueError as e:
+            response = self._error(request_id, REJECTED, str(e))
+        except Exception as e:
+            response = self._error(request_id, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+        else:
+            response = {"jsonrpc": JSONRPC_VERSION, "id": request_id, "result": result}
+        return response if "id" in request else None
+
+    async def dispatch(self, method_name: str, params: Any) -> Any:
+        method = self.methods.get(method_name)
+        if method is None:
+            raise RpcError(METHOD_NOT_FOUND, f"Method not found: {method_name}")
+        if isinstance(params, dict):
+            args, kwargs = (), params
+        elif isinstance(params, list):
+            args, kwargs = params, {}
+        else:
+            raise RpcError(INVALID_PARAMS, "params must be an array or object")
+        try:
+            inspect.signature(method).bind(*args, **kwargs)
+        except TypeError as e:
+            raise RpcError(INVALID_PARAMS, str(e))
+
+        result = method(*args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def add_transaction(self, sender: str, recipient: str, amount, fee="0",
+                              timestamp: Optional[float] = None, public_key: Optional[str] = None,
+                              signature: Optional[str] = None) -> str:
+        """
+        Submit a transaction to the pending pool.
+
+        A signed transaction carries the sender's hex public key and the hex
+        signature of its id; as the id covers the timestamp, the signer must
+        send the timestamp it signed with. It is validated off the event loop
+        (signature verification is slow), so other requests are served meanwhile.
+
+        :return: The transaction id.
+        """
+        if timestamp is not None and (isinstance(timestamp, bool) or not isinstance(timestamp, (int, float))):
+            raise RpcError(INVALID_PARAMS, "timestamp must be a number")
+        tx = Transaction(sender, recipient, _decimal(amount, "amount"), timestamp, fee=_decimal(fee, "fee"))
+        if signature is not None or public_key is not None:
+            try:
+                tx.attach_signature(bytes.fromhex(public_key), bytes.fromhex(signature))
+            except (TypeError, ValueError):
+                raise RpcError(INVALID_PARAMS, "public_key and signature must both be hex strings")
+        await asyncio.get_running_loop().run_in_executor(None, self.blockchain.add_transaction, tx)
+        return tx.id
+
+    def get_balance(self, address: str) -> str:
+        return str(self.blockchain.get_balance(address))
+
+    def get_spendable_balance(self, address: str) -> str:
+        return str(self.blockchain.get_spendable_balance(address))
+
+    def get_height(self) -> int:
+        return len(self.blockchain.chain) - 1
+
+    def get_block(self, height: int) -> Dict[str, Any]:
+        chain = self.blockchain.chain
+        if isinstance(height, bool) or not isinstance(height, int):
+            raise RpcError(INVALID_PARAMS, "height must be an integer")
+        if not 0 <= height < len(chain):
+            raise ValueError(f"No block at height {height}")
+        return block_to_json(chain[height], height)
+
+    def get_block_by_hash(self, block_hash: str) -> Dict[str, Any]:
+        found = self.blockchain.explorer.find_block(block_hash)
+        if found is None:
+            raise ValueError(f"Unknown block: {block_hash}")
+        height, block = found
+        return block_to_json(block, height)
+
+    async def mine(self, miner_address: str) -> Dict[str, Any]:
+        """
+        Mine the pending pool into a new block without blocking other requests.
+
+        :return: The new block.
+        """
+        loop = asyncio.get_running_loop()
+        blockchain = self.blockchain
+        async with self._mining:
+            if self.miner is not None:
+                height, block = await loop.run_in_executor(None, self.miner.mine, miner_address)
+                mined = block_to_json(block, height)
+                self._announce(mined)
+                return mined
+            for attempt in range(MAX_MINE_ATTEMPTS):
+                block = blockchain.prepare_block(miner_address)
+                await loop.run_in_executor(None, block.mine, blockchain.difficulty, blockchain.mining_workers,
+                                           blockchain.next_target())
+                try:
+                    height = blockchain.commit_block(block)
+                except StaleBlockError:
+                    # A transaction was evicted or a peer's block arrived while
+                    # mining; rebuild from the current tip and pool
+                    if attempt == MAX_MINE_ATTEMPTS - 1:
+                        raise
+                    continue
+                mined = block_to_json(block, height)
+                self._announce(mined)
+                return mined
+
+    def get_work(self, miner_address: str) -> Dict[str, Any]:
+        """
+        A block template for an external miner, reused while it is current.
+
+        :return: The template id, block version, the hex bytes hashed before
+                 and after the nonce, the hex target and the block's height.
+                 The nonce is 8 little-endian bytes for version 2 blocks and
+                 decimal text for version 1.
+        """
+        if not isinstance(miner_address, str):
+            raise RpcError(INVALID_PARAMS, "miner_address must be a string")
+        template = next((t for t in reversed(self._templates.values())
+                         if t.block.transactions[-1].recipient == miner_address), None)
+        if template is None or is_stale(self.blockchain, template, MINING_REFRESH_INTERVAL):
+            template = self.blockchain.create_template(miner_address)
+            self._templates[template.id] = template
+            while len(self._templates) > MAX_WORK_TEMPLATES:
+                self._templates.popitem(last=False)
+        return {"template": template.id, "version": template.block.version, "prefix": template.prefix.hex(),
+                "suffix": template.suffix.hex(), "target": f"{template.target:064x}", "height": template.height}
+
+    def submit_work(self, template_id: str, nonce: int) -> Dict[str, Any]:
+        """
+        Commit the block of a get_work() template with the nonce an external
+        miner found, and relay it.
+
+        :return: The new block.
+        """
+        if isinstance(nonce, bool) or not isinstance(nonce, int):
+            raise RpcError(INVALID_PARAMS, "nonce must be an integer")
+        template = self._templates.get(template_id)
+        if template is None:
+            raise ValueError(f"Unknown or expired template: {template_id}")
+        height, block = self.blockchain.submit_solution(template, nonce)
+        self._templates.clear()
+        mined = block_to_json(block, height)
+        self._announce(mined)
+        return mined
+
+    def get_metrics(self) -> str:
+        """
+        The process's metrics in the Prometheus text format (empty series
+        unless metrics are enabled).
+        """
+        return METRICS.render()
+
+    def get_tip(self) -> Dict[str, Any]:
+        """
+        Height, hash and cumulative work (a decimal string) of our best chain.
+        """
+        chain = self.blockchain.chain
+        height = len(chain) - 1
+        return {"height": height, "hash": chain[height].hash, "work": str(self.blockchain.chain_work())}
+
+    def get_headers(self, locator: List[str], limit: int = HEADERS_PER_REQUEST) -> List[Dict[str, Any]]:
+        """
+        Headers following the first locator hash that is on our chain.
+
+        :param locator: Block hashes, newest first (see src.sync.block_locator).
+        :param limit: Maximum headers to return (capped at HEADERS_PER_REQUEST).
+        """
+        if not isinstance(locator, list) or isinstance(limit, bool) or not isinstance(limit, int):
+            raise RpcError(INVALID_PARAMS, "locator must be a list and limit an integer")
+        start = find_fork(self.blockchain, locator) + 1
+        chain = self.blockchain.chain
+        stop = min(len(chain), start + max(0, min(limit, HEADERS_PER_REQUEST)))
+        return [header_to_json(chain[height], height) for height in range(start, stop)]
+
+    def get_blocks(self, hashes: List[str]) -> List[Dict[str, Any]]:
+        """
+        Full blocks by hash, in the order requested (at most BLOCKS_PER_REQUEST).
+        """
+        if not isinstance(hashes, list) or len(hashes) > BLOCKS_PER_REQUEST:
+            raise RpcError(INVALID_PARAMS, f"hashes must be a list of at most {BLOCKS_PER_REQUEST}")
+        blocks = []
+        for block_hash in hashes:
+            found = self.blockchain.explorer.find_block(block_hash)
+            if found is None:
+                raise ValueError(f"Unknown block: {block_hash}")
+            height, block = found
+            blocks.append(block_to_json(block, height))
+        return blocks
+
+    async def submit_block(self, block: Dict[str, Any]) -> str:
+        """
+        Receive a block announced by a peer. It is validated off the event loop.
+
+        :return: "known" if we already have it, "accepted" if it extended our
+                 tip (it is then relayed), or "syncing" if it doesn't connect
+                 to our tip and a sync with our peers was started.
+        """
+        if not isinstance(block, dict):
+            raise RpcError(INVALID_PARAMS, "block must be an object")
+        try:
+            received = block_from_json(block)
+        except (KeyError, TypeError) as e:
+            raise RpcError(INVALID_PARAMS, f"Malformed block: {e}")
+        if self.blockchain.explorer.find_block(received.hash) is not None:
+            return "known"
+        if received.previous_hash != self.blockchain.get_latest_block().hash:
+            self.request_sync()
+            return "syncing"
+        await asyncio.get_running_loop().run_in_executor(None, self.blockchain.add_blocks, [received])
+        self._announce(block)
+        return "accepted"
+
+    async def add_peer(self, host: str, port: int) -> int:
+        """
+        Connect to another node and catch up with it.
+
+        :return: Number of blocks obtained by the sync.
+        """
+        if (host, port) not in self.peers:
+            self.peers[(host, port)] = await NodeClient.connect(host, port)
+        return await self.sync()
+
+    async def sync(self) -> int:
+        """
+        Catch up with whichever peer has the most work.
+
+        :return: Number of blocks obtained from peers.
+        """
+        if not self.peers:
+            return 0
+        return await ChainSync(self.blockchain, list(self.peers.values())).sync()
+
+    def request_sync(self):
+        """
+        Sync in the background; requests made while one runs trigger another pass.
+        """
+        if self._sync_task is not None and not self._sync_task.done():
+            self._sync_again = True
+            return
+
+        async def run():
+            self._sync_again = True
+            while self._sync_again:
+                self._sync_again = False
+                try:
+                    await self.sync()
+                except (SyncError, ValueError, ConnectionError, RpcError):
+                    pass  # try again on the next announcement
+        self._sync_task = asyncio.create_task(run())
+
+    def _announce(self, block: Dict[str, Any]):
+        """
+        Relay a block we accepted to every peer, without waiting for them.
+        """
+        async def send(client: NodeClient):
+            try:
+                await client.call("submit_block", block)
+            except (RpcError, ConnectionError, OSError):
+                pass
+        for client in self.peers.values():
+            task = asyncio.create_task(send(client))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+
+class NodeClient:
+    """
+    Minimal asyncio JSON-RPC client for a Node.
+
+    Calls on one client are sent one at a time; open several clients for
+    concurrent requests.
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, host: str = NODE_HOST, port: int = NODE_PORT) -> "NodeClient":
+        reader, writer = await asyncio.open_connection(host, port, limit=MAX_MESSAGE_SIZE)
+        return cls(reader, writer)
+
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        """
+        Call a node method and return its result.
+
+        :raises RpcError: If the node returned an error.
+        """
+        request = {"jsonrpc": JSONRPC_VERSION, "id": next(self._ids), "method": method,
+                   "params": kwargs if kwargs else list(args)}
+        async with self._lock:
+            self._writer.write(json.dumps(request, separators=(',', ':')).encode() + b"\n")
+            await self._writer.drain()
+            line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Node closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise RpcError(response["error"]["code"], response["error"]["message"])
+        return response["result"]
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+async def run_node(blockchain: Blockchain, host: str, port: int, peers: List[Tuple[str, int]] = (),
+                   metrics_port: Optional[int] = None, miner: Optional[Miner] = None):
+    node = Node(blockchain, host, port, miner)
+    host, port = await node.start()
+    print(f"RandCoin node listening on {host}:{port}", flush=True)
+    if metrics_port is not None:
+        metrics_server = await serve_metrics(host, metrics_port)
+        print(f"Metrics at http://{host}:{metrics_server.sockets[0].getsockname()[1]}/metrics", flush=True)
+    for peer_host, peer_port in peers:
+        try:
+            await node.add_peer(peer_host, peer_port)
+        except (OSError, SyncError, RpcError) as e:
+            print(f"Could not sync with peer {peer_host}:{peer_port}: {e}", flush=True)
+    await node.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a RandCoin node with a local JSON-RPC API.")
+    parser.add_argument("--host", default=NODE_HOST)
+    parser.add_argument("--port", type=int, default=NODE_PORT, help="0 picks a free port")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="persistent chain directory (default: in memory)")
+    parser.add_argument("--difficulty", type=int, help="override MINING_DIFFICULTY")
+    parser.add_argument("--retarget-interval", type=int, help="override RETARGET_INTERVAL (0 = fixed difficulty)")
+    parser.add_argument("--block-time", type=float, help="override TARGET_BLOCK_TIME (seconds)")
+    parser.add_argument("--peer", action="append", default=[], metavar="HOST:PORT",
+                        help="node to connect to and sync from (repeatable)")
+    parser.add_argument("--miner", action="append", default=[], metavar="HOST[:PORT]",
+                        help=f"mining worker (python -m src.miner) to mine with (repeatable; default port {MINER_PORT})")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics over HTTP on this port")
+    parser.add_argument("--metrics-file", help="write Prometheus metrics to this file on exit")
+    parser.add_argument("--profile", metavar="PATH", help="record a cProfile of the node to PATH")
+    args = parser.parse_args()
+    peers = [(host, int(port)) for host, port in (peer.rsplit(":", 1) for peer in args.peer)]
+
+    blockchain = Blockchain(args.data_dir)
+    if args.difficulty is not None:
+        blockchain.difficulty = args.difficulty
+    if args.retarget_interval is not None:
+        blockchain.retarget_interval = args.retarget_interval
+    if args.block_time is not None:
+        blockchain.target_block_time = args.block_time
+    if args.metrics_port is not None or args.metrics_file:
+        METRICS.enabled = True
+    miner = None
+    if args.miner:
+        workers = [worker.rsplit(":", 1) if ":" in worker else (worker, MINER_PORT) for worker in args.miner]
+        miner = Miner(blockchain, [SocketBackend(host, int(port)) for host, port in workers])
+    elif blockchain.mining_workers != 1:
+        miner = Miner(blockchain, [default_backend(blockchain.mining_workers)])
+    try:
+        with profiling(args.profile):
+            asyncio.run(run_node(blockchain, args.host, args.port, peers, args.metrics_port, miner))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if miner is not None:
+            miner.close()
+        blockchain.close()
+        if args.metrics_file:
+            METRICS.write(args.metrics_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import hashlib
+import hmac
+import secrets
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+# Curve y^2 = x^3 + 7 over the field of P, with generator G of prime order N
+P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+G = (0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+     0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8)
+
+# Endomorphism: LAMBDA * (x, y) = (BETA * x, y), which splits one 256-bit scalar
+# multiplication into two 128-bit ones sharing their doublings (GLV)
+LAMBDA = 0x5363AD4CC05C30E0A5261C028812645A122E22EA20816678DF02967C1B23BD72
+BETA = 0x7AE96A2B657C07106E64479EAC3434E99CF0497512F58995C1396C28719501EE
+_A1 = 0x3086D221A7D46BCDE86C90E49284EB15
+_B1 = -0xE4437ED6010E88286F547FA90ABFE4C3
+_A2 = 0x114CA50F7A8E2F3F657C1108D9D44CFD8
+_B2 = _A1
+
+# Compressed SEC1 public key: parity prefix (0x02/0x03) + x
+PUBLIC_KEY_SIZE = 33
+# Signatures are r || s, 32 bytes each, with s normalised to the lower half of the order
+SIGNATURE_SIZE = 64
+
+# Multiplying an arbitrary point processes 4 bits per step
+WINDOW_BITS = 4
+WINDOW_SIZE = 1 << WINDOW_BITS
+# Multiplying G uses a table of 8-bit digits: 32 additions per product
+GENERATOR_WINDOW_BITS = 8
+# Decoded public keys kept with their precomputed multiples
+PUBLIC_KEY_CACHE_SIZE = 4096
+
+# Points are Jacobian (X, Y, Z) with affine x = X / Z^2, y = Y / Z^3; Z = 0 is infinity
+Affine = Tuple[int, int]
+Jacobian = Tuple[int, int, int]
+INFINITY: Jacobian = (0, 1, 0)
+
+# j * 256^i * G for every window i and digit j, in affine form; built on first use
+_generator_table: Optional[List[List[Affine]]] = None
+
+
+def _double(point: Jacobian) -> Jacobian:
+    x, y, z = point
+    if not z or not y:
+        return INFINITY
+    yy = y * y % P
+    s = 4 * x * yy % P
+    m = 3 * x * x % P
+    nx = (m * m - 2 * s) % P
+    return nx, (m * (s - nx) - 8 * yy * yy) % P, 2 * y * z % P
+
+
+def _add(p1: Jacobian, p2: Jacobian) -> Jacobian:
+    x1, y1, z1 = p1
+    x2, y2, z2 = p2
+    if not z1:
+        return p2
+    if not z2:
+        return p1
+    z1z1 = z1 * z1 % P
+    z2z2 = z2 * z2 % P
+    u1 = x1 * z2z2 % P
+    s1 = y1 * z2 * z2z2 % P
+    h = (x2 * z1z1 - u1) % P
+    r = (y2 * z1 * z1z1 - s1) % P
+    if not h:
+        return _double(p1) if not r else INFINITY
+    hh = h * h % P
+    hhh = h * hh % P
+    v = u1 * hh % P
+    nx = (r * r - hhh - 2 * v) % P
+    return nx, (r * (v - nx) - s1 * hhh) % P, z1 * z2 * h % P
+
+
+def _add_affine(p1: Jacobian, p2: Affine) -> Jacobian:
+    """
+    Add an affine point: cheaper than _add since its Z is 1.
+    """
+    x1, y1, z1 = p1
+    x2, y2 = p2
+    if not z1:
+        return x2, y2, 1
+    z1z1 = z1 * z1 % P
+    h = (x2 * z1z1 - x1) % P
+    r = (y2 * z1 * z1z1 - y1) % P
+    if not h:
+        return _double(p1) if not r else INFINITY
+    hh = h * h % P
+    hhh = h * hh % P
+    v = x1 * hh % P
+    nx = (r * r - hhh - 2 * v) % P
+    return nx, (r * (v - nx) - y1 * hhh) % P, z1 * h % P
+
+
+def _to_affine_batch(points: List[Jacobian]) -> List[Affine]:
+    """
+    Convert finite points to affine with a single modular inversion
+    (Montgomery's trick) instead of one per point.
+    """
+    prefix = [1]
+    for _, _, z in points:
+        prefix.append(prefix[-1] * z % P)
+    inverse = pow(prefix[-1], -1, P)
+    result: List[Affine] = [(0, 0)] * len(points)
+    for index in range(len(points) - 1, -1, -1):
+        x, y, z = points[index]
+        z_inverse = inverse * prefix[index] % P
+        inverse = inverse * z % P
+        zz = z_inverse * z_inverse % P
+        result[index] = (x * zz % P, y * zz * z_inverse % P)
+    return result
+
+
+def _multiples(point: Jacobian, count: int = WINDOW_SIZE - 1) -> List[Jacobian]:
+    """
+    1..count times `point`.
+    """
+    multiples = [point]
+    for _ in range(count - 1):
+        multiples.append(_add(multiples[-1], point))
+    return multiples
+
+
+def _table() -> List[List[Affine]]:
+    global _generator_table
+    if _generator_table is None:
+        table = []
+        digits = (1 << GENERATOR_WINDOW_BITS) - 1
+        base: Jacobian = (G[0], G[1], 1)
+        for _ in range(256 // GENERATOR_WINDOW_BITS):
+            table.append(_to_affine_batch(_multiples(base, digits)))
+            for _ in range(GENERATOR_WINDOW_BITS):
+                base = _double(base)
+        _generator_table = table
+    return _generator_table
+
+
+def _multiply_generator(k: int) -> Jacobian:
+    """
+    k * G with the precomputed table: one mixed addition per non-zero
+    8-bit digit and no doublings.
+    """
+    result = INFINITY
+    mask = (1 << GENERATOR_WINDOW_BITS) - 1
+    for window in _table():
+        digit = k & mask
+        if digit:
+            result = _add_affine(result, window[digit - 1])
+        k >>= GENERATOR_WINDOW_BITS
+    return result
+
+
+def _split_scalar(k: int) -> Tuple[int, int]:
+    """
+    Find k1, k2 of about 128 bits (either may be negative) with
+    k = k1 + k2 * LAMBDA (mod N).
+    """
+    c1 = (2 * _B2 * k + N) // (2 * N)
+    c2 = (-2 * _B1 * k + N) // (2 * N)
+    return k - c1 * _A1 - c2 * _A2, -c1 * _B1 - c2 * _B2
+
+
+def _point_multiples(point: Affine) -> Tuple[List[Affine], List[Affine]]:
+    """
+    1..15 times `point` and 1..15 times its endomorphism image, for _multiply.
+    """
+    x, y = point
+    both = _to_affine_batch(_multiples((x, y, 1)) + _multiples((BETA * x % P, y, 1)))
+    return both[:WINDOW_SIZE - 1], both[WINDOW_SIZE - 1:]
+
+
+def _multiply(multiples: Tuple[List[Affine], List[Affine]], k: int) -> Jacobian:
+    """
+    k * point for an arbitrary point, given its _point_multiples.
+
+    ⚡ Bolt Optimization: k is split with the curve endomorphism into two
+    half-length scalars, evaluated together by fixed 4-bit windows from the
+    top, so only ~128 doublings are needed instead of 256.
+    """
+    k1, k2 = _split_scalar(k % N)
+    multiples1, multiples2 = multiples
+    # A negative half scalar multiplies the negated point: flip y on use
+    negate1, negate2 = k1 < 0, k2 < 0
+    k1, k2 = abs(k1), abs(k2)
+
+    mask = WINDOW_SIZE - 1
+    top = max(k1.bit_length(), k2.bit_length(), 1)
+    result = INFINITY
+    for shift in range((top - 1) // WINDOW_BITS * WINDOW_BITS, -1, -WINDOW_BITS):
+        for _ in range(WINDOW_BITS):
+            result = _double(result)
+        digit = (k1 >> shift) & mask
+        if digit:
+            x, y = multiples1[digit - 1]
+            result = _add_affine(result, (x, P - y) if negate1 else (x, y))
+        digit = (k2 >> shift) & mask
+        if digit:
+            x, y = multiples2[digit - 1]
+            result = _add_affine(result, (x, P - y) if negate2 else (x, y))
+    return result
+
+
+def generate_private_key() -> int:
+    return secrets.randbelow(N - 1) + 1
+
+
+def public_key(private_key: int) -> bytes:
+    """
+    Compressed SEC1 encoding of private_key * G.
+    """
+    if not 1 <= private_key < N:
+        raise ValueError("Private key out of range.")
+    x, y = _to_affine_batch([_multiply_generator(private_key)])[0]
+    return bytes([2 + (y & 1)]) + x.to_bytes(32, "big")
+
+
+@lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def _verification_key(data: bytes) -> Optional[Tuple[List[Affine], List[Affine]]]:
+    point = decode_public_key(data)
+    return None if point is None else _point_multiples(point)
+
+
+def decode_public_key(data: bytes) -> Optional[Affine]:
+    """
+    :return: The curve point, or None if `data` is not a valid compressed key.
+    """
+    if len(data) != PUBLIC_KEY_SIZE or data[0] not in (2, 3):
+        return None
+    x = int.from_bytes(data[1:], "big")
+    if x >= P:
+        return None
+    y_squared = (pow(x, 3, P) + 7) % P
+    y = pow(y_squared, (P + 1) // 4, P)
+    if y * y % P != y_squared:
+        return None
+    if y & 1 != data[0] & 1:
+        y = P - y
+    return x, y
+
+
+def _nonces(private_key: int, digest: bytes) -> Iterator[int]:
+    """
+    Deterministic nonce candidates (RFC 6979, HMAC-SHA256): signing needs
+    no randomness and the same key and message always give the same signature.
+    """
+    key = private_key.to_bytes(32, "big")
+    message = (int.from_bytes(digest, "big") % N).to_bytes(32, "big")
+    k = b"\x00" * 32
+    v = b"\x01" * 32
+    k = hmac.new(k, v + b"\x00" + key + message, hashlib.sha256).digest()
+    v = hmac.new(k, v, hashlib.sha256).digest()
+    k = hmac.new(k, v + b"\x01" + key + message, hashlib.sha256).digest()
+    v = hmac.new(k, v, hashlib.sha256).digest()
+    while True:
+        v = hmac.new(k, v, hashlib.sha256).digest()
+        candidate = int.from_bytes(v, "big")
+        if 1 <= candidate < N:
+            yield candidate
+        k = hmac.new(k, v + b"\x00", hashlib.sha256).digest()
+        v = hmac.new(k, v, hashlib.sha256).digest()
+
+
+def sign(private_key: int, digest: bytes) -> bytes:
+    """
+    ECDSA-sign a 32-byte message digest.
+
+    :return: r || s (SIGNATURE_SIZE bytes), with low s.
+    """
+    if not 1 <= private_key < N:
+        raise ValueError("Private key out of range.")
+    z = int.from_bytes(digest, "big")
+    for k in _nonces(private_key, digest):
+        x, _ = _to_affine_batch([_multiply_generator(k)])[0]
+        r = x % N
+        if not r:
+            continue
+        s = pow(k, -1, N) * (z + r * private_key) % N
+        if not s:
+            continue
+        # Only the low half is accepted by verify, so each signature has one encoding
+        if s > N // 2:
+            s = N - s
+        return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+
+def verify(public_key_data: bytes, digest: bytes, signature: bytes) -> bool:
+    """
+    Check an ECDSA signature over a 32-byte digest. Malformed keys and
+    signatures (including high-s ones) are simply invalid.
+    """
+    if len(signature) != SIGNATURE_SIZE:
+        return False
+    multiples = _verification_key(bytes(public_key_data))
+    if multiples is None:
+        return False
+    r = int.from_bytes(signature[:32], "big")
+    s = int.from_bytes(signature[32:], "big")
+    if not (1 <= r < N and 1 <= s <= N // 2):
+        return False
+
+    w = pow(s, -1, N)
+    z = int.from_bytes(digest, "big")
+    x, _, z_coordinate = _add(_multiply_generator(z * w % N), _multiply(multiples, r * w % N))
+    if not z_coordinate:
+        return False
+    # Compare x / Z^2 with r (or r + N, which x mod N can also come from) without inverting Z
+    zz = z_coordinate * z_coordinate % P
+    return (r * zz - x) % P == 0 or (r + N < P and ((r + N) * zz - x) % P == 0)
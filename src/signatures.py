@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+from src import secp256k1
+from src.config import SIGNATURE_CACHE_SIZE, SIGNATURE_CHUNK_SIZE, SIGNATURE_WORKERS
+from src.mining import resolve_workers
+from src.transaction import Transaction
+from src.wallet import address_from_public_key
+
+# What a worker needs to check one signature: sender, tx id, public key, signature
+SignatureItem = Tuple[str, str, bytes, bytes]
+
+
+def check_signature(sender: str, tx_id: str, public_key: bytes, signature: bytes) -> bool:
+    """
+    True if `public_key` owns `sender` and `signature` signs `tx_id` with it.
+    """
+    return (address_from_public_key(public_key) == sender
+            and secp256k1.verify(public_key, bytes.fromhex(tx_id), signature))
+
+
+def _check_chunk(items: List[SignatureItem]) -> List[bool]:
+    """
+    Worker task: check a run of signatures.
+    """
+    return [check_signature(*item) for item in items]
+
+
+class SignatureVerifier:
+    """
+    Checks transaction signatures and remembers the ones that passed.
+
+    Results are cached by transaction id (together with the exact public key
+    and signature checked), so a transaction verified on admission to the mempool is not
+    verified again when it arrives in a block. Large batches are spread over
+    a process pool, created on first use and kept for later batches.
+    Safe to use from several threads.
+    """
+    def __init__(self, workers: Optional[int] = SIGNATURE_WORKERS, cache_size: int = SIGNATURE_CACHE_SIZE,
+                 chunk_size: int = SIGNATURE_CHUNK_SIZE):
+        """
+        :param workers: Processes for large batches (1 = sequential, 0 = all cores).
+        :param cache_size: Number of verified signatures to remember.
+        :param chunk_size: Signatures per worker task; smaller batches are checked in-process.
+        """
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._cache_size = cache_size
+        # tx id -> the (public key, signature) verified for it
+        self._verified: "OrderedDict[str, Tuple[bytes, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def is_cached(self, tx: Transaction) -> bool:
+        with self._lock:
+            return tx.signature is not None and self._verified.get(tx.id) == (tx.public_key, tx.signature)
+
+    def verify(self, tx: Transaction) -> bool:
+        """
+        Check one transaction's signature (False if it is unsigned).
+        """
+        return self.verify_many([tx])[0]
+
+    def verify_many(self, transactions: Sequence[Transaction]) -> List[bool]:
+        """
+        Check a batch of signatures; unsigned transactions fail.
+
+        :return: One result per transaction, in order.
+        """
+        results = [False] * len(transactions)
+        pending: List[int] = []
+        with self._lock:
+            for index, tx in enumerate(transactions):
+                if tx.signature is None:
+                    continue
+                if self._verified.get(tx.id) == (tx.public_key, tx.signature):
+                    self._verified.move_to_end(tx.id)
+                    results[index] = True
+                else:
+                    pending.append(index)
+        if not pending:
+            return results
+
+        items = [(tx.sender, tx.id, tx.public_key, tx.signature) for tx in (transactions[i] for i in pending)]
+        for index, valid in zip(pending, self._check(items)):
+            results[index] = valid
+        with self._lock:
+            for index in pending:
+                if results[index]:
+                    tx = transactions[index]
+                    self._verified[tx.id] = (tx.public_key, tx.signature)
+            while len(self._verified) > self._cache_size:
+                self._verified.popitem(last=False)
+        return results
+
+    def _check(self, items: List[SignatureItem]) -> List[bool]:
+        workers = resolve_workers(self.workers)
+        if workers == 1 or len(items) < 2 * self.chunk_size:
+            return _check_chunk(items)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=workers)
+            pool = self._pool
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        return [valid for chunk in pool.map(_check_chunk, chunks) for valid in chunk]
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
@@ -0,0 +1,126 @@
+import os
+import re
+import struct
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional
+from src.storage import BlockStore
+
+SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_MAGIC = b"RCSNAP"
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_NAME = re.compile(r"^snapshot-(\d{12})\.bin$")
+
+# magic | format version (u16) | height (u64) | block hash (32) | entry count (u32)
+SNAPSHOT_HEADER = struct.Struct("<6sHQ32sI")
+# Each entry: u16 length-prefixed UTF-8 address, then u16 length-prefixed decimal amount
+FIELD_LENGTH = struct.Struct("<H")
+
+
+class Snapshot(NamedTuple):
+    """
+    Account balances as of a specific block.
+    """
+    height: int
+    block_hash: str
+    balances: Dict[str, Decimal]
+
+
+def snapshot_path(data_dir: str, height: int) -> str:
+    return os.path.join(data_dir, SNAPSHOT_DIR, f"snapshot-{height:012d}.bin")
+
+
+def list_snapshots(data_dir: str) -> List[int]:
+    """
+    Heights of the snapshots stored under `data_dir`, newest first.
+    """
+    directory = os.path.join(data_dir, SNAPSHOT_DIR)
+    if not os.path.isdir(directory):
+        return []
+    heights = [int(m.group(1)) for m in map(SNAPSHOT_NAME.match, os.listdir(directory)) if m]
+    return sorted(heights, reverse=True)
+
+
+def write_snapshot(path: str, snapshot: Snapshot):
+    """
+    Write a snapshot atomically (write to a temp file, then rename).
+
+    Amounts are stored as decimal strings so balances round-trip exactly.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, snapshot.height,
+                                  bytes.fromhex(snapshot.block_hash), len(snapshot.balances))]
+    for address, amount in snapshot.balances.items():
+        for field in (address.encode(), str(amount).encode()):
+            parts.append(FIELD_LENGTH.pack(len(field)))
+            parts.append(field)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(parts))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str) -> Snapshot:
+    """
+    Load a snapshot file.
+
+    :raises ValueError: If the file is not a valid snapshot.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        magic, version, height, block_hash, count = SNAPSHOT_HEADER.unpack_from(data, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Not a supported snapshot file: {path}")
+
+        offset = SNAPSHOT_HEADER.size
+        balances: Dict[str, Decimal] = {}
+        for _ in range(count):
+            fields = []
+            for _ in range(2):
+                (length,) = FIELD_LENGTH.unpack_from(data, offset)
+                offset += FIELD_LENGTH.size
+                fields.append(data[offset:offset + length].decode())
+                offset += length
+            balances[fields[0]] = Decimal(fields[1])
+    except struct.error as e:
+        raise ValueError(f"Truncated snapshot file: {path}") from e
+    return Snapshot(height, block_hash.hex(), balances)
+
+
+def prune_snapshots(data_dir: str, keep: int):
+    """
+    Delete all but the `keep` most recent snapshots.
+    """
+    for height in list_snapshots(data_dir)[keep:]:
+        os.remove(snapshot_path(data_dir, height))
+
+
+def discard_snapshots_above(data_dir: str, height: int):
+    """
+    Delete snapshots taken above `height`, e.g. of blocks orphaned by a reorg.
+    """
+    for snapshot_height in list_snapshots(data_dir):
+        if snapshot_height > height:
+            os.remove(snapshot_path(data_dir, snapshot_height))
+
+
+def find_snapshot(data_dir: str, chain: BlockStore) -> Optional[Snapshot]:
+    """
+    Find the newest readable snapshot that matches a block in `chain`.
+
+    A snapshot is only usable if the block hash it was taken at is still the
+    block at that height, so snapshots orphaned by a reorg are skipped.
+    """
+    for height in list_snapshots(data_dir):
+        if height >= len(chain):
+            continue
+        try:
+            snapshot = read_snapshot(snapshot_path(data_dir, height))
+        except ValueError:
+            continue
+        if chain.get_hash(height) == snapshot.block_hash:
+            return snapshot
+    return None
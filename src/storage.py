@@ -0,0 +1,308 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+from src.block import Block
+from src.codec import decode_block, encode_block
+from src.config import BLOCK_CACHE_SIZE
+from src.transaction import Transaction, ZERO
+
+BLOCKS_FILE = "blocks.dat"
+INDEX_FILE = "blocks.idx"
+
+# Data file records: u32 payload length followed by the payload.
+RECORD_HEADER = struct.Struct("<I")
+# Index entries, one per height: data file offset (u64), record length (u32), block hash (32 bytes).
+INDEX_ENTRY = struct.Struct("<QI32s")
+
+
+def _encode_json_block(block: Block) -> bytes:
+    # Amounts are stored as decimal strings so they round-trip exactly. The fee
+    # is only written for fee-paying or signed transactions; signed ones then
+    # add the hex public key and signature.
+    record = {
+        "version": block.version,
+        "previous_hash": block.previous_hash,
+        "timestamp": block.timestamp,
+        "nonce": block.nonce,
+        "hash": block.hash,
+        "transactions": [
+            _json_transaction(t) for t in block.transactions
+        ]
+    }
+    return json.dumps(record, separators=(',', ':')).encode()
+
+
+def _json_transaction(t: Transaction) -> list:
+    if t.signature is not None:
+        return [t.sender, t.recipient, str(t.amount), t.timestamp, str(t.fee), t.public_key.hex(), t.signature.hex()]
+    if t.fee:
+        return [t.sender, t.recipient, str(t.amount), t.timestamp, str(t.fee)]
+    return [t.sender, t.recipient, str(t.amount), t.timestamp]
+
+
+def _decode_json_transaction(fields: list) -> Transaction:
+    tx = Transaction(fields[0], fields[1], Decimal(fields[2]), fields[3],
+                     Decimal(fields[4]) if len(fields) > 4 else ZERO)
+    if len(fields) > 5:
+        tx.attach_signature(bytes.fromhex(fields[5]), bytes.fromhex(fields[6]))
+    return tx
+
+
+def _decode_json_block(payload: bytes) -> Block:
+    record = json.loads(payload)
+    transactions = [_decode_json_transaction(fields) for fields in record["transactions"]]
+    return Block.restore(transactions, record["previous_hash"], record["timestamp"],
+                         record["nonce"], record["hash"], record["version"])
+
+
+def encode_record(block: Block) -> bytes:
+    """
+    Serialise a block for storage.
+
+    Blocks are stored in the binary codec format. A block with an amount
+    that is not a whole number of cents can't be, so it falls back to the
+    older JSON record, which keeps decimal strings exact.
+    """
+    try:
+        return encode_block(block)
+    except ValueError:
+        return _encode_json_block(block)
+
+
+def decode_record(payload: bytes, verify: bool = True) -> Block:
+    """
+    Rebuild a stored block without re-hashing it. Transaction ids are
+    recomputed, so tampering with stored transactions is still caught by
+    chain verification.
+
+    :param verify: Recompute binary records' transaction ids; pass False
+                   only for data that is trusted as a whole (JSON records
+                   are always recomputed).
+    """
+    # JSON records (written by older versions) are objects; binary ones start with the codec version
+    if payload[:1] == b"{":
+        return _decode_json_block(payload)
+    return decode_block(payload, 0, verify)[0]
+
+
+class BlockStore:
+    """
+    Append-only on-disk block storage.
+
+    Blocks are appended to a data file and located through a fixed-width index
+    file that is memory-mapped, so finding a block by height is a single O(1)
+    slice. Blocks are decoded lazily on access and kept in a small LRU cache.
+
+    Supports the read-only list operations Blockchain uses on `chain`
+    (len, indexing, slicing, iteration) plus append. Safe to use from
+    several threads: file access and the cache are serialised internally.
+    """
+    def __init__(self, data_dir: str, cache_size: int = BLOCK_CACHE_SIZE):
+        """
+        Open (or create) a block store.
+
+        :param data_dir: Directory holding the data and index files.
+        :param cache_size: Number of decoded blocks to keep in memory.
+        """
+        os.makedirs(data_dir, exist_ok=True)
+        self.data_dir = data_dir
+        self._data = open(os.path.join(data_dir, BLOCKS_FILE), "a+b")
+        self._index = open(os.path.join(data_dir, INDEX_FILE), "a+b")
+        self._map: Optional[mmap.mmap] = None
+        self._cache: "OrderedDict[int, Block]" = OrderedDict()
+        self._cache_size = cache_size
+        self._heights_by_hash: Optional[Dict[str, int]] = None
+        # Guards the shared file position, the index mapping and the cache
+        self._lock = threading.RLock()
+        self._recover()
+
+    def _recover(self):
+        """
+        Drop a torn write left by a crash mid-append.
+
+        The index is only written after its block, so any partial index entry
+        and any data past the last indexed record are discarded.
+        """
+        index_size = os.fstat(self._index.fileno()).st_size
+        whole = index_size - index_size % INDEX_ENTRY.size
+        if whole != index_size:
+            self._index.truncate(whole)
+        self._length = whole // INDEX_ENTRY.size
+
+        data_end = 0
+        if self._length:
+            offset, length, _ = self._entry(self._length - 1)
+            data_end = offset + RECORD_HEADER.size + length
+        if os.fstat(self._data.fileno()).st_size != data_end:
+            self._data.truncate(data_end)
+
+    def _mapped_index(self) -> mmap.mmap:
+        if self._map is None:
+            self._map = mmap.mmap(self._index.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _entry(self, height: int):
+        with self._lock:
+            return INDEX_ENTRY.unpack_from(self._mapped_index(), height * INDEX_ENTRY.size)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Block, List[Block]]:
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(self._length))]
+        height = key + self._length if key < 0 else key
+        if not 0 <= height < self._length:
+            raise IndexError("block height out of range")
+        return self.get(height)
+
+    def __iter__(self) -> Iterator[Block]:
+        for height in range(self._length):
+            yield self.get(height)
+
+    def get(self, height: int) -> Block:
+        """
+        Load the block at `height`, from cache if possible.
+        """
+        with self._lock:
+            block = self._cache.get(height)
+            if block is not None:
+                self._cache.move_to_end(height)
+                return block
+
+            payload = self.get_record(height)
+        # Decode outside the lock so concurrent readers only serialise on I/O
+        block = decode_record(payload)
+        with self._lock:
+            self._remember(height, block)
+        return block
+
+    def get_record(self, height: int) -> bytes:
+        """
+        The encoded block at `height`, as stored (see encode_record), without decoding it.
+        """
+        with self._lock:
+            offset, length, _ = self._entry(height)
+            self._data.seek(offset + RECORD_HEADER.size)
+            return self._data.read(length)
+
+    def get_hash(self, height: int) -> str:
+        """
+        Read a block hash straight from the index without loading the block.
+        """
+        return self._entry(height)[2].hex()
+
+    def height_of(self, block_hash: str) -> Optional[int]:
+        """
+        Find the height of a block by hash.
+
+        The hash -> height map is built from the index on first use and kept
+        current on append, so later lookups are O(1).
+        """
+        with self._lock:
+            if self._heights_by_hash is None:
+                self._heights_by_hash = {self.get_hash(h): h for h in range(self._length)}
+            return self._heights_by_hash.get(block_hash)
+
+    def get_by_hash(self, block_hash: str) -> Optional[Block]:
+        height = self.height_of(block_hash)
+        return None if height is None else self.get(height)
+
+    def index(self, block: Block) -> int:
+        """
+        Position of a block in the chain (list.index compatible, but O(1)).
+        """
+        height = self.height_of(block.hash)
+        if height is None:
+            raise ValueError("block is not in the store")
+        return height
+
+    def append(self, block: Block):
+        """
+        Append a block to the end of the store.
+
+        Both files are flushed to the OS but not fsynced, so a power loss can
+        lose the latest blocks; a torn write is dropped on the next open.
+        """
+        self.extend([block])
+
+    def extend(self, blocks: Sequence[Block]):
+        """
+        Append several blocks in order, with a single write and flush of
+        each file for the whole batch (as used by bulk imports).
+        """
+        payloads = [encode_record(block) for block in blocks]
+        with self._lock:
+            self._data.seek(0, os.SEEK_END)
+            offset = self._data.tell()
+            records = []
+            entries = []
+            for block, payload in zip(blocks, payloads):
+                records.append(RECORD_HEADER.pack(len(payload)))
+                records.append(payload)
+                entries.append(INDEX_ENTRY.pack(offset, len(payload), bytes.fromhex(block.hash)))
+                offset += RECORD_HEADER.size + len(payload)
+            self._data.write(b"".join(records))
+            self._data.flush()
+
+            self._index.seek(0, os.SEEK_END)
+            self._index.write(b"".join(entries))
+            self._index.flush()
+
+            # The mapping cannot grow in place; remap on next read
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+            for block in blocks:
+                height = self._length
+                self._length += 1
+                self._remember(height, block)
+                if self._heights_by_hash is not None:
+                    self._heights_by_hash[block.hash] = height
+
+    def truncate(self, height: int):
+        """
+        Drop every block from `height` upwards (used to roll back a reorg).
+
+        The index is cut first, so a crash part-way leaves data past the last
+        indexed record, which _recover discards on the next open.
+        """
+        with self._lock:
+            if height >= self._length:
+                return
+            offset, _, _ = self._entry(height)
+            dropped = [self.get_hash(h) for h in range(height, self._length)] \
+                if self._heights_by_hash is not None else []
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+            self._index.truncate(height * INDEX_ENTRY.size)
+            self._index.flush()
+            self._data.truncate(offset)
+            self._data.flush()
+
+            self._length = height
+            for cached in [h for h in self._cache if h >= height]:
+                del self._cache[cached]
+            for block_hash in dropped:
+                del self._heights_by_hash[block_hash]
+
+    def _remember(self, height: int, block: Block):
+        self._cache[height] = block
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._data.close()
+            self._index.close()
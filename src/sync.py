@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+from decimal import Decimal
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from src.block import Block, HEADER_BLOCK_VERSION, HEADER_PREFIX_FORMAT
+from src.mining import NONCE_FORMAT, meets_target, target_work
+from src.transaction import Transaction
+
+# Headers returned per get_headers request
+HEADERS_PER_REQUEST = 2000
+# Blocks requested per get_blocks call; also the unit of work handed to each peer
+BLOCKS_PER_REQUEST = 250
+# Locator entries before the step between heights starts doubling
+LOCATOR_DENSE_ENTRIES = 10
+
+
+class SyncError(ValueError):
+    """
+    Raised when peers cannot supply a valid chain with more work.
+    """
+
+
+class BlockHeader(NamedTuple):
+    """
+    The hashed fields of a block, exchanged before the block bodies.
+    """
+    height: int
+    hash: str
+    previous_hash: str
+    merkle_root: str
+    timestamp: float
+    nonce: int
+    version: int
+
+    def calculate_hash(self) -> Optional[str]:
+        """
+        Recompute the block hash from the header alone. Only binary-header
+        (version 2) blocks can be checked this way; JSON-hashed blocks need
+        their transactions, so None is returned for them.
+        """
+        if self.version != HEADER_BLOCK_VERSION:
+            return None
+        prefix = HEADER_PREFIX_FORMAT.pack(self.version, bytes.fromhex(self.previous_hash.zfill(64)),
+                                           bytes.fromhex(self.merkle_root), self.timestamp)
+        return hashlib.sha256(prefix + NONCE_FORMAT.pack(self.nonce)).hexdigest()
+
+
+def transaction_to_json(tx: Transaction) -> Dict[str, Any]:
+    data = {
+        "id": tx.id,
+        "sender": tx.sender,
+        "recipient": tx.recipient,
+        "amount": str(tx.amount),
+        "fee": str(tx.fee),
+        "timestamp": tx.timestamp,
+    }
+    if tx.signature is not None:
+        data["public_key"] = tx.public_key.hex()
+        data["signature"] = tx.signature.hex()
+    return data
+
+
+def transaction_from_json(data: Dict[str, Any]) -> Transaction:
+    """
+    :raises ValueError: If the fields are invalid or don't hash to the given id.
+    """
+    tx = Transaction(data["sender"], data["recipient"], Decimal(data["amount"]), data["timestamp"],
+                     fee=Decimal(data["fee"]))
+    if tx.id != data["id"]:
+        raise ValueError(f"Transaction {data['id']} does not match its contents.")
+    if data.get("signature") is not None:
+        tx.attach_signature(bytes.fromhex(data["public_key"]), bytes.fromhex(data["signature"]))
+    return tx
+
+
+def block_to_json(block: Block, height: int) -> Dict[str, Any]:
+    return {
+        "height": height,
+        "hash": block.hash,
+        "previous_hash": block.previous_hash,
+        "timestamp": block.timestamp,
+        "nonce": block.nonce,
+        "version": block.version,
+        "transactions": [transaction_to_json(tx) for tx in block.transactions],
+    }
+
+
+def block_from_json(data: Dict[str, Any]) -> Block:
+    """
+    Rebuild a block sent by a peer. Its hash is taken as given; validation
+    recomputes it before the block is accepted.
+    """
+    transactions = [transaction_from_json(tx) for tx in data["transactions"]]
+    return Block.restore(transactions, data["previous_hash"], data["timestamp"], data["nonce"],
+                         data["hash"], data["version"])
+
+
+def header_to_json(block: Block, height: int) -> Dict[str, Any]:
+    return {
+        "height": height,
+        "hash": block.hash,
+        "previous_hash": block.previous_hash,
+        "merkle_root": block.merkle_root,
+        "timestamp": block.timestamp,
+        "nonce": block.nonce,
+        "version": block.version,
+    }
+
+
+def header_from_json(data: Dict[str, Any]) -> BlockHeader:
+    return BlockHeader(data["height"], data["hash"], data["previous_hash"], data["merkle_root"],
+                       data["timestamp"], data["nonce"], data["version"])
+
+
+def header_error(header: BlockHeader, previous_hash: str, target: int) -> Optional[str]:
+    """
+    Check a header's link, hash (where the header alone allows) and proof of work.
+
+    :return: Why the header is invalid, or None if it passes.
+    """
+    if header.previous_hash != previous_hash:
+        return "it does not link to the previous header"
+    calculated = header.calculate_hash()
+    if calculated is not None and calculated != header.hash:
+        return "its hash does not match its fields"
+    if not meets_target(header.hash, target):
+        return "its proof of work does not meet the required target"
+    return None
+
+
+def _hash_at(chain, height: int) -> str:
+    # BlockStore can read a hash without decoding the block
+    get_hash = getattr(chain, "get_hash", None)
+    return get_hash(height) if get_hash else chain[height].hash
+
+
+def block_locator(chain) -> List[str]:
+    """
+    Hashes of our chain from the tip back to genesis: the newest few, then
+    exponentially sparser. A peer finds the highest one it shares with us
+    in O(log n) entries, however far the chains have diverged.
+    """
+    locator = []
+    height = len(chain) - 1
+    step = 1
+    while height > 0:
+        locator.append(_hash_at(chain, height))
+        if len(locator) >= LOCATOR_DENSE_ENTRIES:
+            step *= 2
+        height -= step
+    locator.append(_hash_at(chain, 0))
+    return locator
+
+
+def find_fork(blockchain, locator: Sequence[str]) -> int:
+    """
+    Height of the first locator hash found on our chain (0 if none is).
+    """
+    for block_hash in locator:
+        found = blockchain.explorer.find_block(block_hash)
+        if found is not None:
+            return found[0]
+    return 0
+
+
+class ChainSync:
+    """
+    Headers-first synchronisation of a Blockchain from several peers.
+
+    The peer claiming the most work supplies the header chain, which is
+    checked (links, proof of work) before any body is fetched. Block bodies
+    are then downloaded in BLOCKS_PER_REQUEST chunks from every peer in
+    parallel; a peer that fails or sends a block that doesn't match its
+    header is dropped and its chunk handed to another. Extensions of our tip
+    are applied as contiguous chunks arrive; a competing branch is gathered
+    in full and applied with Blockchain.reorganize.
+
+    Peers are any objects with an async `call(method, *args)` (e.g. NodeClient).
+    """
+    def __init__(self, blockchain, peers: Sequence, headers_per_request: int = HEADERS_PER_REQUEST,
+                 blocks_per_request: int = BLOCKS_PER_REQUEST):
+        self.blockchain = blockchain
+        self.peers = list(peers)
+        self.headers_per_request = headers_per_request
+        self.blocks_per_request = blocks_per_request
+
+    async def best_peer(self) -> Optional[Any]:
+        """
+        The peer reporting the most chain work, if it has more than we do.
+        """
+        tips = await asyncio.gather(*(peer.call("get_tip") for peer in self.peers), return_exceptions=True)
+        best, best_work = None, self.blockchain.chain_work()
+        for peer, tip in zip(self.peers, tips):
+            if isinstance(tip, Exception):
+                continue
+            work = int(tip["work"])
+            if work > best_work:
+                best, best_work = peer, work
+        return best
+
+    async def fetch_headers(self, peer) -> Tuple[int, List[BlockHeader]]:
+        """
+        Download and check the peer's headers after the last block we share.
+
+        :return: (fork height, headers after it).
+        """
+        locator = block_locator(self.blockchain.chain)
+        headers: List[BlockHeader] = []
+        while True:
+            batch = [header_from_json(h) for h in await peer.call("get_headers", locator, self.headers_per_request)]
+            headers.extend(batch)
+            if len(batch) < self.headers_per_request:
+                break
+            locator = [batch[-1].hash]
+        if not headers:
+            return len(self.blockchain.chain) - 1, []
+
+        found = self.blockchain.explorer.find_block(headers[0].previous_hash)
+        if found is None:
+            raise SyncError("Peer's headers do not connect to our chain.")
+        fork_height = found[0]
+        previous_hash = headers[0].previous_hash
+        # Retargeting makes each expected target depend on the branch's own timestamps
+        targets = self.blockchain.branch_targets(fork_height, [header.timestamp for header in headers])
+        for offset, header in enumerate(headers):
+            error = header_error(header, previous_hash, targets[offset])
+            if error is None and header.height != fork_height + 1 + offset:
+                error = "its height is out of sequence"
+            if error:
+                raise SyncError(f"Invalid header at height {fork_height + 1 + offset}: {error}.")
+            previous_hash = header.hash
+        return fork_height, headers
+
+    async def _download(self, headers: List[BlockHeader], results: Dict[int, List[Block]],
+                        arrived: asyncio.Event, peers: Sequence) -> List[asyncio.Task]:
+        size = self.blocks_per_request
+        queue: "asyncio.Queue[int]" = asyncio.Queue()
+        for index in range((len(headers) + size - 1) // size):
+            queue.put_nowait(index)
+
+        async def worker(peer):
+            try:
+                while True:
+                    # Idle workers keep waiting rather than exit: a chunk a
+                    # failing peer hands back must find a live one. sync()
+                    # cancels the workers once it has every chunk.
+                    index = await queue.get()
+                    chunk = headers[index * size:(index + 1) * size]
+                    try:
+                        data = await peer.call("get_blocks", [header.hash for header in chunk])
+                        blocks = [block_from_json(d) for d in data]
+                        if len(blocks) != len(chunk) or any(
+                                block.hash != header.hash or not block.has_valid_hash()
+                                for block, header in zip(blocks, chunk)):
+                            raise SyncError("Peer sent blocks that do not match their headers.")
+                    except Exception:
+                        # Give the chunk to another peer and stop using this one
+                        queue.put_nowait(index)
+                        return
+                    results[index] = blocks
+                    arrived.set()
+            finally:
+                arrived.set()
+
+        return [asyncio.create_task(worker(peer)) for peer in peers]
+
+    async def sync(self) -> int:
+        """
+        Catch up with the peer that has the most work.
+
+        :return: Number of blocks now on our chain that came from peers.
+        :raises SyncError: If no valid chain with more work could be obtained.
+        """
+        peer = await self.best_peer()
+        if peer is None:
+            return 0
+        fork_height, headers = await self.fetch_headers(peer)
+        targets = self.blockchain.branch_targets(fork_height, [header.timestamp for header in headers])
+        if sum(map(target_work, targets)) <= self.blockchain.chain_work(fork_height):
+            return 0
+
+        loop = asyncio.get_running_loop()
+        reorg = fork_height < len(self.blockchain.chain) - 1
+        results: Dict[int, List[Block]] = {}
+        arrived = asyncio.Event()
+        # The best peer goes first so it gets the first chunk
+        workers = await self._download(headers, results, arrived,
+                                       [peer] + [p for p in self.peers if p is not peer])
+        branch: List[Block] = []
+        applied = 0
+        chunks = (len(headers) + self.blocks_per_request - 1) // self.blocks_per_request
+        try:
+            for index in range(chunks):
+                while index not in results:
+                    if all(worker.done() for worker in workers):
+                        raise SyncError("No peer could supply the missing blocks.")
+                    arrived.clear()
+                    await arrived.wait()
+                blocks = results.pop(index)
+                if reorg:
+                    branch.extend(blocks)
+                else:
+                    # Apply off the event loop so downloads continue meanwhile
+                    applied += await loop.run_in_executor(None, self.blockchain.add_blocks, blocks)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+        if reorg:
+            await loop.run_in_executor(None, self.blockchain.reorganize, fork_height, branch)
+            applied = len(branch)
+        return applied
@@ -2,14 +2,87 @@ import hashlib
 import json
 import time
 from decimal import Decimal
-from typing import Dict, Any
+from typing import Any, Dict, Iterable, Optional
+
+ZERO = Decimal(0)
+CENTS_PER_UNIT = 100
+# Whole-cent amounts below this (in cents) have at most 15 significant
+# digits, so their shortest float repr is exactly their decimal value
+_EXACT_FLOAT_CENTS = 10 ** 15
+# JSON string encoder json.dumps uses by default (ensure_ascii=True)
+_json_string = json.encoder.encode_basestring_ascii
+
+
+def whole_cents(amount: Decimal) -> Optional[int]:
+    """
+    The amount in integer cents, or None if it has fractions of a cent.
+    """
+    try:
+        numerator, denominator = amount.as_integer_ratio()
+    except (OverflowError, ValueError):
+        # Infinities and NaNs
+        return None
+    cents, remainder = divmod(numerator * CENTS_PER_UNIT, denominator)
+    return None if remainder else cents
+
+
+def to_cents(amount: Decimal) -> int:
+    """
+    Convert a ZAR amount to integer cents.
+
+    :raises ValueError: If the amount has fractions of a cent.
+    """
+    cents = whole_cents(amount)
+    if cents is None:
+        raise ValueError(f"Amount {amount} is not a whole number of cents.")
+    return cents
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def canonical_amount(amount: Decimal, cents: Optional[int] = None) -> str:
+    """
+    Exact text of an amount as hashed into transaction ids.
+
+    It is the shortest repr of the amount as a float whenever that repr is
+    exactly the amount (every whole-cent amount under 10^13 ZAR), so ids
+    match those from when amounts were hashed as floats; amounts a float
+    cannot hold exactly are written out in full instead of being rounded.
+
+    :param cents: The amount in cents, if already known (see whole_cents).
+    """
+    if cents is None:
+        cents = whole_cents(amount)
+    if cents is not None and -_EXACT_FLOAT_CENTS < cents < _EXACT_FLOAT_CENTS:
+        sign = "-" if cents < 0 else ""
+        whole, part = divmod(abs(cents), CENTS_PER_UNIT)
+        if not part:
+            return f"{sign}{whole}.0"
+        if not part % 10:
+            return f"{sign}{whole}.{part // 10}"
+        return f"{sign}{whole}.{part:02d}"
+    text = repr(float(amount))
+    if Decimal(text) == amount:
+        return text
+    text = format(amount, "f")
+    return text.rstrip("0").rstrip(".") if "." in text else text
+
 
 class Transaction:
     """
     Represents a value transfer in the RandCoin network.
     Immutable to prevent tampering after creation/validation.
     """
-    def __init__(self, sender: str, recipient: str, amount: Decimal, timestamp: float = None):
+    # Bolt Optimization: No per-instance __dict__. Together with building the
+    # JSON-facing dict lazily, this roughly halves memory per transaction in
+    # large mempools and chains.
+    __slots__ = ("_sender", "_recipient", "_amount", "_timestamp", "_fee", "_id", "_cached_dict", "_public_key",
+                 "_signature", "_cents", "_cost_cents")
+
+    def __init__(self, sender: str, recipient: str, amount: Decimal, timestamp: float = None,
+                 fee: Decimal = ZERO):
         """
         Initialize a new transaction.
 
@@ -17,9 +90,13 @@ class Transaction:
         :param recipient: The address of the recipient.
         :param amount: The amount to send (in ZAR).
         :param timestamp: The time of creation.
+        :param fee: Fee paid to the miner on top of the amount (in ZAR).
         """
-        if amount <= 0 and sender != "genesis":
+        # Only the genesis block's placeholder may move nothing
+        if amount < 0 or (amount == 0 and sender != "genesis"):
             raise ValueError("Transaction amount must be positive.")
+        if fee < 0:
+            raise ValueError("Transaction fee cannot be negative.")
         if not sender:
             raise ValueError("Sender address cannot be empty.")
         if not recipient:
@@ -29,19 +106,51 @@ class Transaction:
         self._sender = sender
         self._recipient = recipient
         self._amount = amount
-        self._timestamp = timestamp or time.time()
+        # Always a float: ids hash its repr, and the binary codec stores an f64
+        self._timestamp = float(timestamp) if timestamp else time.time()
+        self._fee = fee
+        self._set_cents()
         self._id = self.calculate_hash()
+        # Built on first to_dict() call; binary-header blocks never need it
+        self._cached_dict = None
+        # Set by attach_signature (see Wallet.sign)
+        self._public_key: Optional[bytes] = None
+        self._signature: Optional[bytes] = None
+
+    @classmethod
+    def restore(cls, sender: str, recipient: str, amount: Decimal, timestamp: float, fee: Decimal,
+                tx_id: str, public_key: Optional[bytes] = None, signature: Optional[bytes] = None,
+                cents: Optional[int] = None, fee_cents: int = 0) -> "Transaction":
+        """
+        Rebuild a transaction from a trusted source (e.g. local storage) without re-hashing it.
 
-        # Bolt Optimization: Cache the dictionary representation to avoid
-        # repeated dictionary creation and float conversion during mining/validation.
-        # Insert keys in alphabetical order to eliminate the need for sort_keys=True during JSON serialization.
-        self._cached_dict = {
-            "amount": float(self._amount),
-            "id": self._id,
-            "recipient": self._recipient,
-            "sender": self._sender,
-            "timestamp": self._timestamp
-        }
+        The given id is trusted as-is; use calculate_hash() to verify it.
+
+        :param cents: The amount in cents (with fee_cents), if the source
+                      already has it; otherwise it is derived from `amount`.
+        """
+        tx = cls.__new__(cls)
+        tx._sender = sender
+        tx._recipient = recipient
+        tx._amount = amount
+        tx._timestamp = float(timestamp)
+        tx._fee = fee
+        tx._id = tx_id
+        tx._cached_dict = None
+        tx._public_key = public_key
+        tx._signature = signature
+        if cents is None:
+            tx._set_cents()
+        else:
+            tx._cents = cents
+            tx._cost_cents = cents + fee_cents
+        return tx
+
+    def _set_cents(self):
+        cents = whole_cents(self._amount)
+        fee_cents = whole_cents(self._fee) if self._fee else 0
+        self._cents = cents
+        self._cost_cents = None if cents is None or fee_cents is None else cents + fee_cents
 
     @property
     def sender(self) -> str:
@@ -59,24 +168,79 @@ class Transaction:
     def timestamp(self) -> float:
         return self._timestamp
 
+    @property
+    def fee(self) -> Decimal:
+        return self._fee
+
+    @property
+    def cost(self) -> Decimal:
+        """
+        Total debited from the sender: amount plus fee.
+        """
+        if self._fee:
+            return self._amount + self._fee
+        return self._amount
+
+    @property
+    def cents(self) -> Optional[int]:
+        """
+        The amount in integer cents (None if it has fractions of a cent).
+        """
+        return self._cents
+
+    @property
+    def cost_cents(self) -> Optional[int]:
+        """
+        The cost in integer cents (None if the amount or fee has fractions of a cent).
+        """
+        return self._cost_cents
+
     @property
     def id(self) -> str:
         return self._id
 
+    @property
+    def public_key(self) -> Optional[bytes]:
+        """
+        The sender's compressed public key, if the transaction is signed.
+        """
+        return self._public_key
+
+    @property
+    def signature(self) -> Optional[bytes]:
+        return self._signature
+
+    def attach_signature(self, public_key: bytes, signature: bytes):
+        """
+        Attach the sender's signature over the transaction id.
+
+        The signature is not part of the id (it signs it), so attaching one
+        leaves the id and any block hash unchanged.
+
+        :raises ValueError: If the transaction is already signed.
+        """
+        if self._signature is not None:
+            raise ValueError("Transaction is already signed.")
+        self._public_key = public_key
+        self._signature = signature
+
     def calculate_hash(self) -> str:
         """
         Calculate the SHA-256 hash of the transaction.
         """
-        # Bolt Optimization: Insert keys alphabetically to avoid sort_keys=True in json.dumps
-        tx_content = {
-            "amount": float(self._amount),  # Convert Decimal to float for JSON serialization compatibility
-            "recipient": self._recipient,
-            "sender": self._sender,
-            "timestamp": self._timestamp
-        }
-        # Use separators=(', ', ': ') to match default json.dumps behavior but without the O(N log N) sorting overhead
-        tx_string = json.dumps(tx_content, separators=(', ', ': ')).encode()
-        return hashlib.sha256(tx_string).hexdigest()
+        # ⚡ Bolt Optimization: Build the JSON text json.dumps(sort_keys=True)
+        # produced directly, with amounts in exact canonical form (see
+        # canonical_amount) instead of rounded through float
+        parts = ['{"amount": ', canonical_amount(self._amount, self._cents)]
+        if self._fee:
+            # Only fee-paying transactions hash a fee, so fee-less ids are unchanged
+            fee_cents = None if self._cost_cents is None else self._cost_cents - self._cents
+            parts += [', "fee": ', canonical_amount(self._fee, fee_cents)]
+        timestamp = self._timestamp
+        parts += [', "recipient": ', _json_string(self._recipient), ', "sender": ', _json_string(self._sender),
+                  ', "timestamp": ', float.__repr__(timestamp) if type(timestamp) is float else json.dumps(timestamp),
+                  '}']
+        return hashlib.sha256("".join(parts).encode()).hexdigest()
 
     def to_dict(self, copy: bool = True) -> Dict[str, Any]:
         """
@@ -84,9 +248,44 @@ class Transaction:
 
         :param copy: Whether to return a copy or a direct reference.
         """
+        if self._cached_dict is None:
+            # Bolt Optimization: Cache the dictionary representation to avoid
+            # repeated dictionary creation and float conversion during mining/validation.
+            # Insert keys in alphabetical order to eliminate the need for sort_keys=True during JSON serialization.
+            data = {"amount": float(self._amount)}
+            if self._fee:
+                data["fee"] = float(self._fee)
+            data["id"] = self._id
+            data["recipient"] = self._recipient
+            data["sender"] = self._sender
+            data["timestamp"] = self._timestamp
+            self._cached_dict = data
         if copy:
             return self._cached_dict.copy()
         return self._cached_dict
 
     def __repr__(self) -> str:
-        return f"<Transaction {self._id[:8]}... {self._sender} -> {self._recipient}: {self._amount}>"
+        fee = f" (fee {self._fee})" if self._fee else ""
+        return f"<Transaction {self._id[:8]}... {self._sender} -> {self._recipient}: {self._amount}{fee}>"
+
+
+def apply_transfers(balances: Dict[str, Any], transactions: Iterable[Transaction], cents: bool = False):
+    """
+    Credit each recipient its amount and debit each sender amount plus fee
+    in a balance table of Decimal ZAR, or of integer cents if `cents`.
+
+    ⚡ Bolt Optimization: Reads the slots directly rather than through the
+    properties; in a cents ledger the property calls would otherwise cost
+    more than the integer arithmetic, halving replay throughput.
+
+    :raises TypeError: If `cents` and an amount has fractions of a cent.
+    """
+    get = balances.get
+    if cents:
+        for tx in transactions:
+            balances[tx._recipient] = get(tx._recipient, 0) + tx._cents
+            balances[tx._sender] = get(tx._sender, 0) - tx._cost_cents
+    else:
+        for tx in transactions:
+            balances[tx._recipient] = get(tx._recipient, 0) + tx._amount
+            balances[tx._sender] = get(tx._sender, 0) - tx.cost
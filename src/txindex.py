@@ -0,0 +1,401 @@
+import math
+import mmap
+import os
+import struct
+from typing import Optional
+from src.block import Block
+from src.config import TXINDEX_CAPACITY, TXINDEX_ERROR_RATE
+
+TXINDEX_FILE = "txindex.dat"
+BLOOM_FILE = "txindex.bloom"
+TXINDEX_MAGIC = b"RCTXIX"
+BLOOM_MAGIC = b"RCBLOM"
+TXINDEX_FORMAT_VERSION = 1
+
+# Ids are SHA-256 digests; the first 16 bytes are plenty to tell them apart
+KEY_SIZE = 16
+EMPTY_SLOT = bytes(KEY_SIZE)
+# magic | format version (u16) | blocks indexed (u64) | tip hash (32) | entries (u64) | slots (u64)
+TABLE_HEADER = struct.Struct("<6sHQ32sQQ")
+MAX_LOAD_FACTOR = 0.5
+# A table doubles when it reaches MAX_LOAD_FACTOR, so past its minimum size
+# it holds at least one key per this many bytes of slots
+MEMORY_BYTES_PER_TRANSACTION = int(KEY_SIZE * 2 / MAX_LOAD_FACTOR)
+# magic | format version (u16) | capacity (u64) | blocks indexed when last synced (u64)
+BLOOM_HEADER = struct.Struct("<6sHQQ")
+
+
+def tx_key(tx_id: str) -> bytes:
+    return bytes.fromhex(tx_id[:KEY_SIZE * 2])
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over transaction keys.
+
+    Keys are already uniformly distributed (SHA-256), so bit positions come
+    straight from the key by double hashing instead of re-hashing.
+    """
+    def __init__(self, capacity: int, error_rate: float = TXINDEX_ERROR_RATE, bits=None):
+        """
+        :param capacity: Number of keys the filter is sized for.
+        :param error_rate: Target false-positive rate at capacity.
+        :param bits: Existing writable buffer of byte_size() bytes (e.g. an
+                     mmap) to use instead of a fresh bytearray.
+        """
+        self.capacity = max(1, capacity)
+        self.size = self.bit_size(self.capacity, error_rate)
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8) if bits is None else bits
+
+    @staticmethod
+    def bit_size(capacity: int, error_rate: float = TXINDEX_ERROR_RATE) -> int:
+        return max(8, int(-max(1, capacity) * math.log(error_rate) / (math.log(2) ** 2)))
+
+    @classmethod
+    def byte_size(cls, capacity: int, error_rate: float = TXINDEX_ERROR_RATE) -> int:
+        return (cls.bit_size(capacity, error_rate) + 7) // 8
+
+    def _positions(self, key: bytes):
+        h1 = int.from_bytes(key[:8], "little")
+        h2 = int.from_bytes(key[8:16], "little") | 1
+        size = self.size
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % size
+
+    def add(self, key: bytes):
+        bits = self.bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self.bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class TxTable:
+    """
+    Open-addressing hash set of transaction keys, memory-mapped from a file
+    or, without a path, held in one bytearray.
+
+    The header records how many blocks have been indexed and the hash of the
+    last one, so a restarted node only indexes blocks added since.
+    """
+    def __init__(self, path: Optional[str], capacity: int = TXINDEX_CAPACITY):
+        """
+        :param path: File to map, or None to keep the table in memory.
+        :param capacity: Number of keys to size a new table for.
+        """
+        self.path = path
+        self._file = None
+        if path is None:
+            self._map = self._empty(self._slots_for(capacity))
+            self._load()
+            return
+        if not os.path.exists(path) or os.path.getsize(path) < TABLE_HEADER.size:
+            self._create(path, self._slots_for(capacity))
+        self._open()
+
+    @staticmethod
+    def _slots_for(count: int) -> int:
+        return 1 << max(4, math.ceil(math.log2(max(1, count) / MAX_LOAD_FACTOR)))
+
+    @staticmethod
+    def _create(path: str, slots: int):
+        with open(path, "wb") as f:
+            f.write(TABLE_HEADER.pack(TXINDEX_MAGIC, TXINDEX_FORMAT_VERSION, 0, bytes(32), 0, slots))
+            f.truncate(TABLE_HEADER.size + slots * KEY_SIZE)
+
+    @staticmethod
+    def _empty(slots: int) -> bytearray:
+        table = bytearray(TABLE_HEADER.size + slots * KEY_SIZE)
+        TABLE_HEADER.pack_into(table, 0, TXINDEX_MAGIC, TXINDEX_FORMAT_VERSION, 0, bytes(32), 0, slots)
+        return table
+
+    def _open(self):
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._load()
+
+    def _load(self):
+        magic, version, self.blocks, tip, self.count, self.slots = TABLE_HEADER.unpack_from(self._map, 0)
+        if magic != TXINDEX_MAGIC or version != TXINDEX_FORMAT_VERSION \
+                or len(self._map) != TABLE_HEADER.size + self.slots * KEY_SIZE:
+            raise ValueError(f"Not a supported transaction index: {self.path}")
+        self.tip = tip.hex()
+
+    def _slot_of(self, key: bytes) -> int:
+        """
+        Slot holding `key`, or the empty slot where it would go.
+        """
+        mask = self.slots - 1
+        slot = int.from_bytes(key[:8], "little") & mask
+        view = self._map
+        while True:
+            offset = TABLE_HEADER.size + slot * KEY_SIZE
+            stored = view[offset:offset + KEY_SIZE]
+            if stored == key or stored == EMPTY_SLOT:
+                return slot
+            slot = (slot + 1) & mask
+
+    def __contains__(self, key: bytes) -> bool:
+        offset = TABLE_HEADER.size + self._slot_of(key) * KEY_SIZE
+        return self._map[offset:offset + KEY_SIZE] == key
+
+    def __iter__(self):
+        view = self._map
+        for slot in range(self.slots):
+            offset = TABLE_HEADER.size + slot * KEY_SIZE
+            key = view[offset:offset + KEY_SIZE]
+            if key != EMPTY_SLOT:
+                yield key
+
+    def add(self, key: bytes) -> bool:
+        """
+        :return: True if the key was new.
+        """
+        offset = TABLE_HEADER.size + self._slot_of(key) * KEY_SIZE
+        if self._map[offset:offset + KEY_SIZE] == key:
+            return False
+        if (self.count + 1) > self.slots * MAX_LOAD_FACTOR:
+            self._grow()
+            offset = TABLE_HEADER.size + self._slot_of(key) * KEY_SIZE
+        self._map[offset:offset + KEY_SIZE] = key
+        self.count += 1
+        return True
+
+    def discard(self, key: bytes) -> bool:
+        """
+        Remove a key, shifting later entries of its probe run back so lookups
+        never stop early at the hole (no tombstones needed).
+
+        :return: True if the key was present.
+        """
+        mask = self.slots - 1
+        view = self._map
+        hole = self._slot_of(key)
+        offset = TABLE_HEADER.size + hole * KEY_SIZE
+        if view[offset:offset + KEY_SIZE] != key:
+            return False
+
+        slot = hole
+        while True:
+            slot = (slot + 1) & mask
+            offset = TABLE_HEADER.size + slot * KEY_SIZE
+            stored = view[offset:offset + KEY_SIZE]
+            if stored == EMPTY_SLOT:
+                break
+            home = int.from_bytes(stored[:8], "little") & mask
+            # Move the entry into the hole unless its home lies cyclically in (hole, slot]
+            if (hole < home <= slot) if hole <= slot else (home > hole or home <= slot):
+                continue
+            hole_offset = TABLE_HEADER.size + hole * KEY_SIZE
+            view[hole_offset:hole_offset + KEY_SIZE] = stored
+            hole = slot
+        hole_offset = TABLE_HEADER.size + hole * KEY_SIZE
+        view[hole_offset:hole_offset + KEY_SIZE] = EMPTY_SLOT
+        self.count -= 1
+        return True
+
+    def _grow(self):
+        """
+        Double the table by rehashing every key into a new one, then swap it
+        in (on disk, by replacing the file).
+        """
+        keys = list(self)
+        if self.path is None:
+            blocks, tip = self.blocks, self.tip
+            self._map = self._empty(self.slots * 2)
+            self._load()
+            for key in keys:
+                self.add(key)
+            self.mark(blocks, tip)
+            return
+        tmp_path = self.path + ".tmp"
+        self._create(tmp_path, self.slots * 2)
+        grown = TxTable(tmp_path)
+        for key in keys:
+            grown.add(key)
+        grown.mark(self.blocks, self.tip)
+        grown.close()
+        self.close()
+        os.replace(tmp_path, self.path)
+        self._open()
+
+    def mark(self, blocks: int, tip: str):
+        """
+        Record that the first `blocks` blocks (ending at `tip`) are indexed.
+        """
+        self.blocks, self.tip = blocks, tip
+        TABLE_HEADER.pack_into(self._map, 0, TXINDEX_MAGIC, TXINDEX_FORMAT_VERSION, blocks,
+                               bytes.fromhex(tip.zfill(64)), self.count, self.slots)
+        if self._file is not None:
+            self._map.flush()
+
+    def reset(self):
+        """
+        Empty the table in place.
+        """
+        if self.path is None:
+            self._map = self._empty(self.slots)
+            self._load()
+            return
+        self.close()
+        self._create(self.path, self.slots)
+        self._open()
+
+    def close(self):
+        if self._file is not None:
+            self._map.close()
+            self._file.close()
+
+
+class TransactionIndex:
+    """
+    Constant-time lookup of transaction ids already on the chain.
+
+    Persistent chains keep the exact keys in an on-disk TxTable fronted by a
+    memory-mapped Bloom filter, so resident memory is bounded by the filter
+    and most fresh ids are answered without probing the table. Both files
+    survive restarts.
+
+    In-memory chains keep the table in a bytearray instead, grown on demand
+    and with no filter (a probe costs no I/O to save). It holds no object
+    per key, so it takes at most MEMORY_BYTES_PER_TRANSACTION per transaction
+    indexed (at its peak); the chain it indexes is in memory too, and larger.
+    """
+    def __init__(self, data_dir: Optional[str] = None, capacity: int = TXINDEX_CAPACITY):
+        """
+        :param data_dir: Directory for the on-disk table, or None for memory only.
+        :param capacity: Expected number of transactions (sizes the on-disk filter and table).
+        """
+        self.capacity = capacity
+        self.bloom: Optional[BloomFilter] = None
+        self._bloom_file = None
+        self._bloom_map = None
+        if data_dir:
+            self.table = TxTable(os.path.join(data_dir, TXINDEX_FILE), capacity)
+            self._open_filter(os.path.join(data_dir, BLOOM_FILE))
+        else:
+            # Sized on demand: in memory, preallocating for `capacity` only wastes it
+            self.table = TxTable(None, 0)
+        self.blocks, self.tip = self.table.blocks, self.table.tip
+
+    def _open_filter(self, path: str):
+        """
+        Map the persisted filter, rebuilding it from the table only if it is
+        missing, undersized or out of step with the table.
+        """
+        capacity = max(self.capacity, self.table.count * 2)
+        size = BLOOM_HEADER.size + BloomFilter.byte_size(capacity)
+        usable = False
+        if os.path.exists(path) and os.path.getsize(path) >= BLOOM_HEADER.size:
+            with open(path, "rb") as f:
+                magic, version, stored_capacity, blocks = BLOOM_HEADER.unpack(f.read(BLOOM_HEADER.size))
+            usable = (magic == BLOOM_MAGIC and version == TXINDEX_FORMAT_VERSION and blocks == self.table.blocks
+                      and stored_capacity >= self.table.count
+                      and os.path.getsize(path) == BLOOM_HEADER.size + BloomFilter.byte_size(stored_capacity))
+            if usable:
+                capacity, size = stored_capacity, os.path.getsize(path)
+
+        if not usable:
+            with open(path, "wb") as f:
+                f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, TXINDEX_FORMAT_VERSION, capacity, self.table.blocks))
+                f.truncate(size)
+
+        self._close_filter()
+        self._bloom_file = open(path, "r+b")
+        self._bloom_map = mmap.mmap(self._bloom_file.fileno(), 0)
+        self.bloom = BloomFilter(capacity, bits=memoryview(self._bloom_map)[BLOOM_HEADER.size:])
+        if not usable and self.table.count:
+            for key in self.table:
+                self.bloom.add(key)
+
+    def _reset_filter(self):
+        path = self._bloom_file.name
+        self._close_filter()
+        os.remove(path)
+        self._open_filter(path)
+
+    def _close_filter(self):
+        if self._bloom_map is not None:
+            self.bloom.bits.release()
+            self._bloom_map.close()
+            self._bloom_file.close()
+            self._bloom_map = None
+
+    def __contains__(self, tx_id: str) -> bool:
+        key = tx_key(tx_id)
+        return (self.bloom is None or key in self.bloom) and key in self.table
+
+    def __len__(self) -> int:
+        return self.table.count
+
+    def add(self, tx_id: str):
+        key = tx_key(tx_id)
+        if self.bloom is None:
+            self.table.add(key)
+            return
+        # Always set the filter bits, even for keys already in the table, so a
+        # block re-indexed after a crash can never leave a false negative
+        self.bloom.add(key)
+        if self.table.add(key):
+            if self.table.count > self.bloom.capacity:
+                # Past capacity the false-positive rate climbs; rebuild it larger
+                self._reset_filter()
+
+    def add_block(self, block: Block):
+        """
+        Index every transaction in a block appended to the chain.
+        """
+        for tx in block.transactions:
+            self.add(tx.id)
+        self.blocks += 1
+        self.tip = block.hash
+        self.table.mark(self.blocks, self.tip)
+        if self.bloom is not None:
+            BLOOM_HEADER.pack_into(self._bloom_map, 0, BLOOM_MAGIC, TXINDEX_FORMAT_VERSION,
+                                   self.bloom.capacity, self.blocks)
+
+    def remove_block(self, block: Block):
+        """
+        Un-index the tip block when it is rolled back by a reorg.
+
+        The Bloom filter keeps the removed keys' bits; that only adds false
+        positives, which the exact table lookup then rejects.
+        """
+        for tx in block.transactions:
+            self.table.discard(tx_key(tx.id))
+        self.blocks -= 1
+        self.tip = block.previous_hash
+        self.table.mark(self.blocks, self.tip)
+        if self.bloom is not None:
+            BLOOM_HEADER.pack_into(self._bloom_map, 0, BLOOM_MAGIC, TXINDEX_FORMAT_VERSION,
+                                   self.bloom.capacity, self.blocks)
+
+    def sync(self, chain):
+        """
+        Bring the index up to date with `chain`.
+
+        Blocks already recorded are skipped. If the recorded tip is no longer
+        on the chain (e.g. after a torn write was discarded), the index is
+        rebuilt from genesis.
+        """
+        if self.blocks > len(chain) or (self.blocks and chain[self.blocks - 1].hash != self.tip):
+            self.reset()
+        for height in range(self.blocks, len(chain)):
+            self.add_block(chain[height])
+
+    def reset(self):
+        self.blocks, self.tip = 0, ""
+        self.table.reset()
+        if self.bloom is not None:
+            self._reset_filter()
+
+    def close(self):
+        if self.bloom is not None:
+            self._close_filter()
+        self.table.close()
@@ -0,0 +1,124 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Sequence
+from src.block import Block
+from src.config import MAX_FUTURE_BLOCK_TIME, MEDIAN_TIME_BLOCKS
+from src.mining import meets_target, resolve_workers
+
+# Blocks sent to a worker process per task during parallel verification
+VALIDATION_CHUNK_SIZE = 256
+
+
+class ValidationResult(NamedTuple):
+    """
+    Outcome of a chain verification.
+
+    :param valid: True if every checked block is valid.
+    :param first_invalid_index: Height of the first bad block, or None.
+    :param checked: Number of blocks whose hashes were recomputed.
+    """
+    valid: bool
+    first_invalid_index: Optional[int]
+    checked: int
+
+
+def first_invalid_block(chain: Sequence[Block], start: int, end: int,
+                        target_at: Optional[Callable[[int], int]] = None) -> Optional[int]:
+    """
+    Sequentially verify blocks [start, end): stored hash, link to the
+    previous block and, given `target_at`, proof of work.
+
+    :param target_at: Expected target of the block at a given height.
+    :return: The first invalid height, or None if all are valid.
+    """
+    previous_hash = chain[start - 1].hash
+    for height in range(start, end):
+        block = chain[height]
+        if block.previous_hash != previous_hash or not block.has_valid_hash():
+            return height
+        if target_at is not None and not meets_target(block.hash, target_at(height)):
+            return height
+        previous_hash = block.hash
+    return None
+
+
+def block_error(block: Block, previous_hash: str, target: int) -> Optional[str]:
+    """
+    Context-free checks for a block received from a peer: link to the
+    expected parent, stored hash and proof of work.
+
+    :return: Why the block is invalid, or None if it passes.
+    """
+    if block.previous_hash != previous_hash:
+        return "it does not extend the current chain"
+    if not block.has_valid_hash():
+        return "its hash does not match its contents"
+    if not meets_target(block.hash, target):
+        return "its proof of work does not meet the required target"
+    return None
+
+
+def median_time_past(height: int, timestamp_at: Callable[[int], float], span: int = MEDIAN_TIME_BLOCKS) -> float:
+    """
+    Median timestamp of the (up to) `span` blocks below `height`. Unlike the
+    tip's own timestamp, one miner's skewed clock can't move it far.
+
+    :param timestamp_at: Timestamp of the block at a given height.
+    """
+    timestamps = sorted(timestamp_at(h) for h in range(max(0, height - span), height))
+    return timestamps[(len(timestamps) - 1) // 2]
+
+
+def timestamp_error(timestamp: float, median_past: float, now: Optional[float] = None) -> Optional[str]:
+    """
+    Check a block's timestamp against the median time past of its parent
+    chain and the local clock (`now`, default time.time()).
+
+    :return: Why the timestamp is invalid, or None if it passes.
+    """
+    if timestamp <= median_past:
+        return "its timestamp is not after the median of the blocks before it"
+    if timestamp > (time.time() if now is None else now) + MAX_FUTURE_BLOCK_TIME:
+        return "its timestamp is too far in the future"
+    return None
+
+
+def _first_bad_hash(start: int, blocks: List[Block]) -> Optional[int]:
+    """
+    Worker task: recompute hashes for a run of blocks starting at `start`.
+    """
+    for offset, block in enumerate(blocks):
+        if not block.has_valid_hash():
+            return start + offset
+    return None
+
+
+def parallel_first_invalid_block(chain: Sequence[Block], start: int, end: int,
+                                 workers: Optional[int] = None,
+                                 target_at: Optional[Callable[[int], int]] = None) -> Optional[int]:
+    """
+    Verify blocks [start, end) with hash recomputation spread over a process pool.
+
+    Hash linkage and proof of work are checked here in the parent, which is
+    cheap; only the expensive re-hashing is farmed out.
+
+    :return: The first invalid height, or None if all are valid.
+    """
+    first_bad = None
+    previous_hash = chain[start - 1].hash
+    with ProcessPoolExecutor(max_workers=resolve_workers(workers)) as pool:
+        futures = []
+        for chunk_start in range(start, end, VALIDATION_CHUNK_SIZE):
+            blocks = chain[chunk_start:min(chunk_start + VALIDATION_CHUNK_SIZE, end)]
+            for offset, block in enumerate(blocks):
+                if first_bad is None and (block.previous_hash != previous_hash or (
+                        target_at is not None and not meets_target(block.hash, target_at(chunk_start + offset)))):
+                    first_bad = chunk_start + offset
+                previous_hash = block.hash
+            futures.append(pool.submit(_first_bad_hash, chunk_start, blocks))
+
+        for future in futures:
+            bad = future.result()
+            if bad is not None and (first_bad is None or bad < first_bad):
+                first_bad = bad
+    return first_bad
@@ -1,18 +1,50 @@
-import uuid
 import hashlib
+from decimal import Decimal
+from typing import Optional
+from src import secp256k1
+from src.transaction import Transaction, ZERO
+
+# Hex characters of the public key hash used as an address
+ADDRESS_LENGTH = 40
+
+
+def address_from_public_key(public_key: bytes) -> str:
+    """
+    Derive the address owned by a compressed public key.
+    """
+    return hashlib.sha256(public_key).hexdigest()[:ADDRESS_LENGTH]
+
 
 class Wallet:
     """
-    Represents a simple wallet with an address.
+    A secp256k1 keypair and the address derived from its public key.
+    Only the holder of the private key can sign transfers from the address.
     """
-    def __init__(self):
-        self.address = self.generate_address()
+    def __init__(self, private_key: Optional[int] = None):
+        """
+        :param private_key: An existing private key; a new one is generated if omitted.
+        """
+        self.private_key = secp256k1.generate_private_key() if private_key is None else private_key
+        self.public_key = secp256k1.public_key(self.private_key)
+        self.address = address_from_public_key(self.public_key)
+
+    def sign(self, transaction: Transaction) -> Transaction:
+        """
+        Sign a transaction sent from this wallet's address.
+
+        :return: The same transaction, now signed.
+        :raises ValueError: If the transaction is from another address or already signed.
+        """
+        if transaction.sender != self.address:
+            raise ValueError("Cannot sign a transaction sent from another address.")
+        transaction.attach_signature(self.public_key, secp256k1.sign(self.private_key, bytes.fromhex(transaction.id)))
+        return transaction
 
-    def generate_address(self) -> str:
+    def create_transaction(self, recipient: str, amount: Decimal, fee: Decimal = ZERO) -> Transaction:
         """
-        Generate a unique address based on a random UUID.
+        Build and sign a transfer from this wallet.
         """
-        return hashlib.sha256(str(uuid.uuid4()).encode()).hexdigest()[:16]
+        return self.sign(Transaction(self.address, recipient, amount, fee=fee))
 
     def __repr__(self):
         return f"<Wallet Address: {self.address}>"
@@ -0,0 +1,24 @@
+import unittest
+from benchmarks.suite import CASES, compare, measure
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_compare_flags_regressions(self):
+        baseline = {"results": {"fast": {"normalised": 2.0}, "slow": {"normalised": 2.0},
+                                "gone": {"normalised": 1.0}}}
+        current = {"results": {"fast": {"normalised": 2.5}, "slow": {"normalised": 1.0},
+                               "new": {"normalised": 1.0}}}
+        comparisons = {c.name: c for c in compare(current, baseline, threshold=0.3)}
+        self.assertEqual(set(comparisons), {"fast", "slow"})
+        self.assertAlmostEqual(comparisons["fast"].change, 0.25)
+        self.assertFalse(comparisons["fast"].regressed)
+        self.assertTrue(comparisons["slow"].regressed)
+
+    def test_cases_run(self):
+        self.assertTrue(any(name.startswith("mine/") for name in CASES))
+        make_run, operations = CASES["serialize/binary_decode"].case(1)
+        value, normalised = measure(make_run, operations, 1)
+        self.assertGreater(value, 0)
+        self.assertGreater(normalised, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,7 @@ from src.transaction import Transaction
 
 class TestBlockchain(unittest.TestCase):
     def setUp(self):
-        self.blockchain = Blockchain()
+        self.blockchain = Blockchain(require_signatures=False)
         # Reduce difficulty for testing speed
         self.blockchain.difficulty = 1
         self.miner_address = "Miner1"
@@ -63,6 +63,33 @@ class TestBlockchain(unittest.TestCase):
         # Miner: 10 (reward)
         self.assertEqual(self.blockchain.get_balance(self.miner_address), Decimal(10))
 
+    def test_batch_ingestion(self):
+        self.blockchain.mine_pending_transactions(self.alice) # Alice gets 10
+
+        results = self.blockchain.add_transactions([
+            Transaction(self.alice, self.bob, Decimal(4)),
+            Transaction(self.bob, self.alice, Decimal(1)),     # Bob has no confirmed funds
+            Transaction(self.alice, self.bob, Decimal(5)),
+            Transaction(self.alice, self.bob, Decimal(2)),     # Would overdraw Alice
+            Transaction("System", self.bob, Decimal(3)),       # Only mining creates coins
+        ])
+
+        self.assertEqual([r.accepted for r in results], [True, False, True, False, False])
+        self.assertIn("Insufficient funds", results[1].error)
+        self.assertIn("Insufficient funds", results[3].error)
+        self.assertIn("created by mining", results[4].error)
+        self.assertEqual(len(self.blockchain.pending_transactions), 2)
+        self.assertEqual(self.blockchain.pending_outflows, {self.alice: Decimal(9)})
+        self.assertEqual(self.blockchain.get_spendable_balance(self.alice), Decimal(1))
+
+        # Batch and single-item paths share pending state
+        with self.assertRaises(ValueError):
+            self.blockchain.add_transaction(Transaction(self.alice, self.bob, Decimal(2)))
+
+        self.blockchain.mine_pending_transactions(self.miner_address)
+        self.assertEqual(self.blockchain.get_balance(self.alice), Decimal(1))
+        self.assertEqual(self.blockchain.get_balance(self.bob), Decimal(9))
+
     def test_chain_validity(self):
         # Mine a block
         self.blockchain.mine_pending_transactions(self.miner_address)
@@ -0,0 +1,159 @@
+import io
+import tempfile
+import unittest
+from decimal import Decimal
+from src.block import Block
+from src.blockchain import Blockchain
+from src.bootstrap import EXPORT_HEADER, export_chain, import_chain, read_export, write_export
+from src.storage import encode_record
+from src.transaction import Transaction
+
+def new_chain(data_dir=None):
+    blockchain = Blockchain(data_dir, require_signatures=False)
+    blockchain.difficulty = 1
+    return blockchain
+
+def build_chain(blocks):
+    blockchain = new_chain()
+    for i in range(blocks):
+        if i:
+            blockchain.add_transaction(Transaction(f"Miner{i - 1}", "Alice", Decimal(1), fee=Decimal("0.10")))
+        blockchain.mine_pending_transactions(f"Miner{i}")
+    return blockchain
+
+class TestBootstrap(unittest.TestCase):
+    def setUp(self):
+        self.source = build_chain(12)
+
+    def tearDown(self):
+        self.source.close()
+
+    def export(self, **kwargs):
+        stream = io.BytesIO()
+        export_chain(self.source, stream, **kwargs)
+        stream.seek(0)
+        return stream
+
+    def assert_same_state(self, blockchain):
+        self.assertEqual(blockchain.get_latest_block().hash, self.source.get_latest_block().hash)
+        self.assertEqual(dict(blockchain.balances), dict(self.source.balances))
+        self.assertTrue(blockchain.is_chain_valid())
+
+    def test_round_trip_verified(self):
+        stream = self.export()
+        start, count, _ = read_export(stream)
+        self.assertEqual((start, count), (0, 13))
+        stream.seek(0)
+
+        progress = []
+        target = new_chain()
+        # Genesis is already there; a batch size of 5 exercises several batches
+        self.assertEqual(import_chain(target, stream, batch_size=5, workers=1,
+                                      progress=lambda blocks, size: progress.append(blocks)), 12)
+        self.assert_same_state(target)
+        self.assertEqual(progress[-1], 13)
+        self.assertIn(self.source.chain[5].transactions[0].id, target.tx_index)
+        target.close()
+
+    def test_round_trip_trusted_into_store(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            target = new_chain(data_dir)
+            import_chain(target, self.export(), trusted_hash=self.source.get_latest_block().hash, batch_size=4)
+            self.assert_same_state(target)
+            target.close()
+
+            # The store can export its raw records and survives a restart
+            reopened = new_chain(data_dir)
+            self.assert_same_state(reopened)
+            stream = io.BytesIO()
+            export_chain(reopened, stream, start=3, stop=7)
+            reopened.close()
+        self.assertEqual(stream.getvalue(), self.export(start=3, stop=7).getvalue())
+
+    def test_resume_skips_known_blocks(self):
+        target = new_chain()
+        import_chain(target, self.export(stop=6), workers=2)
+        self.assertEqual(import_chain(target, self.export(start=4), workers=1), 7)
+        self.assert_same_state(target)
+        target.close()
+
+    def test_tampered_block_rejected(self):
+        data = bytearray(self.export().getvalue())
+        # Flip a byte in the last record (inside its transactions)
+        data[-10] ^= 0xFF
+        target = new_chain()
+        with self.assertRaises(ValueError):
+            import_chain(target, io.BytesIO(bytes(data)), batch_size=100, workers=1)
+        self.assertEqual(len(target.chain), 1)
+        target.close()
+
+    def test_trusted_import_checks_contents(self):
+        # Inflate a transfer, keeping its stored id, then with a matching id
+        original = self.source.chain[5]
+        tx = original.transactions[0]
+        kept_id = Transaction.restore(tx.sender, tx.recipient, Decimal(9999999), tx.timestamp, tx.fee, tx.id)
+        new_id = Transaction(tx.sender, tx.recipient, Decimal(9999999), tx.timestamp, fee=tx.fee)
+        for forged in (kept_id, new_id):
+            block = Block.restore([forged] + original.transactions[1:], original.previous_hash, original.timestamp,
+                                  original.nonce, original.hash, original.version)
+            stream = io.BytesIO()
+            start, count, records = read_export(self.export())
+            records = [encode_record(block) if height == 5 else record
+                       for height, record in enumerate(records, start)]
+            write_export(stream, start, count, records)
+            stream.seek(0)
+            for workers in (1, 2):
+                target = new_chain()
+                with self.assertRaises(ValueError):
+                    import_chain(target, stream, trusted_hash=self.source.get_latest_block().hash,
+                                 batch_size=100, workers=workers)
+                self.assertEqual(len(target.chain), 1)
+                target.close()
+                stream.seek(0)
+
+    def test_unsigned_history_needs_opt_in(self):
+        # The source chain's transfers are unsigned, as on chains from before signing
+        with tempfile.TemporaryDirectory() as data_dir:
+            target = Blockchain(data_dir)
+            target.difficulty = 1
+            with self.assertRaisesRegex(ValueError, "not signed"):
+                import_chain(target, self.export(), workers=1)
+            target.close()
+
+            target = new_chain(data_dir)
+            import_chain(target, self.export(), workers=1)
+            target.close()
+            # A stored chain is loaded without re-checking signatures
+            reopened = Blockchain(data_dir)
+            reopened.difficulty = 1
+            self.assertTrue(reopened.require_signatures)
+            self.assert_same_state(reopened)
+            reopened.close()
+
+    def test_untrusted_hash_rolls_back(self):
+        target = new_chain()
+        with self.assertRaises(ValueError):
+            import_chain(target, self.export(), trusted_hash="0" * 64, batch_size=5)
+        self.assertEqual(len(target.chain), 1)
+        self.assertEqual(target.get_balance("Alice"), 0)
+        target.close()
+
+    def test_trusted_failure_rolls_back_earlier_batches(self):
+        truncated = self.export().getvalue()[:-5]
+        target = new_chain()
+        with self.assertRaises(ValueError):
+            import_chain(target, io.BytesIO(truncated), trusted_hash=self.source.get_latest_block().hash,
+                         batch_size=2, workers=1)
+        self.assertEqual(len(target.chain), 1)
+        self.assertEqual(target.get_balance("Alice"), 0)
+        target.close()
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            import_chain(new_chain(), io.BytesIO(b"\0" * EXPORT_HEADER.size))
+        truncated = self.export().getvalue()[:-1]
+        with self.assertRaises(ValueError):
+            import_chain(new_chain(), io.BytesIO(truncated), workers=1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import io
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from src.block import Block, JSON_BLOCK_VERSION
+from src.blockchain import Blockchain
+from src.codec import (CODEC_VERSION, decode_block, decode_transaction, encode_block, encode_transaction, from_cents,
+                       iter_blocks, read_blocks, to_cents, write_blocks)
+from src.storage import BlockStore, _encode_json_block
+from src.transaction import Transaction
+
+class TestCodec(unittest.TestCase):
+    def setUp(self):
+        self.blockchain = Blockchain(require_signatures=False)
+        self.blockchain.difficulty = 1
+        self.blockchain.mine_pending_transactions("Alice")
+        self.blockchain.add_transaction(Transaction("Alice", "Böb", Decimal("2.5"), fee=Decimal("0.25")))
+        self.blockchain.mine_pending_transactions("Miner1")
+
+    def test_cents(self):
+        self.assertEqual(to_cents(Decimal("12.34")), 1234)
+        self.assertEqual(to_cents(Decimal("-3")), -300)
+        self.assertEqual(from_cents(1234), Decimal("12.34"))
+        with self.assertRaises(ValueError):
+            to_cents(Decimal("0.001"))
+
+    def test_transaction_round_trip(self):
+        tx = Transaction("Alice", "Bob", Decimal("2.5"), fee=Decimal("0.25"))
+        data = b"xx" + encode_transaction(tx)
+        for verify in (True, False):
+            decoded, end = decode_transaction(memoryview(data), 2, verify)
+            self.assertEqual(end, len(data))
+            self.assertEqual((decoded.id, decoded.sender, decoded.recipient, decoded.amount, decoded.fee,
+                              decoded.timestamp), (tx.id, "Alice", "Bob", Decimal("2.5"), Decimal("0.25"),
+                                                   tx.timestamp))
+
+    def test_tampered_transaction_rejected(self):
+        data = bytearray(encode_transaction(Transaction("Alice", "Bob", Decimal(5))))
+        data[32] += 1  # amount in cents
+        with self.assertRaises(ValueError):
+            decode_transaction(data)
+        with self.assertRaises(ValueError):
+            decode_transaction(data[:-1])
+
+    def test_block_round_trip(self):
+        for height, block in enumerate(self.blockchain.chain):
+            decoded, end = decode_block(encode_block(block))
+            self.assertEqual(decoded.hash, block.hash)
+            self.assertEqual(decoded.previous_hash, block.previous_hash)
+            self.assertEqual(decoded.calculate_hash(), block.hash, height)
+            self.assertEqual([t.id for t in decoded.transactions], [t.id for t in block.transactions])
+
+        json_block = Block([Transaction("Alice", "Bob", Decimal(1))], "ab" * 32, version=JSON_BLOCK_VERSION)
+        json_block.mine(1)
+        decoded, _ = decode_block(encode_block(json_block))
+        self.assertEqual(decoded.calculate_hash(), json_block.hash)
+
+    def test_block_streams(self):
+        stream = io.BytesIO()
+        self.assertEqual(write_blocks(stream, self.blockchain.chain), 3)
+        data = stream.getvalue()
+        stream.seek(0)
+        expected = [block.hash for block in self.blockchain.chain]
+        self.assertEqual([block.hash for block in read_blocks(stream)], expected)
+        self.assertEqual([block.hash for block in iter_blocks(memoryview(data), verify=False)], expected)
+        with self.assertRaises(ValueError):
+            list(iter_blocks(data[:-1]))
+        with self.assertRaises(ValueError):
+            list(read_blocks(io.BytesIO(data[:-1])))
+
+    def test_store_reads_json_and_sub_cent_blocks(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            store = BlockStore(data_dir)
+            store.append(self.blockchain.chain[0])
+            sub_cent = Block([Transaction("Alice", "Bob", Decimal("0.001"))], self.blockchain.chain[0].hash)
+            store.append(sub_cent)
+            store.close()
+
+            # A store written before the binary format: JSON records throughout
+            with open(os.path.join(data_dir, "blocks.dat"), "rb") as f:
+                f.seek(4)
+                self.assertEqual(f.read(1), bytes([CODEC_VERSION]))
+            legacy_dir = os.path.join(data_dir, "legacy")
+            legacy = BlockStore(legacy_dir)
+            legacy.append(self.blockchain.chain[1])
+            legacy.close()
+            payload = _encode_json_block(self.blockchain.chain[1])
+            with open(os.path.join(legacy_dir, "blocks.dat"), "wb") as f:
+                f.write(len(payload).to_bytes(4, "little") + payload)
+            with open(os.path.join(legacy_dir, "blocks.idx"), "r+b") as f:
+                f.seek(8)
+                f.write(len(payload).to_bytes(4, "little"))
+
+            store = BlockStore(data_dir, cache_size=0)
+            self.assertEqual(store[1].transactions[0].amount, Decimal("0.001"))
+            store.close()
+            legacy = BlockStore(legacy_dir, cache_size=0)
+            self.assertEqual(legacy[0].calculate_hash(), self.blockchain.chain[1].hash)
+            legacy.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import random
+import threading
+import unittest
+from collections import Counter
+from decimal import Decimal
+from src.blockchain import Blockchain, SYSTEM_SENDERS
+from src.config import MINING_REWARD
+from src.locks import RWLock
+from src.transaction import Transaction
+
+class TestRWLock(unittest.TestCase):
+    def test_readers_share_writer_excludes(self):
+        lock = RWLock()
+        both_reading = threading.Barrier(2, timeout=5)
+
+        def reader():
+            with lock.read():
+                both_reading.wait()  # would time out if readers excluded each other
+
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        events = []
+
+        def write():
+            with lock.write():
+                events.append("write")
+
+        lock.acquire_read()
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer.join(0.05)
+        self.assertEqual(events, [])  # blocked behind the reader
+        lock.release_read()
+        writer.join(5)
+        self.assertEqual(events, ["write"])
+
+class TestConcurrentBlockchain(unittest.TestCase):
+    ACCOUNTS = [f"acct{i}" for i in range(6)]
+
+    def setUp(self):
+        self.blockchain = Blockchain(require_signatures=False)
+        self.blockchain.difficulty = 1
+        self.blockchain.max_block_transactions = 25  # force carry-over between blocks
+        # Ten mining rewards each
+        for account in self.ACCOUNTS:
+            for _ in range(10):
+                self.blockchain.mine_pending_transactions(account)
+
+    def supply(self):
+        # System senders issue coins, so their own balances run negative
+        return sum(v for k, v in self.blockchain.balances.items() if k not in SYSTEM_SENDERS)
+
+    def test_stress_no_lost_or_double_counted_funds(self):
+        blockchain = self.blockchain
+        initial_supply = self.supply()
+        initial_height = len(blockchain.chain)
+        accepted = []
+        violations = []
+        submitting = threading.Event()
+        submitting.set()
+
+        def submitter(seed):
+            rng = random.Random(seed)
+            for _ in range(250):
+                sender, recipient = rng.sample(self.ACCOUNTS, 2)
+                tx = Transaction(sender, recipient, Decimal(rng.randint(1, 40)),
+                                 fee=Decimal(rng.choice(["0", "0.25"])))
+                try:
+                    blockchain.add_transaction(tx)
+                    accepted.append(tx.id)
+                except ValueError:
+                    pass  # insufficient funds is expected under contention
+
+        def miner():
+            while submitting.is_set():
+                blockchain.mine_pending_transactions("Miner")
+
+        def reader():
+            while submitting.is_set():
+                for account in self.ACCOUNTS:
+                    if blockchain.get_spendable_balance(account) < 0 or blockchain.get_balance(account) < 0:
+                        violations.append(account)
+
+        def verifier():
+            # Concurrent checks share the read lock but must keep the checkpoint pair consistent
+            while submitting.is_set():
+                if not blockchain.verify_chain().valid:
+                    violations.append("verify_chain")
+
+        submitters = [threading.Thread(target=submitter, args=(seed,)) for seed in range(4)]
+        others = ([threading.Thread(target=miner)] + [threading.Thread(target=reader) for _ in range(2)]
+                  + [threading.Thread(target=verifier) for _ in range(2)])
+        for thread in submitters + others:
+            thread.start()
+        for thread in submitters:
+            thread.join()
+        submitting.clear()
+        for thread in others:
+            thread.join()
+        while blockchain.pending_transactions:
+            blockchain.mine_pending_transactions("Miner")
+
+        self.assertEqual(violations, [])
+        self.assertTrue(accepted)
+
+        # Every accepted transfer was mined exactly once
+        mined = Counter(tx.id for block in blockchain.chain[initial_height:]
+                        for tx in block.transactions if tx.sender != "System")
+        self.assertEqual(mined, Counter(accepted))
+
+        # Money is only created by block rewards (fees move from senders to the miner)
+        blocks_mined = len(blockchain.chain) - initial_height
+        self.assertEqual(self.supply(), initial_supply + MINING_REWARD * blocks_mined)
+        self.assertTrue(all(blockchain.get_balance(account) >= 0 for account in self.ACCOUNTS))
+
+        # The balance cache matches a replay of the chain
+        replayed = {}
+        for block in blockchain.chain:
+            Blockchain._apply_block(replayed, block)
+        self.assertEqual(replayed, blockchain.balances)
+        self.assertTrue(blockchain.is_chain_valid())
+        self.assertEqual(blockchain.chain[blockchain.validated_height].hash, blockchain.validated_hash)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import time
+import unittest
+from decimal import Decimal
+from src.block import Block
+from src.blockchain import Blockchain
+from src.difficulty import MAX_TARGET, TargetSchedule, retarget
+from src.mining import difficulty_to_target, meets_target, target_work
+from src.transaction import Transaction
+
+class TestRetarget(unittest.TestCase):
+    def test_scales_with_observed_time(self):
+        self.assertEqual(retarget(1000, 50, 100), 500)   # twice too fast: half the target
+        self.assertEqual(retarget(1000, 200, 100), 2000)
+        self.assertEqual(retarget(1000, 1, 100), 250)    # clamped to 4x
+        self.assertEqual(retarget(1000, -5, 100), 250)   # skewed timestamps are clamped too
+        self.assertEqual(retarget(MAX_TARGET, 400, 100), MAX_TARGET)
+
+    def test_target_helpers(self):
+        self.assertEqual(target_work(difficulty_to_target(2)), 16 ** 2)
+        self.assertTrue(meets_target("00ff" + "f" * 60, difficulty_to_target(2)))
+        self.assertFalse(meets_target("01" + "0" * 62, difficulty_to_target(2)))
+
+    def test_schedule(self):
+        initial = difficulty_to_target(1)
+        timestamps = [float(h * 5) for h in range(12)]  # 5s blocks against a 10s aim
+        schedule = TargetSchedule(initial, 4, 10.0)
+        timestamp_at = timestamps.__getitem__
+        self.assertEqual([schedule.target_at(h, timestamp_at) for h in (1, 4, 5, 8, 9)],
+                         [initial, initial, initial // 2, initial // 2, initial // 4])
+        self.assertEqual(schedule.work(1, 10, timestamp_at),
+                         sum(target_work(schedule.target_at(h, timestamp_at)) for h in range(1, 10)))
+
+        # Rolling back below a period boundary recomputes it from the new timestamps
+        schedule.truncate(7)
+        timestamps[8] = 60.0  # this period took the aimed-for 40s, so the target holds
+        self.assertEqual(schedule.target_at(9, timestamp_at), initial // 2)
+        self.assertEqual(TargetSchedule(initial, 0, 10.0).target_at(1000, timestamp_at), initial)
+
+    def test_first_period_ignores_genesis_time(self):
+        # The chain starts long after the fixed genesis timestamp, then keeps to the aim
+        initial = difficulty_to_target(1)
+        timestamp_at = ([0.0] + [1e6 + h * 10.0 for h in range(1, 12)]).__getitem__
+        self.assertEqual([TargetSchedule(initial, interval, 10.0).target_at(9, timestamp_at) for interval in (1, 4)],
+                         [initial, initial])
+
+class TestChainRetargeting(unittest.TestCase):
+    def setUp(self):
+        self.blockchain = Blockchain()
+        self.blockchain.difficulty = 1
+        self.blockchain.retarget_interval = 2
+        self.blockchain.target_block_time = 10.0
+
+    def make_block(self, timestamp: float, target: int) -> Block:
+        tx = Transaction("System", "Miner1", Decimal(10), timestamp)
+        block = Block([tx], self.blockchain.get_latest_block().hash, timestamp)
+        block.mine(self.blockchain.difficulty, 1, target)
+        return block
+
+    def extend(self, *timestamps: float):
+        for timestamp in timestamps:
+            self.blockchain.add_blocks([self.make_block(timestamp, self.blockchain.next_target())])
+
+    def test_fast_blocks_raise_difficulty(self):
+        start = self.blockchain.chain[0].timestamp
+        initial = self.blockchain.next_target()
+        self.extend(start + 1, start + 2)     # 2 blocks in 2s instead of 20s
+        self.assertEqual(self.blockchain.next_target(), initial // 4)
+        self.extend(start + 42, start + 82)   # 40s blocks: back to where it started
+        self.assertEqual(self.blockchain.next_target(), initial // 4 * 4)
+        self.assertTrue(self.blockchain.is_chain_valid())
+        self.assertEqual(self.blockchain.chain_work(), 2 * 16 + 2 * 64)
+
+    def test_easy_block_rejected(self):
+        start = self.blockchain.chain[0].timestamp
+        self.extend(start + 1, start + 2)
+        required = self.blockchain.next_target()
+
+        # A block that meets the starting target but not the retargeted one
+        easy = self.make_block(start + 3, difficulty_to_target(1))
+        while meets_target(easy.hash, required):
+            easy = self.make_block(easy.timestamp + 1, difficulty_to_target(1))
+        with self.assertRaisesRegex(ValueError, "required target"):
+            self.blockchain.add_blocks([easy])
+
+        self.blockchain.chain.append(easy)
+        result = self.blockchain.verify_chain(full=True)
+        self.assertFalse(result.valid)
+        self.assertEqual(result.first_invalid_index, 3)
+
+    def test_branch_targets_follow_branch_timestamps(self):
+        start = self.blockchain.chain[0].timestamp
+        self.extend(start + 1, start + 2, start + 3)
+        initial = difficulty_to_target(1)
+        # A branch from height 1 whose first block arrives on time keeps the target
+        self.assertEqual(self.blockchain.branch_targets(1, [start + 11, start + 21]), [initial, initial])
+        self.assertEqual(self.blockchain.next_target(), initial // 4)
+
+    def test_block_timestamps_checked(self):
+        self.blockchain.retarget_interval = 0
+        start = self.blockchain.chain[0].timestamp
+        self.extend(start + 10, start + 20, start + 30)
+        # The median of the last blocks, not the tip, is the floor
+        for timestamp, error in ((start + 10, "median"), (time.time() + 3 * 60 * 60, "future")):
+            block = self.make_block(timestamp, self.blockchain.next_target())
+            for add in (self.blockchain.add_blocks, self.blockchain.import_blocks):
+                with self.assertRaisesRegex(ValueError, error):
+                    add([block])
+        self.extend(start + 15)
+
+        # Mined blocks stay after the median even when peers' clocks run ahead of ours
+        self.extend(*(time.time() + 60 * 60 + i for i in range(6)))
+        block = self.blockchain.mine_pending_transactions("Miner1")
+        self.assertGreater(block.timestamp, self.blockchain.chain[5].timestamp)
+
+if __name__ == '__main__':
+    unittest.main()
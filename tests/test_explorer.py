@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from decimal import Decimal
+from src.blockchain import Blockchain
+from src.explorer import pack_location, unpack_location
+from src.transaction import Transaction
+
+class TestExplorer(unittest.TestCase):
+    def setUp(self):
+        self.blockchain = Blockchain(require_signatures=False)
+        self.blockchain.difficulty = 1
+        self.blockchain.mine_pending_transactions("Alice")  # block 1: Alice gets 10
+        self.transfers = []
+        for amount in (1, 2, 3):
+            tx = Transaction("Alice", "Bob", Decimal(amount))
+            self.blockchain.add_transaction(tx)
+            self.blockchain.mine_pending_transactions("Miner1")  # blocks 2-4
+            self.transfers.append(tx)
+
+    def test_location_packing(self):
+        self.assertEqual(unpack_location(pack_location(123456, 789)), (123456, 789))
+        with self.assertRaises(ValueError):
+            pack_location(1, 1 << 20)
+
+    def test_address_history_pagination(self):
+        explorer = self.blockchain.explorer
+        self.assertEqual(explorer.address_transaction_count("Bob"), 3)
+
+        newest = explorer.address_history("Bob", limit=2)
+        self.assertEqual([entry.transaction for entry in newest], [self.transfers[2], self.transfers[1]])
+        self.assertEqual([entry.height for entry in newest], [4, 3])
+
+        rest = explorer.address_history("Bob", offset=2, limit=2)
+        self.assertEqual([entry.transaction for entry in rest], [self.transfers[0]])
+
+        oldest = explorer.address_history("Alice", newest_first=False)
+        self.assertEqual(oldest[0].height, 1)  # reward received before any transfer
+        self.assertEqual(len(oldest), 4)
+        self.assertEqual(explorer.address_history("Nobody"), [])
+
+    def test_find_transaction(self):
+        found = self.blockchain.explorer.find_transaction(self.transfers[1].id)
+        self.assertEqual((found.height, found.position), (3, 0))
+        self.assertIs(found.transaction, self.blockchain.chain[3].transactions[0])
+        self.assertIsNone(self.blockchain.explorer.find_transaction("00" * 32))
+
+    def test_block_pages(self):
+        explorer = self.blockchain.explorer
+        self.assertEqual([h for h, _ in explorer.blocks_page(0, 2)], [0, 1])
+        self.assertEqual([h for h, _ in explorer.blocks_page(2, 2)], [4])
+        self.assertEqual([h for h, _ in explorer.blocks_page(0, 2, newest_first=True)], [4, 3])
+        self.assertEqual([h for h, _ in explorer.blocks_page(2, 2, newest_first=True)], [0])
+        self.assertEqual(explorer.blocks_page(5, 2), [])
+
+    def test_queries_wait_for_state_changes(self):
+        explorer = self.blockchain.explorer
+        explorer.history  # built up front; building takes the lock itself
+        queries = [lambda: explorer.find_transaction(self.transfers[0].id), lambda: explorer.find_block("00"),
+                   lambda: explorer.address_history("Bob"), lambda: explorer.blocks_page(0),
+                   lambda: list(explorer.iter_blocks())]
+        for query in queries:
+            done = threading.Event()
+            thread = threading.Thread(target=lambda: (query(), done.set()))
+            with self.blockchain._state_lock.write():
+                thread.start()
+                self.assertFalse(done.wait(0.05))
+            self.assertTrue(done.wait(5))
+            thread.join()
+
+    def test_history_after_snapshot_restart(self):
+        data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_dir)
+        chain = Blockchain(data_dir, require_signatures=False)
+        chain.difficulty = 1
+        chain.mine_pending_transactions("Alice")
+        chain.save_snapshot()
+        tx = Transaction("Alice", "Bob", Decimal(4))
+        chain.add_transaction(tx)
+        chain.mine_pending_transactions("Miner1")
+        chain.close()
+
+        # Balances come from the snapshot; history is built on first query
+        restarted = Blockchain(data_dir, require_signatures=False)
+        self.addCleanup(restarted.close)
+        self.assertIsNone(restarted.history)
+        self.assertEqual(restarted.explorer.find_transaction(tx.id).height, 2)
+        self.assertEqual(restarted.explorer.address_transaction_count("Alice"), 2)
+
+        restarted.difficulty = 1
+        restarted.mine_pending_transactions("Alice")
+        self.assertEqual(restarted.explorer.address_history("Alice", limit=1)[0].height, 3)
+
+if __name__ == '__main__':
+    unittest.main()
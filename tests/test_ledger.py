@@ -0,0 +1,105 @@
+import hashlib
+import json
+import tempfile
+import unittest
+from decimal import Decimal
+from src.blockchain import Blockchain
+from src.block import Block
+from src.snapshot import snapshot_path
+from src.transaction import Transaction, canonical_amount
+
+def float_id(tx):
+    """
+    Transaction id as computed when amounts were hashed as floats.
+    """
+    content = {"amount": float(tx.amount)}
+    if tx.fee:
+        content["fee"] = float(tx.fee)
+    content.update(recipient=tx.recipient, sender=tx.sender, timestamp=tx.timestamp)
+    return hashlib.sha256(json.dumps(content, separators=(', ', ': ')).encode()).hexdigest()
+
+class TestCanonicalAmounts(unittest.TestCase):
+    def test_ids_unchanged_for_whole_cents(self):
+        for amount, fee in (("10", "0"), ("12.50", "0.10"), ("0.05", "0.01"), ("99999999999.99", "1"),
+                            ("1.1", "0"), ("0.001", "0")):
+            for timestamp in (1700000000.123, 1700000000):
+                tx = Transaction("Ålice", 'Bob "B"', Decimal(amount), timestamp, fee=Decimal(fee))
+                self.assertEqual(tx.id, float_id(tx))
+
+    def test_exact_amounts(self):
+        self.assertEqual(canonical_amount(Decimal("12.50")), "12.5")
+        self.assertEqual(canonical_amount(Decimal("3")), "3.0")
+        self.assertEqual(canonical_amount(Decimal("0.0010")), "0.001")
+        # Beyond float precision the amounts used to collide
+        big = Decimal("12345678901234567.01")
+        self.assertEqual(canonical_amount(big), "12345678901234567.01")
+        ids = {Transaction("A", "B", big + n, 1.0).id for n in range(3)}
+        self.assertEqual(len(ids), 3)
+
+    def test_cents(self):
+        tx = Transaction("A", "B", Decimal("12.34"), fee=Decimal("0.10"))
+        self.assertEqual((tx.cents, tx.cost_cents), (1234, 1244))
+        sub_cent = Transaction("A", "B", Decimal("0.001"))
+        self.assertEqual((sub_cent.cents, sub_cent.cost_cents), (None, None))
+        self.assertIsNone(Transaction("A", "B", Decimal(1), fee=Decimal("0.005")).cost_cents)
+
+class TestCentsLedger(unittest.TestCase):
+    def open_chains(self, data_dir=None):
+        chains = Blockchain(data_dir, ledger_cents=True, require_signatures=False), Blockchain(require_signatures=False)
+        for blockchain in chains:
+            blockchain.difficulty = 1
+        return chains
+
+    def run_both(self, chains, action):
+        for blockchain in chains:
+            action(blockchain)
+
+    def test_matches_decimal_ledger(self):
+        cents, decimal = chains = self.open_chains()
+        self.run_both(chains, lambda b: b.mine_pending_transactions("Alice"))
+        self.run_both(chains, lambda b: b.add_transaction(
+            Transaction("Alice", "Bob", Decimal("2.50"), 1700000001.0, Decimal("0.25"))))
+        self.run_both(chains, lambda b: self.assertFalse(b.add_transactions(
+            [Transaction("Bob", "Carol", Decimal(3), 1700000002.0)])[0].accepted))
+
+        self.assertEqual(cents.get_spendable_balance("Alice"), Decimal("7.25"))
+        self.assertEqual(cents.pending_outflows, {"Alice": Decimal("2.75")})
+        self.run_both(chains, lambda b: b.mine_pending_transactions("Miner"))
+        self.assertEqual(cents.balances["Alice"], 725)
+        for address in ("Alice", "Bob", "Miner", "Nobody"):
+            self.assertEqual(cents.get_balance(address), decimal.get_balance(address))
+            self.assertIsInstance(cents.get_balance(address), Decimal)
+
+        cents.rewind(1)
+        self.assertEqual(cents.get_balance("Bob"), 0)
+        self.assertEqual(cents.balances["Alice"], 1000)
+
+    def test_sub_cent_amounts_rejected(self):
+        cents, _ = self.open_chains()
+        with self.assertRaisesRegex(ValueError, "whole cents"):
+            cents.add_transaction(Transaction("Alice", "Bob", Decimal("0.001")))
+        block = Block([Transaction("Alice", "Bob", Decimal("0.001")), Transaction("System", "Miner", Decimal(10))],
+                      cents.get_latest_block().hash)
+        block.mine(1, 1, cents.next_target())
+        with self.assertRaisesRegex(ValueError, "fractions of a cent"):
+            cents.add_blocks([block])
+
+    def test_snapshots_store_zar(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            cents = Blockchain(data_dir, ledger_cents=True, require_signatures=False)
+            cents.difficulty = 1
+            cents.mine_pending_transactions("Alice")
+            cents.add_transaction(Transaction("Alice", "Bob", Decimal("3.25")))
+            cents.mine_pending_transactions("Miner")
+            cents.save_snapshot()
+            self.assertTrue(cents.verify_snapshot(snapshot_path(data_dir, 2)))
+            cents.close()
+
+            # Either ledger can start from the snapshot
+            for ledger_cents, expected in ((False, Decimal("3.25")), (True, 325)):
+                reopened = Blockchain(data_dir, ledger_cents=ledger_cents, require_signatures=False)
+                self.assertEqual(reopened.balances["Bob"], expected)
+                reopened.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from decimal import Decimal
+from src.blockchain import Blockchain
+from src.mempool import Mempool, MempoolFullError, PRIORITY_AGE
+from src.transaction import Transaction
+
+class TestMempool(unittest.TestCase):
+    def tx(self, sender, amount, fee=0, timestamp=None):
+        return Transaction(sender, "Bob", Decimal(amount), timestamp, fee=Decimal(fee))
+
+    def test_selects_by_fee_then_age(self):
+        pool = Mempool(10)
+        low = self.tx("A", 1, fee="0.10", timestamp=1.0)
+        high = self.tx("B", 1, fee="0.50", timestamp=2.0)
+        tie = self.tx("C", 1, fee="0.10", timestamp=3.0)
+        for tx in (low, high, tie):
+            pool.add(tx)
+        self.assertEqual(pool.select(3), [high, low, tie])
+        self.assertEqual(pool.select(1), [high])
+
+    def test_age_policy(self):
+        pool = Mempool(10, PRIORITY_AGE)
+        first = self.tx("A", 1, fee=5, timestamp=1.0)
+        second = self.tx("B", 1, fee=9, timestamp=2.0)
+        pool.add(first)
+        pool.add(second)
+        self.assertEqual(pool.select(2), [first, second])
+
+    def test_eviction_keeps_outflows_consistent(self):
+        pool = Mempool(2)
+        cheap = self.tx("A", 5, fee="0.01", timestamp=1.0)
+        pool.add(cheap)
+        pool.add(self.tx("A", 3, fee="0.20", timestamp=2.0))
+        self.assertEqual(pool.outflows, {"A": Decimal("8.21")})
+
+        # A richer transaction evicts the cheapest entry and releases its outflow
+        evicted = pool.add(self.tx("B", 2, fee="1.00", timestamp=3.0))
+        self.assertEqual(evicted, [cheap])
+        self.assertEqual(pool.outflows, {"A": Decimal("3.20"), "B": Decimal("3.00")})
+
+        # Nothing outranks a zero fee when full
+        with self.assertRaises(MempoolFullError):
+            pool.add(self.tx("C", 1, timestamp=4.0))
+        self.assertEqual(len(pool), 2)
+
+    def test_remove_releases_outflows(self):
+        pool = Mempool(10, exempt_senders=["System"])
+        tx = self.tx("A", 4, fee=1)
+        pool.add(tx)
+        pool.add(Transaction("System", "A", Decimal(10)))
+        self.assertEqual(pool.outflows, {"A": Decimal(5)})
+        pool.remove([tx])
+        self.assertEqual(pool.outflows, {})
+        self.assertEqual(len(pool), 1)
+
+class TestMempoolMining(unittest.TestCase):
+    def setUp(self):
+        self.blockchain = Blockchain(require_signatures=False)
+        self.blockchain.difficulty = 1
+        self.blockchain.mine_pending_transactions("Alice")  # Alice gets 10
+
+    def test_block_size_limit_carries_over(self):
+        self.blockchain.max_block_transactions = 2
+        for i in range(3):
+            self.blockchain.add_transaction(Transaction("Alice", "Bob", Decimal(2), fee=Decimal(i)))
+
+        self.blockchain.mine_pending_transactions("Miner1")
+        self.assertEqual(len(self.blockchain.chain[-1].transactions), 3)  # 2 + reward
+        self.assertEqual(len(self.blockchain.pending_transactions), 1)
+        # The carried-over transaction (lowest fee) keeps its reservation
+        self.assertEqual(self.blockchain.pending_outflows, {"Alice": Decimal(2)})
+        self.assertEqual(self.blockchain.get_balance("Alice"), Decimal(3))
+        self.assertEqual(self.blockchain.get_spendable_balance("Alice"), Decimal(1))
+
+    def test_fees_paid_to_miner(self):
+        self.blockchain.add_transaction(Transaction("Alice", "Bob", Decimal(5), fee=Decimal("1.50")))
+        with self.assertRaises(ValueError):
+            # 5 + 1.50 already reserved; 4 more would overdraw
+            self.blockchain.add_transaction(Transaction("Alice", "Bob", Decimal(3), fee=Decimal(1)))
+
+        self.blockchain.mine_pending_transactions("Miner1")
+        self.assertEqual(self.blockchain.get_balance("Alice"), Decimal("3.50"))
+        self.assertEqual(self.blockchain.get_balance("Bob"), Decimal(5))
+        self.assertEqual(self.blockchain.get_balance("Miner1"), Decimal("11.50"))
+        self.assertTrue(self.blockchain.is_chain_valid())
+
+if __name__ == '__main__':
+    unittest.main()
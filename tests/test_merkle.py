@@ -0,0 +1,100 @@
+import hashlib
+import unittest
+from decimal import Decimal
+from src.block import Block
+from src.blockchain import Blockchain
+from src.merkle import MerkleTree, merkle_root, verify_proof, EMPTY_ROOT
+from src.transaction import Transaction
+
+def make_ids(count):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(count)]
+
+class TestMerkleTree(unittest.TestCase):
+    def test_empty_tree(self):
+        self.assertEqual(merkle_root([]), EMPTY_ROOT)
+
+    def test_proofs_verify_for_every_leaf(self):
+        for count in range(1, 10):
+            tx_ids = make_ids(count)
+            tree = MerkleTree(tx_ids)
+            root = tree.root.hex()
+            for index, tx_id in enumerate(tx_ids):
+                proof = tree.proof(index)
+                self.assertTrue(verify_proof(tx_id, proof, root))
+                self.assertLessEqual(len(proof), count.bit_length())
+
+    def test_proof_rejects_other_transaction(self):
+        tx_ids = make_ids(5)
+        tree = MerkleTree(tx_ids)
+        proof = tree.proof(2)
+        self.assertFalse(verify_proof(tx_ids[3], proof, tree.root.hex()))
+
+    def test_update_matches_rebuild(self):
+        tx_ids = make_ids(7)
+        tree = MerkleTree(tx_ids)
+        replacement = hashlib.sha256(b"replacement").hexdigest()
+        tree.update(6, replacement)
+        tx_ids[6] = replacement
+        self.assertEqual(tree.root, merkle_root(tx_ids))
+
+    def test_repeated_odd_tail_is_mutated(self):
+        # [a, b, c, c] shares [a, b, c]'s root, so only the first is accepted
+        tx_ids = make_ids(3)
+        mutated = MerkleTree(tx_ids + tx_ids[-1:])
+        self.assertEqual(mutated.root, merkle_root(tx_ids))
+        self.assertTrue(mutated.mutated)
+        # The same one level up: [a..f, e, f] shares [a..f]'s root
+        tx_ids = make_ids(6)
+        mutated = MerkleTree(tx_ids + tx_ids[4:])
+        self.assertEqual(mutated.root, merkle_root(tx_ids))
+        self.assertTrue(mutated.mutated)
+        self.assertFalse(any(MerkleTree(make_ids(count)).mutated for count in range(10)))
+
+class TestBlockInclusionProofs(unittest.TestCase):
+    def test_block_proof_and_cache_refresh(self):
+        transactions = [Transaction("Alice", "Bob", Decimal(i + 1)) for i in range(6)]
+        block = Block(transactions, "0")
+        target = transactions[4]
+
+        proof = block.get_inclusion_proof(target.id)
+        self.assertTrue(verify_proof(target.id, proof, block.merkle_root))
+
+        # Replacing a transaction must be reflected in the cached tree
+        original_root = block.merkle_root
+        block.transactions[0] = Transaction("Mallory", "Bob", Decimal(1000))
+        self.assertNotEqual(block.merkle_root, original_root)
+        self.assertFalse(verify_proof(target.id, proof, block.merkle_root))
+        self.assertNotEqual(block.hash, block.calculate_hash())
+
+    def test_mutated_block_rejected(self):
+        source = Blockchain(require_signatures=False)
+        source.difficulty = 1
+        source.mine_pending_transactions("Alice")
+        for amount in (1, 2):
+            source.add_transaction(Transaction("Alice", "Bob", Decimal(amount)))
+        block = source.mine_pending_transactions("Miner")
+        self.assertEqual(len(block.transactions), 3)
+
+        # Repeating the odd last transaction keeps the header hash and its proof of work
+        mutated = Block.restore(block.transactions + block.transactions[-1:], block.previous_hash,
+                                block.timestamp, block.nonce, block.hash, block.version)
+        self.assertEqual(mutated.calculate_hash(), block.hash)
+        self.assertFalse(mutated.has_valid_hash())
+        self.assertTrue(block.has_valid_hash())
+
+        target = Blockchain(require_signatures=False)
+        target.difficulty = 1
+        target.add_blocks([source.chain[1]])
+        with self.assertRaisesRegex(ValueError, "hash does not match"):
+            target.import_blocks([mutated], verify=False)
+        with self.assertRaisesRegex(ValueError, "hash does not match"):
+            target.add_blocks([mutated])
+        self.assertEqual(len(target.chain), 2)
+
+    def test_missing_transaction(self):
+        block = Block([Transaction("Alice", "Bob", Decimal(1))], "0")
+        with self.assertRaises(ValueError):
+            block.get_inclusion_proof("00" * 32)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import pstats
+import tempfile
+import unittest
+from decimal import Decimal
+from src.block import Block
+from src.blockchain import Blockchain
+from src.metrics import METRICS, Registry, profiling, serve_metrics
+from src.transaction import Transaction
+
+class TestRegistry(unittest.TestCase):
+    def test_render(self):
+        registry = Registry(enabled=True)
+        rejected = registry.counter("rejected_total", "Rejections.")
+        rejected.inc(reason="pool_full")
+        rejected.inc(2, reason='say "hi"')
+        latency = registry.histogram("latency_seconds", "Latency.", [0.1, 1])
+        for value in (0.05, 0.5, 5):
+            latency.observe(value)
+        registry.gauge("rate", "Rate.").set(2.5)
+        self.assertIs(registry.counter("rejected_total", "Rejections."), rejected)
+
+        self.assertEqual(registry.render().splitlines(), [
+            "# HELP latency_seconds Latency.",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1"} 2',
+            'latency_seconds_bucket{le="+Inf"} 3',
+            "latency_seconds_sum 5.55",
+            "latency_seconds_count 3",
+            "# HELP rate Rate.",
+            "# TYPE rate gauge",
+            "rate 2.5",
+            "# HELP rejected_total Rejections.",
+            "# TYPE rejected_total counter",
+            'rejected_total{reason="pool_full"} 1',
+            'rejected_total{reason="say \\"hi\\""} 2',
+        ])
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        METRICS.reset()
+        METRICS.enabled = True
+        self.blockchain = Blockchain(require_signatures=False)
+        self.blockchain.difficulty = 1
+
+    def tearDown(self):
+        METRICS.enabled = False
+        METRICS.reset()
+        self.blockchain.close()
+
+    def test_hot_paths_recorded(self):
+        self.blockchain.balances["Alice"] = Decimal(10)  # funded without mining a block
+        transfer = Transaction("Alice", "Dave", Decimal(10))
+        self.blockchain.add_transaction(transfer)
+        for tx in (Transaction("Bob", "Alice", Decimal(5)), transfer, Transaction("System", "Alice", Decimal(10))):
+            with self.assertRaises(ValueError):
+                self.blockchain.add_transaction(tx)
+        results = self.blockchain.add_transactions([Transaction("Carol", "Alice", Decimal(1))])
+        self.assertFalse(results[0].accepted)
+        block = self.blockchain.mine_pending_transactions("Miner")
+        self.assertTrue(self.blockchain.is_chain_valid())
+
+        self.assertEqual(METRICS.get("randcoin_transactions_accepted_total").value(), 1)
+        rejected = METRICS.get("randcoin_transactions_rejected_total")
+        self.assertEqual(rejected.value(reason="insufficient_funds"), 2)
+        self.assertEqual(rejected.value(reason="duplicate"), 1)
+        self.assertEqual(rejected.value(reason="system_sender"), 1)
+        self.assertEqual(METRICS.get("randcoin_add_transaction_seconds").count, 4)
+        self.assertEqual(METRICS.get("randcoin_block_mine_attempts").sum, block.nonce + 1)
+        self.assertEqual(METRICS.get("randcoin_mining_hashes_total").value(), block.nonce + 1)
+        self.assertEqual(METRICS.get("randcoin_verify_chain_seconds").count, 1)
+        self.assertEqual(METRICS.get("randcoin_blocks_verified_total").value(), 1)
+        # Genesis (replayed on start-up) and the mined block
+        self.assertEqual(METRICS.get("randcoin_update_balance_seconds").count, 2)
+        self.assertIn('randcoin_transactions_rejected_total{reason="insufficient_funds"} 2', METRICS.render())
+
+    def test_disabled_records_nothing(self):
+        METRICS.enabled = False
+        self.blockchain.mine_pending_transactions("Alice")
+        self.blockchain.add_transaction(Transaction("Alice", "Bob", Decimal(10)))
+        self.blockchain.mine_pending_transactions("Miner")
+        self.assertEqual(METRICS.get("randcoin_transactions_accepted_total").value(), 0)
+        self.assertEqual(METRICS.get("randcoin_block_mine_seconds").count, 0)
+
+class TestExport(unittest.TestCase):
+    def test_http_endpoint_and_file(self):
+        registry = Registry(enabled=True)
+        registry.counter("hits_total", "Hits.").inc()
+
+        async def scrape():
+            server = await serve_metrics("127.0.0.1", 0, registry)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return response
+
+        response = asyncio.run(scrape())
+        self.assertTrue(response.startswith(b"HTTP/1.1 200 OK"))
+        self.assertTrue(response.endswith(b"hits_total 1\n"))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.prom")
+            registry.write(path)
+            with open(path) as f:
+                self.assertEqual(f.read(), registry.render())
+
+    def test_profiling(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.prof")
+            with profiling(path):
+                Block([Transaction("System", "Alice", Decimal(1))], "0").mine(1, 1)
+            functions = {name for _, _, name in pstats.Stats(path).stats}
+            self.assertIn("mine", functions)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+from decimal import Decimal
+from unittest import mock
+from src.block import Block, BlockTemplate, HEADER_BLOCK_VERSION
+from src.blockchain import Blockchain, StaleBlockError
+from src.miner import InProcessBackend, Miner, ProcessPoolBackend, SocketBackend, serve_worker, work_unit_from_json, \
+    work_unit_to_json
+from src.mining import difficulty_to_target, meets_target
+from src.node import Node, NodeClient, REJECTED, RpcError
+from src.transaction import Transaction
+
+def new_chain():
+    blockchain = Blockchain(require_signatures=False)
+    blockchain.difficulty = 2
+    return blockchain
+
+def first_winner(template):
+    backend = InProcessBackend()
+    for unit in template.work_units(4096):
+        nonce = backend.search(unit)
+        if nonce is not None:
+            return nonce
+
+class CountingBackend(InProcessBackend):
+    """
+    Finds nothing in the first `misses` units, then searches normally.
+    """
+    def __init__(self, misses=0, on_unit=None):
+        self.misses = misses
+        self.on_unit = on_unit
+        self.units = []
+
+    def search(self, unit):
+        self.units.append(unit)
+        if self.on_unit:
+            self.on_unit(len(self.units))
+        if len(self.units) <= self.misses:
+            return None
+        return super().search(unit)
+
+class TestBlockTemplate(unittest.TestCase):
+    def test_solution_matches_block_mine(self):
+        target = difficulty_to_target(2)
+        for version in (1, HEADER_BLOCK_VERSION):
+            def new_block():
+                return Block([Transaction("System", "Miner", Decimal(10), 1700000001.0)], "0" * 64,
+                             1700000001.0, version)
+            template = BlockTemplate(new_block(), 1, target, 0)
+            expected = new_block()
+            expected.mine(2, 1, target)
+            solved = template.solve(first_winner(template))
+            self.assertEqual((solved.nonce, solved.hash), (expected.nonce, expected.hash))
+            self.assertEqual(solved.hash, solved.calculate_hash())
+            self.assertEqual(template.block.nonce, 0)
+
+    def test_work_unit_round_trip(self):
+        unit = new_chain().create_template("Miner").work_unit(10, 20)
+        self.assertEqual(work_unit_from_json(work_unit_to_json(unit)), unit)
+        with self.assertRaises(ValueError):
+            work_unit_from_json({"template": "x"})
+
+    def test_bad_solution_rejected(self):
+        blockchain = new_chain()
+        template = blockchain.create_template("Miner")
+        nonce = first_winner(template)
+        losing = next(n for n in range(nonce) if not meets_target(template.solve(n).hash, template.target))
+        with self.assertRaisesRegex(ValueError, "target"):
+            blockchain.submit_solution(template, losing)
+        self.assertEqual(blockchain.submit_solution(template, nonce)[0], 1)
+        self.assertEqual(len(blockchain.chain), 2)
+        # The tip has moved on
+        with self.assertRaises(StaleBlockError):
+            blockchain.submit_solution(template, nonce)
+
+class TestMiner(unittest.TestCase):
+    def test_backends_mine_valid_chain(self):
+        blockchain = new_chain()
+        server = serve_worker("127.0.0.1", 0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        backends = [InProcessBackend(), ProcessPoolBackend(2, chunk_size=512),
+                    SocketBackend(*server.server_address[:2])]
+        blockchain.balances["Bank"] = Decimal(3)  # funded without mining a block
+        for backend in backends:
+            miner = Miner(blockchain, [backend], unit_size=2048)
+            self.addCleanup(miner.close)
+            blockchain.add_transaction(Transaction("Bank", "Alice", Decimal(1)))
+            height, block = miner.mine("Miner")
+            self.assertIs(blockchain.chain[height], block)
+            self.assertIs(blockchain.get_latest_block(), block)
+            self.assertEqual(len(block.transactions), 2)
+
+        miner = Miner(blockchain, backends, unit_size=1024)
+        for _ in range(3):
+            miner.mine("Miner")
+        self.assertEqual(len(blockchain.chain), 7)
+        self.assertTrue(blockchain.is_chain_valid())
+
+    def test_pool_backend_uses_every_process(self):
+        backend = ProcessPoolBackend(8)
+        self.addCleanup(backend.close)
+        unit = new_chain().create_template("Miner").work_unit(0, 100000)
+        with mock.patch("src.miner.parallel_search", return_value=None) as search:
+            backend.search(unit)
+        self.assertEqual(search.call_args.kwargs["chunk_size"], 12500)
+
+    def test_new_transactions_refresh_template(self):
+        blockchain = new_chain()
+        blockchain.balances["Bank"] = Decimal(1)
+        tx = Transaction("Bank", "Alice", Decimal(1))
+
+        def submit_while_mining(units):
+            if units == 2:
+                blockchain.add_transaction(tx)
+
+        backend = CountingBackend(misses=3, on_unit=submit_while_mining)
+        _, block = Miner(blockchain, [backend], unit_size=1024, refresh_interval=0).mine("Miner")
+        self.assertIn(tx.id, [t.id for t in block.transactions])
+        self.assertEqual(len({unit.template_id for unit in backend.units}), 2)
+
+    def test_stale_tip_refreshes_template(self):
+        blockchain = new_chain()
+        other = Miner(blockchain)
+
+        def peer_block(units):
+            if units == 2:
+                other.mine("Peer")
+
+        backend = CountingBackend(misses=3, on_unit=peer_block)
+        height, block = Miner(blockchain, [backend], unit_size=1024).mine("Miner")
+        self.assertEqual(height, 2)
+        self.assertEqual(block.previous_hash, blockchain.chain[1].hash)
+        self.assertEqual(len(blockchain.chain), 3)
+
+    def test_failed_backend(self):
+        blockchain = new_chain()
+        dead = SocketBackend("127.0.0.1", 1)
+        _, block = Miner(blockchain, [dead, InProcessBackend()], unit_size=1024).mine("Miner")
+        self.assertIs(blockchain.get_latest_block(), block)
+        with self.assertRaises(OSError):
+            Miner(blockchain, [dead]).mine("Miner")
+
+class TestNodeWork(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.blockchain = new_chain()
+        self.node = Node(self.blockchain, port=0, miner=Miner(self.blockchain, unit_size=1024))
+        self.client = await NodeClient.connect(*await self.node.start())
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.node.stop()
+
+    async def test_get_and_submit_work(self):
+        work = await self.client.call("get_work", "Farm")
+        self.assertEqual(work["height"], 1)
+        # Reused while nothing changed
+        self.assertEqual((await self.client.call("get_work", "Farm"))["template"], work["template"])
+
+        template = self.node._templates[work["template"]]
+        self.assertEqual(bytes.fromhex(work["prefix"]), template.prefix)
+        with self.assertRaises(RpcError) as ctx:
+            await self.client.call("submit_work", "unknown", 0)
+        self.assertEqual(ctx.exception.code, REJECTED)
+
+        block = await self.client.call("submit_work", work["template"], first_winner(template))
+        self.assertEqual(block["height"], 1)
+        self.assertEqual(await self.client.call("get_balance", "Farm"), "10")
+        self.assertEqual((await self.client.call("get_work", "Farm"))["height"], 2)
+
+    async def test_mine_with_miner(self):
+        block = await self.client.call("mine", "Alice")
+        self.assertEqual(block["height"], 1)
+        self.assertEqual(self.blockchain.get_latest_block().hash, block["hash"])
+
+if __name__ == '__main__':
+    unittest.main()
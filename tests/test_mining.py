@@ -0,0 +1,74 @@
+import unittest
+from decimal import Decimal
+from src.block import Block, JSON_BLOCK_VERSION, HEADER_BLOCK_VERSION, HEADER_SIZE
+from src.blockchain import Blockchain
+from src.transaction import Transaction
+
+class TestParallelMining(unittest.TestCase):
+    def setUp(self):
+        self.transactions = [Transaction("Alice", "Bob", Decimal("2.5"), 1700000000.0)]
+
+    def test_parallel_matches_single_core(self):
+        """
+        Mining with a process pool must find exactly the same nonce and hash
+        as a single-core sweep.
+        """
+        single = Block(list(self.transactions), "0" * 64, timestamp=1700000000.0)
+        single.mine(3, workers=1)
+
+        parallel = Block(list(self.transactions), "0" * 64, timestamp=1700000000.0)
+        parallel.mine(3, workers=2)
+
+        self.assertEqual(parallel.nonce, single.nonce)
+        self.assertEqual(parallel.hash, single.hash)
+        self.assertEqual(parallel.hash, parallel.calculate_hash())
+
+    def test_parallel_matches_single_core_json_blocks(self):
+        single = Block(list(self.transactions), "0" * 64, timestamp=1700000000.0, version=JSON_BLOCK_VERSION)
+        single.mine(2, workers=1)
+
+        parallel = Block(list(self.transactions), "0" * 64, timestamp=1700000000.0, version=JSON_BLOCK_VERSION)
+        parallel.mine(2, workers=2)
+
+        self.assertEqual(parallel.nonce, single.nonce)
+        self.assertEqual(parallel.hash, single.calculate_hash())
+
+    def test_parallel_mined_chain_is_valid(self):
+        blockchain = Blockchain()
+        blockchain.difficulty = 2
+        blockchain.mining_workers = 2
+        blockchain.mine_pending_transactions("Miner1")
+        blockchain.mine_pending_transactions("Miner1")
+
+        self.assertTrue(blockchain.is_chain_valid())
+        self.assertTrue(blockchain.chain[-1].hash.startswith("00"))
+
+class TestBlockHeader(unittest.TestCase):
+    def test_header_size_is_constant(self):
+        small = Block([Transaction("Alice", "Bob", Decimal(1))], "0")
+        large = Block([Transaction("Alice", "Bob", Decimal(i + 1)) for i in range(500)], "0")
+        self.assertEqual(len(small.serialize_header()), HEADER_SIZE)
+        self.assertEqual(len(large.serialize_header()), HEADER_SIZE)
+
+    def test_header_mining_satisfies_difficulty(self):
+        block = Block([Transaction("Alice", "Bob", Decimal(1))], "ab" * 32, version=HEADER_BLOCK_VERSION)
+        block.mine(3, workers=1)
+        self.assertTrue(block.hash.startswith("000"))
+        self.assertEqual(block.hash, block.calculate_hash())
+
+    def test_mixed_version_chain_is_valid(self):
+        blockchain = Blockchain()
+        blockchain.difficulty = 1
+        for version in (JSON_BLOCK_VERSION, HEADER_BLOCK_VERSION, JSON_BLOCK_VERSION):
+            block = Block([Transaction("System", "Miner1", Decimal(10))],
+                          blockchain.get_latest_block().hash, version=version)
+            block.mine(1)
+            blockchain.chain.append(block)
+        self.assertTrue(blockchain.is_chain_valid())
+
+    def test_unsupported_version_rejected(self):
+        with self.assertRaises(ValueError):
+            Block([], "0", version=99)
+
+if __name__ == '__main__':
+    unittest.main()
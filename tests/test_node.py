@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+import unittest
+from unittest import mock
+from src.block import Block
+from src.blockchain import Blockchain
+from src.node import Node, NodeClient, RpcError, INVALID_PARAMS, METHOD_NOT_FOUND, PARSE_ERROR, REJECTED
+from src.sync import block_to_json
+
+class TestNode(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.blockchain = Blockchain(require_signatures=False)
+        self.blockchain.difficulty = 1
+        self.node = Node(self.blockchain, port=0)
+        host, port = await self.node.start()
+        self.client = await NodeClient.connect(host, port)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.node.stop()
+
+    async def test_transfer_and_mine(self):
+        block = await self.client.call("mine", "Alice")
+        self.assertEqual(block["height"], 1)
+        self.assertEqual(await self.client.call("get_balance", "Alice"), "10")
+
+        tx_id = await self.client.call("add_transaction", sender="Alice", recipient="Bob",
+                                       amount="2.50", fee="0.10")
+        self.assertEqual(await self.client.call("get_spendable_balance", "Alice"), "7.40")
+
+        block = await self.client.call("mine", "Miner1")
+        self.assertEqual([tx["id"] for tx in block["transactions"]][0], tx_id)
+        self.assertEqual(await self.client.call("get_balance", "Bob"), "2.50")
+        self.assertEqual(await self.client.call("get_height"), 2)
+
+        by_hash = await self.client.call("get_block_by_hash", block["hash"])
+        self.assertEqual(by_hash, await self.client.call("get_block", 2))
+        self.assertTrue(self.blockchain.is_chain_valid())
+
+    async def test_errors(self):
+        with self.assertRaises(RpcError) as ctx:
+            await self.client.call("add_transaction", "Nobody", "Bob", "5")
+        self.assertEqual(ctx.exception.code, REJECTED)
+        self.assertIn("Insufficient funds", ctx.exception.message)
+
+        # Only mining creates coins
+        for sender in ("System", "genesis"):
+            with self.assertRaises(RpcError) as ctx:
+                await self.client.call("add_transaction", sender, "Mallory", "1000000")
+            self.assertEqual(ctx.exception.code, REJECTED)
+        self.assertEqual(await self.client.call("get_balance", "Mallory"), "0")
+
+        with self.assertRaises(RpcError) as ctx:
+            await self.client.call("add_transaction", "Alice", "Bob", "abc")
+        self.assertEqual(ctx.exception.code, INVALID_PARAMS)
+
+        with self.assertRaises(RpcError) as ctx:
+            await self.client.call("get_balance")
+        self.assertEqual(ctx.exception.code, INVALID_PARAMS)
+
+        with self.assertRaises(RpcError) as ctx:
+            await self.client.call("drop_chain")
+        self.assertEqual(ctx.exception.code, METHOD_NOT_FOUND)
+
+        with self.assertRaises(RpcError) as ctx:
+            await self.client.call("get_block", 99)
+        self.assertEqual(ctx.exception.code, REJECTED)
+
+        response = await self.node.handle_message(b"{not json")
+        self.assertEqual(response["error"]["code"], PARSE_ERROR)
+        # Notifications get no response
+        self.assertIsNone(await self.node.handle_message(
+            json.dumps({"jsonrpc": "2.0", "method": "get_height"}).encode()))
+
+    async def test_requests_served_while_mining(self):
+        # Hold the proof of work until the test has made its requests
+        release = threading.Event()
+        original_mine = Block.mine
+
+        def gated_mine(block, *args):
+            release.wait(5)
+            return original_mine(block, *args)
+
+        await self.client.call("mine", "Bank")
+        host, port = self.node.address
+        other = await NodeClient.connect(host, port)
+        self.addAsyncCleanup(other.close)
+
+        with mock.patch.object(Block, "mine", gated_mine):
+            mining = asyncio.create_task(other.call("mine", "Alice"))
+            while not self.node._mining.locked():  # block prepared, proof of work running
+                await asyncio.sleep(0.001)
+            tx_id = await self.client.call("add_transaction", "Bank", "Carol", "3")
+            self.assertEqual(await self.client.call("get_height"), 1)
+            release.set()
+            block = await mining
+
+        # Submitted after the block was prepared, so it waits for the next one
+        self.assertNotIn(tx_id, [tx["id"] for tx in block["transactions"]])
+        block = await self.client.call("mine", "Alice")
+        self.assertIn(tx_id, [tx["id"] for tx in block["transactions"]])
+
+    async def test_requests_served_while_validating(self):
+        await self.client.call("mine", "Bank")
+        peer = Blockchain(require_signatures=False)
+        peer.difficulty = 1
+        peer.add_blocks([self.blockchain.chain[1]])
+        peer_block = block_to_json(peer.mine_pending_transactions("Peer"), 2)
+
+        other = await NodeClient.connect(*self.node.address)
+        self.addAsyncCleanup(other.close)
+        for name, call in (("add_transaction", ("add_transaction", "Bank", "Carol", "3")),
+                           ("add_blocks", ("submit_block", peer_block))):
+            # Hold the validation until the test has made its request
+            entered, release = threading.Event(), threading.Event()
+            original = getattr(self.blockchain, name)
+
+            def gated(*args, original=original, entered=entered, release=release):
+                entered.set()
+                release.wait(5)
+                return original(*args)
+
+            with mock.patch.object(self.blockchain, name, gated):
+                pending = asyncio.create_task(other.call(*call))
+                while not entered.is_set():
+                    await asyncio.sleep(0.001)
+                self.assertEqual(await self.client.call("get_height"), 1)
+                release.set()
+                await pending
+        self.assertEqual(self.blockchain.get_latest_block().hash, peer_block["hash"])
+        peer.close()
+
+if __name__ == '__main__':
+    unittest.main()
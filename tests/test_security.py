@@ -22,6 +22,21 @@ class TestTransactionSecurity(unittest.TestCase):
         with self.assertRaises(AttributeError):
             tx.recipient = "Mallory"
 
+    def test_no_arbitrary_attributes(self):
+        """
+        Slotted transactions cannot grow new attributes, and the id is
+        unaffected by materialising the dict representation.
+        """
+        tx = Transaction("Alice", "Bob", Decimal(10))
+        tx_id = tx.id
+
+        with self.assertRaises(AttributeError):
+            tx.fee = Decimal(1)
+
+        tx.to_dict()
+        self.assertEqual(tx.id, tx_id)
+        self.assertEqual(tx.calculate_hash(), tx_id)
+
     def test_validation(self):
         """
         Verify that invalid transactions cannot be created.
@@ -34,6 +49,10 @@ class TestTransactionSecurity(unittest.TestCase):
         with self.assertRaises(ValueError):
             Transaction("Alice", "Bob", Decimal(0))
 
+        # Negative amount (genesis)
+        with self.assertRaises(ValueError):
+            Transaction("genesis", "Mallory", Decimal(-10))
+
         # Empty sender
         with self.assertRaises(ValueError):
             Transaction("", "Bob", Decimal(10))
@@ -0,0 +1,165 @@
+import hashlib
+import unittest
+from decimal import Decimal
+from src import secp256k1
+from src.block import Block
+from src.blockchain import Blockchain
+from src.codec import decode_block, encode_block, encode_transaction, decode_transaction
+from src.signatures import SignatureVerifier
+from src.storage import _decode_json_block, _encode_json_block
+from src.sync import transaction_from_json, transaction_to_json
+from src.transaction import Transaction
+from src.wallet import Wallet
+
+class TestSecp256k1(unittest.TestCase):
+    def test_known_vectors(self):
+        self.assertEqual(secp256k1.public_key(1).hex(),
+                         "0279be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798")
+        self.assertEqual(secp256k1.public_key(2).hex(),
+                         "02c6047f9441ed7d6d3045406e95c07cd85c778e4b8cef3ca7abac09b95c709ee5")
+        # RFC 6979 deterministic nonce, low-s normalised
+        digest = hashlib.sha256(b"Satoshi Nakamoto").digest()
+        self.assertEqual(secp256k1.sign(1, digest).hex(),
+                         "934b1ea10a4b3c1757e2b0c017d0b6143ce3c9a7e6a4a49860d7a6ab210ee3d8"
+                         "2442ce9d2b916064108014783e923ec36b49743e2ffa1c4496f01a512aafd9e5")
+
+    def test_sign_and_verify(self):
+        private_key = secp256k1.generate_private_key()
+        key = secp256k1.public_key(private_key)
+        digest = hashlib.sha256(b"payload").digest()
+        signature = secp256k1.sign(private_key, digest)
+        self.assertTrue(secp256k1.verify(key, digest, signature))
+        self.assertFalse(secp256k1.verify(key, hashlib.sha256(b"other").digest(), signature))
+        self.assertFalse(secp256k1.verify(secp256k1.public_key(private_key + 1), digest, signature))
+
+        r, s = signature[:32], int.from_bytes(signature[32:], "big")
+        high_s = r + (secp256k1.N - s).to_bytes(32, "big")
+        self.assertFalse(secp256k1.verify(key, digest, high_s))
+        self.assertFalse(secp256k1.verify(b"\x02" + bytes(32), digest, signature))
+        self.assertFalse(secp256k1.verify(key, digest, signature[:-1]))
+
+class TestSignedTransactions(unittest.TestCase):
+    def setUp(self):
+        self.wallet = Wallet()
+        self.blockchain = Blockchain()
+        self.blockchain.difficulty = 1
+        # Mining rewards are the only way to create coins
+        for _ in range(10):
+            self.blockchain.mine_pending_transactions(self.wallet.address)
+
+    def tearDown(self):
+        self.blockchain.close()
+
+    def test_wallet_signs_its_own_transactions(self):
+        tx = self.wallet.create_transaction("Bob", Decimal(5))
+        self.assertEqual(tx.id, tx.calculate_hash())  # the signature is not part of the id
+        self.assertTrue(SignatureVerifier().verify(tx))
+        with self.assertRaises(ValueError):
+            self.wallet.sign(tx)  # already signed
+        with self.assertRaises(ValueError):
+            self.wallet.sign(Transaction("Alice", "Bob", Decimal(5)))
+
+        # The signature belongs to the sender's key, not just any key
+        forged = Transaction(self.wallet.address, "Mallory", Decimal(5))
+        impostor = Wallet()
+        forged.attach_signature(impostor.public_key, secp256k1.sign(impostor.private_key, bytes.fromhex(forged.id)))
+        self.assertFalse(SignatureVerifier().verify(forged))
+
+    def test_admission(self):
+        self.blockchain.add_transaction(self.wallet.create_transaction("Bob", Decimal(5)))
+
+        tampered = Transaction(self.wallet.address, "Bob", Decimal(6))
+        tampered.attach_signature(self.wallet.public_key, self.wallet.create_transaction("Bob", Decimal(7)).signature)
+        with self.assertRaisesRegex(ValueError, "Invalid signature"):
+            self.blockchain.add_transaction(tampered)
+
+        results = self.blockchain.add_transactions([self.wallet.create_transaction("Carol", Decimal(1)), tampered])
+        self.assertTrue(results[0].accepted)
+        self.assertEqual(results[1].error, "Invalid signature.")
+
+        # Unsigned transfers are turned away unless signatures are turned off
+        unsigned = Transaction(self.wallet.address, "Dave", Decimal(1))
+        with self.assertRaisesRegex(ValueError, "not signed"):
+            self.blockchain.add_transaction(unsigned)
+        self.assertEqual(self.blockchain.add_transactions([unsigned])[0].error, "Transaction is not signed.")
+        self.blockchain.require_signatures = False
+        self.blockchain.add_transaction(unsigned)
+        self.blockchain.require_signatures = True
+        # System senders need no signature, but only mining creates their transactions
+        with self.assertRaisesRegex(ValueError, "created by mining"):
+            self.blockchain.add_transaction(Transaction("System", "Erin", Decimal(1)))
+
+    def test_cache_skips_second_check(self):
+        verifier = self.blockchain.signatures
+        tx = self.wallet.create_transaction("Bob", Decimal(5))
+        self.assertFalse(verifier.is_cached(tx))
+        self.blockchain.add_transaction(tx)
+        self.assertTrue(verifier.is_cached(tx))
+
+        # A different signature under a cached id is checked on its own merits
+        copy = Transaction.restore(tx.sender, tx.recipient, tx.amount, tx.timestamp, tx.fee, tx.id,
+                                   tx.public_key, bytes(64))
+        self.assertFalse(verifier.is_cached(copy))
+        self.assertEqual(verifier.verify_many([copy, tx]), [False, True])
+        # So is a different public key under the cached id and signature
+        swapped = Transaction.restore(tx.sender, tx.recipient, tx.amount, tx.timestamp, tx.fee, tx.id,
+                                      Wallet().public_key, tx.signature)
+        self.assertFalse(verifier.is_cached(swapped))
+        self.assertEqual(verifier.verify_many([swapped]), [False])
+
+        small = SignatureVerifier(cache_size=1)
+        other = self.wallet.create_transaction("Carol", Decimal(1))
+        small.verify_many([tx, other])
+        self.assertEqual((small.is_cached(tx), small.is_cached(other)), (False, True))
+
+    def test_blocks_with_bad_signatures_rejected(self):
+        good = self.wallet.create_transaction("Bob", Decimal(5))
+        bad = Transaction(self.wallet.address, "Bob", Decimal(6))
+        bad.attach_signature(self.wallet.public_key, good.signature)
+        unsigned = Transaction(self.wallet.address, "Bob", Decimal(7))
+        for txs, error in (([bad], "signed incorrectly"), ([unsigned], "not signed"), ([good], None)):
+            # Stamped after the tip: blocks mined within a millisecond run slightly ahead of the clock
+            tip = self.blockchain.get_latest_block()
+            block = Block(txs + [Transaction("System", "Miner", Decimal(10))], tip.hash, tip.timestamp + 1)
+            block.mine(self.blockchain.difficulty, 1, self.blockchain.next_target())
+            if error is None:
+                self.blockchain.add_blocks([block])
+            else:
+                with self.assertRaisesRegex(ValueError, error):
+                    self.blockchain.add_blocks([block])
+        self.assertEqual(self.blockchain.get_balance("Bob"), Decimal(5))
+
+    def test_parallel_batch_matches_sequential(self):
+        txs = [self.wallet.create_transaction("Bob", Decimal(1), fee=Decimal(i)) for i in range(6)]
+        txs[3] = Transaction.restore(txs[3].sender, txs[3].recipient, txs[3].amount, txs[3].timestamp,
+                                     txs[3].fee, txs[3].id, txs[3].public_key, txs[2].signature)
+        txs.append(Transaction("Alice", "Bob", Decimal(1)))
+        expected = [True, True, True, False, True, True, False]
+        self.assertEqual(SignatureVerifier(workers=1).verify_many(txs), expected)
+        verifier = SignatureVerifier(workers=2, chunk_size=2)
+        try:
+            self.assertEqual(verifier.verify_many(txs), expected)
+        finally:
+            verifier.close()
+
+    def test_signatures_survive_serialisation(self):
+        tx = self.wallet.create_transaction("Bob", Decimal("5.5"), fee=Decimal("0.25"))
+        copies = [decode_transaction(encode_transaction(tx))[0], transaction_from_json(transaction_to_json(tx))]
+        block = Block([tx], self.blockchain.get_latest_block().hash)
+        copies.append(decode_block(encode_block(block))[0].transactions[0])
+        copies.append(_decode_json_block(_encode_json_block(block)).transactions[0])
+        for copy in copies:
+            self.assertEqual((copy.id, copy.public_key, copy.signature), (tx.id, tx.public_key, tx.signature))
+
+        unsigned = Transaction("Alice", "Bob", Decimal(1))
+        self.assertIsNone(decode_transaction(encode_transaction(unsigned))[0].signature)
+        with self.assertRaises(ValueError):
+            decode_transaction(encode_transaction(tx)[:-1])
+
+        # Blocks encoded before signatures (codec version 1) have no witness flag
+        legacy = bytearray(encode_block(Block([unsigned], "0")))
+        legacy[0] = 1
+        self.assertEqual(decode_block(bytes(legacy[:-1]))[0].transactions[0].id, unsigned.id)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from decimal import Decimal
+from src.blockchain import Blockchain
+from src.snapshot import Snapshot, list_snapshots, read_snapshot, snapshot_path, write_snapshot
+from src.transaction import Transaction
+
+class TestBalanceSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open_chain(self):
+        blockchain = Blockchain(data_dir=self.data_dir, require_signatures=False)
+        blockchain.difficulty = 1
+        blockchain.snapshot_interval = 2
+        return blockchain
+
+    def build_chain(self):
+        blockchain = self.open_chain()
+        blockchain.mine_pending_transactions("Alice")
+        blockchain.add_transaction(Transaction("Alice", "Bob", Decimal("3.25")))
+        for _ in range(3):
+            blockchain.mine_pending_transactions("Miner1")
+        balances = dict(blockchain.balances)
+        blockchain.close()
+        return balances
+
+    def test_snapshots_written_and_pruned(self):
+        self.build_chain()
+        self.assertEqual(list_snapshots(self.data_dir), [4, 2])
+
+    def test_restart_matches_full_replay(self):
+        balances = self.build_chain()
+        reopened = self.open_chain()
+        self.assertEqual(reopened.balances, balances)
+        self.assertTrue(reopened.verify_snapshot(snapshot_path(self.data_dir, 4)))
+        reopened.close()
+
+    def test_startup_loads_snapshot_and_replays_tail(self):
+        self.build_chain()
+        # Doctor the latest snapshot; startup must trust it rather than replay history
+        path = snapshot_path(self.data_dir, 4)
+        snapshot = read_snapshot(path)
+        snapshot.balances["Bob"] = Decimal("99")
+        write_snapshot(path, snapshot)
+
+        reopened = self.open_chain()
+        self.assertEqual(reopened.get_balance("Bob"), Decimal("99"))
+        self.assertFalse(reopened.verify_snapshot(path))
+        reopened.close()
+
+    def test_orphaned_snapshot_is_ignored(self):
+        balances = self.build_chain()
+        write_snapshot(snapshot_path(self.data_dir, 4), Snapshot(4, "ab" * 32, {"Bob": Decimal("99")}))
+
+        reopened = self.open_chain()
+        self.assertEqual(reopened.balances, balances)
+        reopened.close()
+
+    def test_long_startup_replay_takes_snapshot(self):
+        balances = self.build_chain()
+        for height in list_snapshots(self.data_dir):
+            os.remove(snapshot_path(self.data_dir, height))
+
+        reopened = self.open_chain()
+        self.assertEqual(list_snapshots(self.data_dir), [])
+        reopened.close()
+        # The default interval is longer than this chain; a shorter one triggers it
+        with mock.patch("src.blockchain.SNAPSHOT_INTERVAL", 2):
+            reopened = Blockchain(data_dir=self.data_dir, require_signatures=False)
+        self.assertEqual(list_snapshots(self.data_dir), [4])
+        self.assertEqual(reopened.balances, balances)
+        reopened.close()
+
+    def test_in_memory_chain_cannot_snapshot(self):
+        with self.assertRaises(ValueError):
+            Blockchain(require_signatures=False).save_snapshot()
+
+if __name__ == '__main__':
+    unittest.main()
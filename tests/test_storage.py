@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from src.blockchain import Blockchain
+from src.storage import BlockStore, INDEX_FILE, BLOCKS_FILE
+from src.transaction import Transaction
+
+class TestBlockStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open_chain(self):
+        blockchain = Blockchain(data_dir=self.data_dir, require_signatures=False)
+        blockchain.difficulty = 1
+        return blockchain
+
+    def test_chain_survives_restart(self):
+        blockchain = self.open_chain()
+        blockchain.mine_pending_transactions("Alice")
+        blockchain.add_transaction(Transaction("Alice", "Bob", Decimal("2.50"), fee=Decimal("0.25")))
+        blockchain.mine_pending_transactions("Miner1")
+        tip = blockchain.get_latest_block().hash
+        blockchain.close()
+
+        reopened = self.open_chain()
+        self.assertEqual(len(reopened.chain), 3)
+        self.assertEqual(reopened.get_latest_block().hash, tip)
+        self.assertEqual(reopened.get_balance("Alice"), Decimal("7.25"))
+        self.assertEqual(reopened.get_balance("Miner1"), Decimal("10.25"))
+        self.assertEqual(reopened.get_balance("Bob"), Decimal("2.50"))
+        self.assertTrue(reopened.is_chain_valid())
+        reopened.close()
+
+    def test_integer_timestamps_survive_restart(self):
+        blockchain = self.open_chain()
+        blockchain.mine_pending_transactions("Alice")
+        tx = Transaction("Alice", "Bob", Decimal(1), 1700000123)
+        self.assertEqual(tx.timestamp, 1700000123.0)
+        blockchain.add_transaction(tx)
+        blockchain.mine_pending_transactions("Miner1")
+        blockchain.close()
+
+        reopened = self.open_chain()
+        self.assertIn(tx.id, reopened.tx_index)
+        self.assertEqual(reopened.get_balance("Bob"), Decimal(1))
+        self.assertTrue(reopened.is_chain_valid())
+        reopened.close()
+
+    def test_lookup_by_height_and_hash(self):
+        blockchain = self.open_chain()
+        for _ in range(3):
+            blockchain.mine_pending_transactions("Miner1")
+        blockchain.close()
+
+        store = BlockStore(self.data_dir, cache_size=1)
+        block = store[2]
+        self.assertEqual(store.get_hash(2), block.hash)
+        self.assertEqual(store.height_of(block.hash), 2)
+        self.assertEqual(store.get_by_hash(block.hash).hash, block.hash)
+        self.assertEqual(store[-1].previous_hash, block.hash)
+        self.assertEqual([b.hash for b in store[1:3]], [store.get_hash(1), store.get_hash(2)])
+        self.assertIsNone(store.height_of("ff" * 32))
+        store.close()
+
+    def test_torn_write_is_discarded(self):
+        blockchain = self.open_chain()
+        blockchain.mine_pending_transactions("Miner1")
+        blockchain.close()
+
+        # Simulate a crash part-way through writing the next block
+        with open(os.path.join(self.data_dir, BLOCKS_FILE), "ab") as f:
+            f.write(b"\x10\x00\x00\x00{partial")
+        with open(os.path.join(self.data_dir, INDEX_FILE), "ab") as f:
+            f.write(b"\x00" * 7)
+
+        store = BlockStore(self.data_dir)
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store[1].calculate_hash(), store.get_hash(1))
+        store.close()
+
+if __name__ == '__main__':
+    unittest.main()
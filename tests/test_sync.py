@@ -0,0 +1,203 @@
+import asyncio
+import tempfile
+import unittest
+from decimal import Decimal
+from src.block import Block
+from src.blockchain import Blockchain
+from src.node import Node, NodeClient
+from src.sync import ChainSync, SyncError, block_from_json, block_locator, block_to_json
+from src.transaction import Transaction
+
+def nonzero(balances):
+    return {address: amount for address, amount in balances.items() if amount}
+
+def make_chain(data_dir=None):
+    blockchain = Blockchain(data_dir, require_signatures=False)
+    blockchain.difficulty = 1
+    return blockchain
+
+def mine_blocks(blockchain, miner, count):
+    for _ in range(count):
+        blockchain.mine_pending_transactions(miner)
+
+class TestReorganize(unittest.TestCase):
+    def setUp(self):
+        # Two nodes share genesis and the first block, then diverge
+        self.ours = make_chain()
+        self.theirs = make_chain()
+        mine_blocks(self.ours, "Alice", 1)
+        self.theirs.add_blocks([self.ours.chain[1]])
+
+        self.transfer = Transaction("Alice", "Bob", Decimal(4))
+        self.ours.add_transaction(self.transfer)
+        mine_blocks(self.ours, "Miner1", 2)
+        mine_blocks(self.theirs, "Miner2", 3)
+        self.branch = list(self.theirs.chain[2:])
+
+    def test_reorg_rolls_back_and_applies_branch(self):
+        self.assertEqual(self.ours.get_balance("Bob"), Decimal(4))
+        self.ours.reorganize(1, self.branch)
+
+        self.assertEqual(self.ours.get_latest_block().hash, self.theirs.get_latest_block().hash)
+        self.assertEqual(nonzero(self.ours.balances), nonzero(self.theirs.balances))
+        self.assertEqual(self.ours.get_balance("Miner1"), Decimal(0))
+        # The orphaned transfer is pending again, its reward is not
+        self.assertEqual(self.ours.pending_transactions, [self.transfer])
+        self.assertNotIn(self.transfer.id, self.ours.tx_index)
+        self.assertIsNone(self.ours.explorer.find_transaction(self.transfer.id))
+        self.assertEqual(self.ours.explorer.address_transaction_count("Miner1"), 0)
+        self.assertTrue(self.ours.is_chain_valid())
+
+        # Mining it again lands it on the new chain
+        mine_blocks(self.ours, "Miner1", 1)
+        self.assertEqual(self.ours.get_balance("Bob"), Decimal(4))
+
+    def test_invalid_branch_restores_original(self):
+        before = (self.ours.get_latest_block().hash, nonzero(self.ours.balances))
+        tampered = block_from_json(block_to_json(self.branch[-1], 4))
+        tampered.nonce += 1
+        # Restored as they were, even though the unsigned transfer would not be accepted now
+        self.ours.require_signatures = True
+        with self.assertRaises(ValueError):
+            self.ours.reorganize(1, self.branch[:-1] + [tampered])
+        self.assertEqual((self.ours.get_latest_block().hash, nonzero(self.ours.balances)), before)
+        self.assertEqual(len(self.ours.chain), 4)
+        self.assertIn(self.transfer.id, self.ours.tx_index)
+        self.assertEqual(self.ours.explorer.address_transaction_count("Bob"), 1)
+
+        # A branch with no more work than ours is refused outright
+        with self.assertRaises(ValueError):
+            self.ours.reorganize(1, self.branch[:2])
+
+    def test_overdraft_rejected(self):
+        spender = make_chain()
+        spender.balances["Mallory"] = Decimal(100)  # only this node believes it
+        spender.add_transaction(Transaction("Mallory", "Bob", Decimal(50)))
+        mine_blocks(spender, "Mallory", 1)
+        with self.assertRaises(ValueError):
+            make_chain().add_blocks([spender.chain[1]])
+
+    def test_minting_rejected(self):
+        # Extra system transfers, an inflated reward, or none at all
+        reward = Transaction("System", "Mallory", Decimal(10))
+        for transactions in ([Transaction("System", "Mallory", Decimal(10 ** 6)), reward],
+                             [Transaction("genesis", "Mallory", Decimal(5)), reward],
+                             [Transaction("System", "Mallory", Decimal(11))],
+                             [Transaction("Alice", "Bob", Decimal(1), fee=Decimal(1)), reward],
+                             [Transaction("Alice", "Bob", Decimal(1))]):
+            tip = self.theirs.get_latest_block()
+            block = Block(transactions, tip.hash, tip.timestamp + 1)
+            block.mine(1, 1, self.theirs.next_target())
+            with self.assertRaisesRegex(ValueError, "reward|sent by"):
+                self.theirs.add_blocks([block])
+            with self.assertRaisesRegex(ValueError, "reward|sent by"):
+                self.theirs.import_blocks([block])
+        self.assertEqual(self.theirs.get_balance("Mallory"), Decimal(0))
+        self.assertTrue(self.theirs.is_chain_valid())
+
+    def test_persistent_reorg_survives_restart(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            ours = make_chain(data_dir)
+            ours.add_blocks(self.ours.chain[1:])
+            ours.reorganize(1, self.branch)
+            tip = ours.get_latest_block().hash
+            ours.close()
+
+            reopened = make_chain(data_dir)
+            self.assertEqual(reopened.get_latest_block().hash, tip)
+            self.assertEqual(nonzero(reopened.balances), nonzero(self.theirs.balances))
+            self.assertNotIn(self.transfer.id, reopened.tx_index)
+            reopened.close()
+
+class DroppingPeer:
+    """
+    Forwards to a real peer, but drops every get_blocks after a short delay.
+    """
+    def __init__(self, client):
+        self.client = client
+
+    async def call(self, method, *args):
+        if method == "get_blocks":
+            await asyncio.sleep(0.05)
+            raise ConnectionError("Peer went away.")
+        return await self.client.call(method, *args)
+
+class TestPeerSync(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.nodes = []
+        for _ in range(3):
+            node = Node(make_chain(), port=0)
+            await node.start()
+            self.nodes.append(node)
+
+    async def asyncTearDown(self):
+        for node in self.nodes:
+            await node.stop()
+
+    async def test_headers_first_sync_and_reorg(self):
+        first, second, fresh = self.nodes
+        mine_blocks(first.blockchain, "Alice", 3)
+        mine_blocks(second.blockchain, "Bob", 5)
+
+        # The fresh node downloads from both peers in small chunks and picks the most work
+        clients = [await NodeClient.connect(*node.address) for node in (first, second)]
+        try:
+            synced = await ChainSync(fresh.blockchain, clients, headers_per_request=2, blocks_per_request=2).sync()
+        finally:
+            for client in clients:
+                await client.close()
+        self.assertEqual(synced, 5)
+        self.assertEqual(fresh.blockchain.get_latest_block().hash, second.blockchain.get_latest_block().hash)
+
+        # The first node reorganises onto the heavier chain
+        self.assertEqual(await first.add_peer(*second.address), 5)
+        self.assertEqual(first.blockchain.get_balance("Alice"), Decimal(0))
+        self.assertEqual(first.blockchain.get_balance("Bob"), Decimal(50))
+        self.assertEqual(nonzero(first.blockchain.balances), nonzero(second.blockchain.balances))
+
+    async def test_chunks_of_a_failed_peer_are_retried(self):
+        first, _, fresh = self.nodes
+        mine_blocks(first.blockchain, "Alice", 4)
+        client = await NodeClient.connect(*first.address)
+        self.addAsyncCleanup(client.close)
+        # The good peer is done with its chunk before the other drops the second one
+        sync = ChainSync(fresh.blockchain, [client, DroppingPeer(client)], blocks_per_request=2)
+        self.assertEqual(await sync.sync(), 4)
+        self.assertEqual(fresh.blockchain.get_latest_block().hash, first.blockchain.get_latest_block().hash)
+
+    async def test_new_blocks_are_relayed(self):
+        first, second, _ = self.nodes
+        await first.add_peer(*second.address)
+        await second.add_peer(*first.address)
+
+        client = await NodeClient.connect(*first.address)
+        self.addAsyncCleanup(client.close)
+        mined = await client.call("mine", "Alice")
+        for _ in range(200):
+            if second.blockchain.get_latest_block().hash == mined["hash"]:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(second.blockchain.get_latest_block().hash, mined["hash"])
+
+    def test_block_locator(self):
+        chain = list(range(100))
+
+        class Stub:
+            def __init__(self, h):
+                self.hash = str(h)
+        locator = block_locator([Stub(h) for h in chain])
+        self.assertEqual(locator[:10], [str(h) for h in range(99, 89, -1)])
+        self.assertEqual(locator[-1], "0")
+        self.assertLess(len(locator), 20)
+
+    async def test_bad_headers_rejected(self):
+        first, _, fresh = self.nodes
+        mine_blocks(first.blockchain, "Alice", 2)
+        fresh.blockchain.difficulty = 3  # first's blocks don't meet it
+        client = await NodeClient.connect(*first.address)
+        self.addAsyncCleanup(client.close)
+        with self.assertRaises(SyncError):
+            await ChainSync(fresh.blockchain, [client]).fetch_headers(client)
+
+if __name__ == '__main__':
+    unittest.main()
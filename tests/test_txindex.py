@@ -0,0 +1,122 @@
+import hashlib
+import tempfile
+import unittest
+from decimal import Decimal
+from src.blockchain import Blockchain
+from src.transaction import Transaction
+from src.txindex import KEY_SIZE, MEMORY_BYTES_PER_TRANSACTION, BloomFilter, TransactionIndex, TxTable, tx_key
+
+class TestReplayProtection(unittest.TestCase):
+    def setUp(self):
+        self.blockchain = Blockchain(require_signatures=False)
+        self.blockchain.difficulty = 1
+        self.blockchain.mine_pending_transactions("Alice")
+
+    def test_pending_duplicate_rejected(self):
+        tx = Transaction("Alice", "Bob", Decimal(1))
+        self.blockchain.add_transaction(tx)
+        with self.assertRaises(ValueError):
+            self.blockchain.add_transaction(tx)
+
+    def test_mined_duplicate_rejected(self):
+        tx = Transaction("Alice", "Bob", Decimal(1))
+        self.blockchain.add_transaction(tx)
+        self.blockchain.mine_pending_transactions("Miner1")
+        with self.assertRaisesRegex(ValueError, "already included"):
+            self.blockchain.add_transaction(tx)
+        self.assertEqual(self.blockchain.get_balance("Bob"), Decimal(1))
+
+    def test_batch_duplicates_rejected(self):
+        mined = Transaction("Alice", "Bob", Decimal(1))
+        self.blockchain.add_transaction(mined)
+        self.blockchain.mine_pending_transactions("Miner1")
+
+        fresh = Transaction("Alice", "Bob", Decimal(2))
+        results = self.blockchain.add_transactions([mined, fresh, fresh])
+        self.assertEqual([r.accepted for r in results], [False, True, False])
+
+class TestTransactionIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_bloom_has_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        keys = [tx_key(hashlib.sha256(str(i).encode()).hexdigest()) for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+
+    def test_table_grows_and_keeps_keys(self):
+        keys = [tx_key(hashlib.sha256(str(i).encode()).hexdigest()) for i in range(100)]
+        for path in (self.tmp.name + "/table.dat", None):
+            with self.subTest(path=path):
+                table = TxTable(path, capacity=4)
+                for key in keys:
+                    self.assertTrue(table.add(key))
+                self.assertFalse(table.add(keys[0]))
+                self.assertEqual(table.count, 100)
+                self.assertTrue(all(key in table for key in keys))
+                self.assertNotIn(tx_key("ab" * 32), table)
+                table.close()
+
+    def test_known_keys_do_not_grow_table(self):
+        table = TxTable(None, capacity=4)
+        keys = [tx_key(hashlib.sha256(str(i).encode()).hexdigest()) for i in range(table.slots // 2 + 1)]
+        for key in keys[:-1]:
+            table.add(key)
+        slots = table.slots
+        # Full to the load limit: known keys leave it alone, a new one doubles it
+        for key in keys[:-1]:
+            self.assertFalse(table.add(key))
+        self.assertEqual(table.slots, slots)
+        self.assertTrue(table.add(keys[-1]))
+        self.assertEqual(table.slots, slots * 2)
+
+    def test_memory_index_is_bounded(self):
+        index = TransactionIndex()
+        self.assertIsNone(index.bloom)
+        tx_ids = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(5000)]
+        for tx_id in tx_ids:
+            index.add(tx_id)
+        self.assertEqual(len(index), len(tx_ids))
+        self.assertTrue(all(tx_id in index for tx_id in tx_ids))
+        self.assertNotIn("ab" * 32, index)
+        self.assertLessEqual(index.table.slots * KEY_SIZE, MEMORY_BYTES_PER_TRANSACTION * len(tx_ids))
+        index.close()
+
+    def test_discard_keeps_probe_runs_intact(self):
+        table = TxTable(self.tmp.name + "/table.dat", capacity=8)
+        # Same home slot for every key forces one long probe run
+        keys = [bytes([0] * 8 + [i] * 8) for i in range(1, 7)]
+        for key in keys:
+            table.add(key)
+        self.assertTrue(table.discard(keys[1]))
+        self.assertFalse(table.discard(keys[1]))
+        self.assertEqual([key in table for key in keys], [True, False, True, True, True, True])
+        self.assertEqual(table.count, 5)
+        table.close()
+
+    def test_persistent_index_catches_up_after_restart(self):
+        blockchain = Blockchain(data_dir=self.tmp.name, require_signatures=False)
+        blockchain.difficulty = 1
+        blockchain.mine_pending_transactions("Alice")
+        tx = Transaction("Alice", "Bob", Decimal(1))
+        blockchain.add_transaction(tx)
+        blockchain.mine_pending_transactions("Miner1")
+        blockchain.close()
+
+        index = TransactionIndex(self.tmp.name)
+        self.assertEqual(index.blocks, 3)
+        self.assertIn(tx.id, index)
+        index.close()
+
+        reopened = Blockchain(data_dir=self.tmp.name, require_signatures=False)
+        with self.assertRaises(ValueError):
+            reopened.add_transaction(tx)
+        reopened.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from decimal import Decimal
+from src.blockchain import Blockchain
+from src.transaction import Transaction
+
+class TestChainValidation(unittest.TestCase):
+    def setUp(self):
+        self.blockchain = Blockchain()
+        self.blockchain.difficulty = 1
+        for _ in range(5):
+            self.blockchain.mine_pending_transactions("Miner1")
+
+    def tamper(self, height):
+        block = self.blockchain.chain[height]
+        original = block.transactions[0]
+        block.transactions[0] = Transaction(original.sender, original.recipient, Decimal(1000), original.timestamp)
+
+    def test_incremental_checks_only_new_blocks(self):
+        result = self.blockchain.verify_chain()
+        self.assertTrue(result.valid)
+        self.assertEqual(result.checked, 5)
+        self.assertEqual(self.blockchain.validated_height, 5)
+
+        self.blockchain.mine_pending_transactions("Miner1")
+        result = self.blockchain.verify_chain()
+        self.assertTrue(result.valid)
+        self.assertEqual(result.checked, 1)
+
+        self.assertEqual(self.blockchain.verify_chain().checked, 0)
+
+    def test_reports_first_invalid_index(self):
+        self.tamper(3)
+        self.tamper(4)
+        result = self.blockchain.verify_chain()
+        self.assertFalse(result.valid)
+        self.assertEqual(result.first_invalid_index, 3)
+        self.assertEqual(self.blockchain.validated_height, 2)
+
+    def test_full_mode_rechecks_behind_checkpoint(self):
+        self.assertTrue(self.blockchain.verify_chain().valid)
+        self.tamper(2)
+        self.assertTrue(self.blockchain.verify_chain().valid)
+
+        result = self.blockchain.verify_chain(full=True)
+        self.assertEqual(result.first_invalid_index, 2)
+        self.assertFalse(self.blockchain.is_chain_valid())
+
+    def test_verify_from_height(self):
+        self.tamper(2)
+        result = self.blockchain.verify_chain(start=3)
+        self.assertEqual((result.valid, result.checked), (True, 3))
+        # Blocks below the start weren't checked, so the checkpoint stays put
+        self.assertEqual(self.blockchain.validated_height, 0)
+        self.assertEqual(self.blockchain.verify_chain(start=1).first_invalid_index, 2)
+        self.assertEqual(self.blockchain.verify_chain(start=99).checked, 0)
+
+    def test_parallel_full_verification(self):
+        self.assertEqual(self.blockchain.verify_chain(full=True, workers=2),
+                         self.blockchain.verify_chain(full=True, workers=1))
+        self.tamper(4)
+        result = self.blockchain.verify_chain(full=True, workers=2)
+        self.assertEqual(result.first_invalid_index, 4)
+
+    def test_broken_link_detected(self):
+        self.blockchain.chain[3].previous_hash = "f" * 64
+        result = self.blockchain.verify_chain(full=True, workers=2)
+        self.assertEqual(result.first_invalid_index, 3)
+
+if __name__ == '__main__':
+    unittest.main()